@@ -1,11 +1,12 @@
 from __future__ import annotations
 
-from fastapi import Request
+import hmac
+
+from fastapi import Depends, Header, HTTPException, Request, WebSocket, status
 
 from ..core.config import Settings, get_settings
-from ..repositories.history import HistoryRepository
-from ..repositories.user import UserRepository
-from ..repositories.saved_outfits import SavedOutfitRepository
+from ..core.security import PasswordHasher
+from ..repositories.base import HistoryStore, SavedOutfitStore, UserStore
 from ..services.stylist import StylistService
 
 
@@ -13,7 +14,7 @@ def settings_dep() -> Settings:
     return get_settings()
 
 
-def history_repo_dep(request: Request) -> HistoryRepository:
+def history_repo_dep(request: Request) -> HistoryStore:
     return request.app.state.history_repo  # type: ignore[attr-defined]
 
 
@@ -21,10 +22,29 @@ def stylist_service_dep(request: Request) -> StylistService:
     return request.app.state.stylist  # type: ignore[attr-defined]
 
 
-def user_repo_dep(request: Request) -> UserRepository:
+def stylist_service_ws_dep(websocket: WebSocket) -> StylistService:
+    return websocket.app.state.stylist  # type: ignore[attr-defined]
+
+
+def user_repo_dep(request: Request) -> UserStore:
     return request.app.state.user_repo  # type: ignore[attr-defined]
 
 
-def saved_outfit_repo_dep(request: Request) -> SavedOutfitRepository:
+def saved_outfit_repo_dep(request: Request) -> SavedOutfitStore:
     return request.app.state.saved_outfits  # type: ignore[attr-defined]
 
+
+def password_hasher_dep(request: Request) -> PasswordHasher:
+    return request.app.state.password_hasher  # type: ignore[attr-defined]
+
+
+
+def admin_dep(
+    x_admin_token: str | None = Header(default=None),
+    settings: Settings = Depends(settings_dep),
+) -> None:
+    """Admin routes need `X-Admin-Token: $ADMIN_TOKEN`; without ADMIN_TOKEN set they do not exist."""
+    if not settings.admin_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), settings.admin_token.encode()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import anyio
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+
+from ....core.config import Settings
+from ....core.errors import InvalidInputError
+from ....repositories.base import HistoryStore, SavedOutfitStore
+from ....services.data_transfer import Dataset, ImportResult, export_ndjson, import_ndjson
+from ....services.stylist import StylistService
+from ...deps import admin_dep, history_repo_dep, saved_outfit_repo_dep, settings_dep, stylist_service_dep
+
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(admin_dep)])
+
+
+@router.get("/export/{dataset}")
+async def export_dataset(
+    dataset: Dataset,
+    user_id: str | None = Query(default=None),
+    history: HistoryStore = Depends(history_repo_dep),
+    saved: SavedOutfitStore = Depends(saved_outfit_repo_dep),
+    settings: Settings = Depends(settings_dep),
+):
+    """Stream every row of `dataset` (optionally one user's) as NDJSON."""
+    chunks = export_ndjson(dataset, history, saved, user_id=user_id, batch_rows=settings.transfer_batch_rows)
+    return StreamingResponse(chunks, media_type="application/x-ndjson")
+
+
+@router.post("/import/{dataset}")
+async def import_dataset(
+    dataset: Dataset,
+    request: Request,
+    history: HistoryStore = Depends(history_repo_dep),
+    saved: SavedOutfitStore = Depends(saved_outfit_repo_dep),
+    stylist: StylistService = Depends(stylist_service_dep),
+    settings: Settings = Depends(settings_dep),
+):
+    """
+    Import an NDJSON request body (as produced by export) in batches of
+    TRANSFER_BATCH_ROWS. History rows are appended unless already stored
+    (same user, outfit and created_at); saved outfits are upserted, the
+    newer copy winning. `rows` counts rows actually written.
+    """
+    result = ImportResult()
+    try:
+        await import_ndjson(
+            dataset, request.stream(), history, saved, batch_rows=settings.transfer_batch_rows, result=result
+        )
+    finally:
+        # Batches before a bad line stay committed, so their users' cached contexts are stale either way.
+        stylist.invalidate_user_context(result.users)
+    return {"ok": True, "rows": result.rows, "users": len(result.users)}
+
+
+@router.post("/backup")
+async def backup_now(request: Request):
+    """Take an online SQLite snapshot now (in addition to BACKUP_INTERVAL_SECONDS); writers keep running."""
+    job = request.app.state.storage.backups
+    if job is None:
+        raise InvalidInputError("Backups are only built in for the SQLite backend")
+    result = await anyio.to_thread.run_sync(job.run_once)
+    return {"ok": True, **result.as_dict()}
@@ -1,11 +1,17 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+import json
 
-from ....core.errors import DependencyMissingError, InvalidInputError
+import anyio
+from fastapi import APIRouter, Depends, File, Header, HTTPException, UploadFile, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from ....core.config import Settings
+from ....core.errors import DependencyMissingError, InvalidInputError, PayloadTooLargeError
 from ....models.schemas import AnalyzeResponse
 from ....services.stylist import StylistService
-from ...deps import stylist_service_dep
+from ....utils.uploads import ImageUpload, UploadLimits, read_image_upload
+from ...deps import settings_dep, stylist_service_dep, stylist_service_ws_dep
 
 
 router = APIRouter()
@@ -14,14 +20,165 @@ router = APIRouter()
 @router.post("/analyze", response_model=AnalyzeResponse)
 async def analyze_image(
     file: UploadFile = File(...),
+    deadline_ms: float | None = Header(default=None, alias="X-Deadline-Ms", gt=0),
     stylist: StylistService = Depends(stylist_service_dep),
+    settings: Settings = Depends(settings_dep),
 ):
+    """
+    Detect faces, skin tone and palette. Send `X-Deadline-Ms` to let the server
+    pick a cheaper quality tier when full quality would not finish in time;
+    `quality_tier` in the response reports what was used. Pass the returned
+    `analysis_id` to `/v1/recommend` instead of uploading the image again.
+    """
     try:
-        raw = await file.read()
-        artifacts = await stylist.analyze_image_bytes(raw)
-        return artifacts.analyze
+        with await read_image_upload(file, UploadLimits.from_settings(settings)) as upload:
+            artifacts = await stylist.analyze_image_bytes(upload.file, deadline_ms=deadline_ms)
+        return stylist.remember_analysis(artifacts)
     except DependencyMissingError as e:
         raise HTTPException(status_code=503, detail=str(e)) from e
+    except PayloadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e)) from e
     except InvalidInputError as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
 
+
+@router.post("/analyze/batch", summary="Analyze several images, streaming NDJSON results")
+async def analyze_batch(
+    files: list[UploadFile] = File(...),
+    deadline_ms: float | None = Header(default=None, alias="X-Deadline-Ms", gt=0),
+    stylist: StylistService = Depends(stylist_service_dep),
+    settings: Settings = Depends(settings_dep),
+):
+    """
+    Runs every image through the vision pipeline concurrently and streams one
+    `BatchAnalyzeResult` JSON line per image as it completes, followed by a
+    final `BatchAnalyzeSummary` line with the aggregated skin tone and palette.
+    `X-Deadline-Ms`, if sent, applies to each image.
+    """
+    if len(files) > settings.analyze_batch_max_images:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many images: {len(files)} (max {settings.analyze_batch_max_images})",
+        )
+
+    limits = UploadLimits.from_settings(settings)
+    uploads: list[ImageUpload] = []
+    try:
+        for f in files:
+            uploads.append(await read_image_upload(f, limits))
+    except InvalidInputError as e:
+        for u in uploads:
+            u.close()
+        status_code = 413 if isinstance(e, PayloadTooLargeError) else 400
+        raise HTTPException(status_code=status_code, detail=f"{f.filename}: {e}") from e
+
+    async def _ndjson():
+        try:
+            async for item in stylist.analyze_batch([(u.filename, u.file) for u in uploads], deadline_ms=deadline_ms):
+                yield item.model_dump_json() + "\n"
+        finally:
+            for u in uploads:
+                u.close()
+
+    return StreamingResponse(_ndjson(), media_type="application/x-ndjson")
+
+
+@router.websocket("/analyze/live")
+async def analyze_live(
+    websocket: WebSocket,
+    stylist: StylistService = Depends(stylist_service_ws_dep),
+    settings: Settings = Depends(settings_dep),
+):
+    """
+    Live camera analysis. Send each camera frame as a binary JPEG message; the
+    server answers with a `LiveAnalysisUpdate` JSON message per analyzed frame
+    carrying the tracked face and the running skin tone / palette. Send the
+    text message `{"type": "reset"}` to start a fresh session.
+
+    Frames that arrive while the previous one is still being analyzed are
+    dropped in favour of the newest, so a slow server lowers the update rate
+    instead of building up lag.
+    """
+    await websocket.accept()
+    session = stylist.open_live_session()
+    mailbox = _LatestFrame()
+
+    async def _receive(cancel: anyio.CancelScope) -> None:
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes") is not None:
+                    frame = message["bytes"]
+                    if len(frame) > settings.live_max_frame_bytes:
+                        await _send_error(websocket, f"Frame exceeds {settings.live_max_frame_bytes} bytes")
+                        continue
+                    mailbox.put(frame)
+                elif _is_reset(message.get("text")):
+                    mailbox.put_reset()
+        finally:
+            cancel.cancel()
+
+    async def _analyze() -> None:
+        while True:
+            frame, reset = await mailbox.take()
+            if reset:
+                session.reset()
+            if frame is None:
+                continue
+            try:
+                update = await stylist.analyze_live_frame(session, frame)
+            except DependencyMissingError as e:
+                await _send_error(websocket, str(e))
+                await websocket.close(code=1011)
+                return
+            except InvalidInputError as e:
+                await _send_error(websocket, str(e))
+                continue
+            await websocket.send_text(update.model_dump_json())
+
+    try:
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(_receive, tg.cancel_scope)
+            tg.start_soon(_analyze)
+    except WebSocketDisconnect:
+        pass
+
+
+class _LatestFrame:
+    """Single-slot mailbox: a new frame replaces one nobody has picked up yet."""
+
+    def __init__(self) -> None:
+        self._frame: bytes | None = None
+        self._reset = False
+        self._ready = anyio.Event()
+
+    def put(self, frame: bytes) -> None:
+        self._frame = frame
+        self._ready.set()
+
+    def put_reset(self) -> None:
+        self._frame = None
+        self._reset = True
+        self._ready.set()
+
+    async def take(self) -> tuple[bytes | None, bool]:
+        await self._ready.wait()
+        frame, reset = self._frame, self._reset
+        self._frame, self._reset = None, False
+        self._ready = anyio.Event()
+        return frame, reset
+
+
+def _is_reset(text: str | None) -> bool:
+    if not text:
+        return False
+    try:
+        return json.loads(text).get("type") == "reset"
+    except (ValueError, AttributeError):
+        return False
+
+
+async def _send_error(websocket: WebSocket, detail: str) -> None:
+    await websocket.send_text(json.dumps({"type": "error", "detail": detail}))
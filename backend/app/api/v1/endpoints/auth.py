@@ -1,17 +1,21 @@
 from __future__ import annotations
 
+import logging
 import uuid
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 
 from ....core.config import Settings
-from ....core.security import create_access_token, get_current_user, get_password_hash, verify_password
+from ....core.security import PasswordHasher, create_access_token, get_current_user
 from ....models.auth import Token, UserBase, UserCreate, UserLogin
-from ....repositories.user import UserRepository, UserRow
-from ...deps import settings_dep, user_repo_dep
+from ....repositories.base import UserStore
+from ....repositories.user import UserRow
+from ...deps import password_hasher_dep, settings_dep, user_repo_dep
 
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
@@ -25,10 +29,18 @@ async def _user_row_to_model(row: UserRow) -> UserBase:
     )
 
 
+async def _rehash_if_needed(user: UserRow, password: str, hasher: PasswordHasher, repo: UserStore) -> None:
+    """After a successful login, store the password at the current bcrypt cost if its hash uses another one."""
+    new_hash = await hasher.rehash(password, user.password_hash)
+    if new_hash is not None and await repo.update_password_hash(user.id, user.password_hash, new_hash):
+        logger.info("password_rehashed", extra={"user_id": user.id, "rounds": hasher.rounds})
+
+
 @router.post("/signup", response_model=Token, status_code=status.HTTP_201_CREATED)
 async def signup(
     payload: UserCreate,
-    repo: UserRepository = Depends(user_repo_dep),
+    repo: UserStore = Depends(user_repo_dep),
+    hasher: PasswordHasher = Depends(password_hasher_dep),
     settings: Settings = Depends(settings_dep),
 ):
     existing = await repo.get_by_email(payload.email)
@@ -36,7 +48,7 @@ async def signup(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
 
     user_id = f"user_{uuid.uuid4().hex}"
-    password_hash = get_password_hash(payload.password)
+    password_hash = await hasher.hash(payload.password)
     await repo.create_user(
         user_id=user_id,
         email=payload.email,
@@ -52,12 +64,14 @@ async def signup(
 @router.post("/login", response_model=Token)
 async def login(
     payload: UserLogin,
-    repo: UserRepository = Depends(user_repo_dep),
+    repo: UserStore = Depends(user_repo_dep),
+    hasher: PasswordHasher = Depends(password_hasher_dep),
     settings: Settings = Depends(settings_dep),
 ):
     user = await repo.get_by_email(payload.email)
-    if not user or not verify_password(payload.password, user.password_hash):
+    if not user or not await hasher.verify(payload.password, user.password_hash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
+    await _rehash_if_needed(user, payload.password, hasher, repo)
 
     access_token = create_access_token({"sub": user.id}, settings=settings)
     return Token(access_token=access_token)
@@ -66,12 +80,14 @@ async def login(
 @router.post("/login-form", response_model=Token, include_in_schema=False)
 async def login_form(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    repo: UserRepository = Depends(user_repo_dep),
+    repo: UserStore = Depends(user_repo_dep),
+    hasher: PasswordHasher = Depends(password_hasher_dep),
     settings: Settings = Depends(settings_dep),
 ):
     user = await repo.get_by_email(form_data.username)
-    if not user or not verify_password(form_data.password, user.password_hash):
+    if not user or not await hasher.verify(form_data.password, user.password_hash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
+    await _rehash_if_needed(user, form_data.password, hasher, repo)
     access_token = create_access_token({"sub": user.id}, settings=settings)
     return Token(access_token=access_token)
 
@@ -5,10 +5,12 @@ import io
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
 from fastapi.responses import Response
 
-from ....core.errors import DependencyMissingError, InvalidInputError
+from ....core.config import Settings
+from ....core.errors import DependencyMissingError, InvalidInputError, PayloadTooLargeError
 from ....services.stylist import StylistService
 from ....utils.images import decode_image_bytes_to_bgr
-from ...deps import stylist_service_dep
+from ....utils.uploads import UploadLimits, read_image_upload
+from ...deps import settings_dep, stylist_service_dep
 
 
 router = APIRouter()
@@ -18,15 +20,16 @@ router = APIRouter()
 async def debug_boxes(
     file: UploadFile = File(...),
     stylist: StylistService = Depends(stylist_service_dep),
+    settings: Settings = Depends(settings_dep),
 ):
     """
     Debug helper that draws detected face bounding boxes on the uploaded image
     and returns a JPEG image. Not intended for end users.
     """
     try:
-        raw = await file.read()
-        # Reuse the same decoding path used elsewhere.
-        bgr = decode_image_bytes_to_bgr(raw)
+        with await read_image_upload(file, UploadLimits.from_settings(settings)) as upload:
+            # Reuse the same decoding path used elsewhere.
+            bgr = decode_image_bytes_to_bgr(upload.file, max_pixels=settings.max_image_pixels)
 
         # Reuse the shared face detector so behavior matches /analyze.
         det = stylist._faces.detect(bgr)  # type: ignore[attr-defined]
@@ -48,6 +51,8 @@ async def debug_boxes(
         return Response(content=data, media_type="image/jpeg")
     except DependencyMissingError as e:
         raise HTTPException(status_code=503, detail=str(e)) from e
+    except PayloadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e)) from e
     except InvalidInputError as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
 
@@ -1,37 +1,63 @@
 from __future__ import annotations
 
+from typing import Any
+
 from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from pydantic_core import to_json
 
-from ....models.schemas import HistoryEntry, HistoryResponse
-from ....repositories.history import HistoryRepository
+from ....models.schemas import HistoryResponse
+from ....repositories.base import HistoryStore
+from ....repositories.history import HistoryPageRow
+from ....repositories.pagination import Page
 from ....repositories.user import UserRow
 from ....core.security import get_current_user
+from ....utils.json_stream import json_array_chunks, json_object
 from ...deps import history_repo_dep
 
 
 router = APIRouter()
 
+# The handlers stream pre-serialized JSON, so the schema is documentation only (no response_model validation).
+_HISTORY_RESPONSES: dict[int | str, dict[str, Any]] = {200: {"model": HistoryResponse}}
 
-@router.get("/history/{user_id}", response_model=HistoryResponse, include_in_schema=False)
-async def history_debug(user_id: str, limit: int = 50, repo: HistoryRepository = Depends(history_repo_dep)):
-    rows = await repo.list_recent(user_id, limit=limit)
-    entries = [
-        HistoryEntry(user_id=r.user_id, outfit_id=r.outfit_id, created_at=r.created_at, payload=r.payload)
-        for r in rows
-    ]
-    return HistoryResponse(user_id=user_id, entries=entries)
 
+@router.get("/history/{user_id}", responses=_HISTORY_RESPONSES, include_in_schema=False)
+async def history_debug(
+    user_id: str,
+    limit: int = 50,
+    cursor: str | None = None,
+    include_payload: bool = True,
+    repo: HistoryStore = Depends(history_repo_dep),
+):
+    page = await repo.list_page(user_id, limit=limit, cursor=cursor)
+    return _history_response(user_id, page, include_payload)
 
-@router.get("/history", response_model=HistoryResponse)
+
+@router.get("/history", responses=_HISTORY_RESPONSES)
 async def history_me(
     limit: int = 50,
-    repo: HistoryRepository = Depends(history_repo_dep),
+    cursor: str | None = None,
+    include_payload: bool = True,
+    repo: HistoryStore = Depends(history_repo_dep),
     current_user: UserRow = Depends(get_current_user),
 ):
-    rows = await repo.list_recent(current_user.id, limit=limit)
-    entries = [
-        HistoryEntry(user_id=r.user_id, outfit_id=r.outfit_id, created_at=r.created_at, payload=r.payload)
-        for r in rows
-    ]
-    return HistoryResponse(user_id=current_user.id, entries=entries)
-
+    page = await repo.list_page(current_user.id, limit=limit, cursor=cursor)
+    return _history_response(current_user.id, page, include_payload)
+
+
+def _history_response(user_id: str, page: Page[HistoryPageRow], include_payload: bool) -> StreamingResponse:
+    """
+    A HistoryResponse written straight to the wire: stored payload JSON is
+    spliced into each entry instead of being parsed and re-encoded.
+    """
+    entries = (
+        json_object(
+            {"user_id": r.user_id, "outfit_id": r.outfit_id, "created_at": r.created_at},
+            {"payload": r.payload_json if include_payload else None},
+        )
+        for r in page.items
+    )
+    prefix = b'{"user_id":' + to_json(user_id) + b',"entries":['
+    suffix = b'],"next_cursor":' + to_json(page.next_cursor) + b"}"
+    return StreamingResponse(json_array_chunks(entries, prefix, suffix), media_type="application/json")
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Request
+
+from ...deps import admin_dep
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", dependencies=[Depends(admin_dep)])
+async def metrics(request: Request):
+    """
+    Process-local runtime counters (JSON, not Prometheus exposition format).
+    Operational data (per-query timings, file paths), so it needs the admin token.
+    """
+    return {
+        **request.app.state.storage.metrics(),
+        "history_writes": request.app.state.history_repo.write_stats(),
+        "user_context": request.app.state.stylist.user_context_stats(),
+        "password_hashing": request.app.state.password_hasher.stats(),
+    }
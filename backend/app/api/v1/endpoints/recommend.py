@@ -1,23 +1,50 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile
 
-from ....core.errors import DependencyMissingError, InvalidInputError
+from ....core.config import Settings
+from ....core.errors import DependencyMissingError, InvalidInputError, PayloadTooLargeError
 from ....models.schemas import RecommendRequest, RecommendResponse
 from ....services.stylist import StylistService
-from ....utils.json_safe import safe_json_loads, safe_parse_model
-from ...deps import stylist_service_dep
+from ....utils.images import decode_base64_in_place
+from ....utils.json_safe import lift_string_field, safe_json_loads, safe_parse_model
+from ....utils.uploads import UploadLimits, read_image_upload, read_request_body
+from ...deps import settings_dep, stylist_service_dep
 
 
 router = APIRouter()
 
 
-@router.post("/recommend", response_model=RecommendResponse)
+@router.post(
+    "/recommend",
+    response_model=RecommendResponse,
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/json": {"schema": RecommendRequest.model_json_schema()},
+            }
+        }
+    },
+)
 async def recommend(
-    request_json: str = Form(..., description="JSON for RecommendRequest"),
+    request: Request,
+    request_json: str | None = Form(default=None, description="JSON for RecommendRequest"),
     image: UploadFile | None = File(default=None),
     stylist: StylistService = Depends(stylist_service_dep),
+    settings: Settings = Depends(settings_dep),
 ):
+    """
+    Accepts either multipart form data (`request_json` + optional `image`) or a
+    raw `application/json` RecommendRequest body. The JSON body path decodes
+    `image_base64` in place inside the request buffer instead of copying it
+    through a form field, a parsed string and a decoded bytes object.
+    """
+    if request.headers.get("content-type", "").split(";")[0].strip() == "application/json":
+        return await _recommend_from_json_body(request, stylist, settings)
+
+    if request_json is None:
+        raise HTTPException(status_code=400, detail="Missing request_json form field")
+
     parsed = safe_json_loads(request_json)
     if not parsed.ok:
         raise HTTPException(status_code=400, detail=parsed.error)
@@ -26,12 +53,40 @@ async def recommend(
     if err or model is None:
         raise HTTPException(status_code=400, detail=f"Invalid request: {err}")
 
-    image_bytes = await image.read() if image else None
-
+    upload = None
     try:
-        return await stylist.recommend(model, image_bytes=image_bytes)
+        if image:
+            upload = await read_image_upload(image, UploadLimits.from_settings(settings))
+        return await stylist.recommend(model, image_bytes=upload.file if upload else None)
     except DependencyMissingError as e:
         raise HTTPException(status_code=503, detail=str(e)) from e
+    except PayloadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e)) from e
     except InvalidInputError as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
+    finally:
+        if upload:
+            upload.close()
+
+
+async def _recommend_from_json_body(request: Request, stylist: StylistService, settings: Settings):
+    # base64 inflates by 4/3; leave headroom for the non-image fields.
+    max_body = settings.max_upload_bytes * 4 // 3 + 64 * 1024
+    try:
+        body = await read_request_body(request, max_body)
+        parsed, span = lift_string_field(body, "image_base64")
+        if not parsed.ok:
+            raise HTTPException(status_code=400, detail=parsed.error)
 
+        model, err = safe_parse_model(parsed.value, RecommendRequest)
+        if err or model is None:
+            raise HTTPException(status_code=400, detail=f"Invalid request: {err}")
+
+        image = decode_base64_in_place(body, *span) if span else None
+        return await stylist.recommend(model, image_bytes=image)
+    except DependencyMissingError as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
+    except PayloadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e)) from e
+    except InvalidInputError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
@@ -2,12 +2,16 @@ from __future__ import annotations
 
 from typing import Any, List
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 
+from ....core.config import Settings
 from ....core.security import get_current_user
-from ....repositories.saved_outfits import SavedOutfitRepository
+from ....models.schemas import DeleteOutfitsRequest, SaveOutfitsRequest, SavedOutfitsExistResponse
+from ....repositories.base import SavedOutfitStore
 from ....repositories.user import UserRow
-from ...deps import saved_outfit_repo_dep
+from ....utils.json_stream import json_array_chunks, json_object
+from ...deps import saved_outfit_repo_dep, settings_dep
 
 
 router = APIRouter()
@@ -16,40 +20,88 @@ router = APIRouter()
 @router.post("/save-outfit")
 async def save_outfit(
     payload: dict[str, Any],
-    repo: SavedOutfitRepository = Depends(saved_outfit_repo_dep),
+    repo: SavedOutfitStore = Depends(saved_outfit_repo_dep),
     current_user: UserRow = Depends(get_current_user),
 ):
-    outfit_id = str(payload.get("outfit_id") or payload.get("id") or "")
-    if not outfit_id:
-        outfit_id = "unknown"
-    await repo.add_saved_outfit(current_user.id, outfit_id, payload)
+    await repo.add_saved_outfit(current_user.id, _outfit_id(payload), payload)
     return {"ok": True}
 
 
-@router.get("/saved-outfits")
+@router.post("/save-outfits")
+async def save_outfits(
+    body: SaveOutfitsRequest,
+    repo: SavedOutfitStore = Depends(saved_outfit_repo_dep),
+    current_user: UserRow = Depends(get_current_user),
+    settings: Settings = Depends(settings_dep),
+):
+    _check_bulk_size(len(body.outfits), settings)
+    saved = await repo.save_many(current_user.id, [(_outfit_id(p), p) for p in body.outfits])
+    return {"ok": True, "saved": saved}
+
+
+@router.get("/saved-outfits/exists", response_model=SavedOutfitsExistResponse)
+async def saved_outfits_exist(
+    outfit_id: List[str] = Query(default_factory=list),
+    repo: SavedOutfitStore = Depends(saved_outfit_repo_dep),
+    current_user: UserRow = Depends(get_current_user),
+    settings: Settings = Depends(settings_dep),
+):
+    _check_bulk_size(len(outfit_id), settings)
+    found = await repo.exists(current_user.id, outfit_id)
+    return SavedOutfitsExistResponse(saved={oid: oid in found for oid in outfit_id})
+
+
+@router.get("/saved-outfits", responses={200: {"model": List[dict[str, Any]]}})
 async def list_saved_outfits(
-    repo: SavedOutfitRepository = Depends(saved_outfit_repo_dep),
+    repo: SavedOutfitStore = Depends(saved_outfit_repo_dep),
     current_user: UserRow = Depends(get_current_user),
     limit: int = 50,
-) -> List[dict[str, Any]]:
-    rows = await repo.list_for_user(current_user.id, limit=limit)
-    return [
-        {
-            "id": r.id,
-            "user_id": r.user_id,
-            "outfit_id": r.outfit_id,
-            "created_at": r.created_at,
-            "payload": r.payload,
-        }
-        for r in rows
-    ]
+    cursor: str | None = None,
+    include_payload: bool = True,
+) -> StreamingResponse:
+    page = await repo.list_page(current_user.id, limit=limit, cursor=cursor)
+    # Stored payload JSON is spliced into the output as-is, never parsed and re-encoded.
+    items = (
+        json_object(
+            {"id": r.id, "user_id": r.user_id, "outfit_id": r.outfit_id, "created_at": r.created_at.isoformat()},
+            {"payload": r.payload_json if include_payload else None},
+        )
+        for r in page.items
+    )
+    # The body stays a plain list; the continuation token for the next page rides in a header.
+    headers = {"X-Next-Cursor": page.next_cursor} if page.next_cursor else None
+    return StreamingResponse(json_array_chunks(items), media_type="application/json", headers=headers)
 
 
 @router.delete("/delete-outfit/{outfit_id}")
 async def delete_outfit(
     outfit_id: str,
-    repo: SavedOutfitRepository = Depends(saved_outfit_repo_dep),
+    repo: SavedOutfitStore = Depends(saved_outfit_repo_dep),
     current_user: UserRow = Depends(get_current_user),
 ):
     await repo.delete_for_user(current_user.id, outfit_id)
     return {"ok": True}
+
+
+@router.post("/delete-outfits")
+async def delete_outfits(
+    body: DeleteOutfitsRequest,
+    repo: SavedOutfitStore = Depends(saved_outfit_repo_dep),
+    current_user: UserRow = Depends(get_current_user),
+    settings: Settings = Depends(settings_dep),
+):
+    _check_bulk_size(len(body.outfit_ids), settings)
+    deleted = await repo.delete_many(current_user.id, body.outfit_ids)
+    return {"ok": True, "deleted": deleted}
+
+
+def _outfit_id(payload: dict[str, Any]) -> str:
+    return str(payload.get("outfit_id") or payload.get("id") or "") or "unknown"
+
+
+def _check_bulk_size(count: int, settings: Settings) -> None:
+    if count > settings.saved_outfits_bulk_max:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many outfits: {count} (max {settings.saved_outfits_bulk_max})",
+        )
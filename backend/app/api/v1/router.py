@@ -10,10 +10,13 @@ from .endpoints.auth import router as auth_router
 from .endpoints.saved_outfits import router as saved_outfits_router
 from .endpoints.recommend import router as recommend_router
 from .endpoints.chat import router as chat_router
+from .endpoints.metrics import router as metrics_router
+from .endpoints.admin import router as admin_router
 
 
 router = APIRouter(prefix="/v1")
 router.include_router(health_router, tags=["health"])
+router.include_router(metrics_router, tags=["health"])
 router.include_router(analyze_router, tags=["vision"])
 router.include_router(debug_router, tags=["vision-debug"])
 router.include_router(recommend_router, tags=["stylist"])
@@ -21,4 +24,5 @@ router.include_router(history_router, tags=["history"])
 router.include_router(auth_router, tags=["auth"])
 router.include_router(saved_outfits_router, tags=["stylist"])
 router.include_router(chat_router, tags=["chat"])
+router.include_router(admin_router, tags=["admin"])
 
@@ -16,6 +16,30 @@ class Settings(BaseModel):
         default=str(Path("backend") / "data" / "app.db"),
         alias="DATABASE_PATH",
     )
+    database_url: str | None = Field(default=None, alias="DATABASE_URL")
+    database_pool_min: int = Field(default=2, ge=0, alias="DATABASE_POOL_MIN")
+    database_pool_max: int = Field(default=10, ge=1, alias="DATABASE_POOL_MAX")
+    database_statement_cache: int = Field(default=256, ge=0, alias="DATABASE_STATEMENT_CACHE")
+    sqlite_cache_kib: int = Field(default=16 * 1024, ge=0, alias="SQLITE_CACHE_KIB")
+    sqlite_mmap_bytes: int = Field(default=256 * 1024 * 1024, ge=0, alias="SQLITE_MMAP_BYTES")
+    sqlite_shards: int = Field(default=1, ge=1, le=256, alias="SQLITE_SHARDS")
+    db_read_threads: int = Field(default=8, ge=1, alias="DB_READ_THREADS")
+    db_auth_threads: int = Field(default=2, ge=1, alias="DB_AUTH_THREADS")
+    history_write_behind: bool = Field(default=True, alias="HISTORY_WRITE_BEHIND")
+    history_flush_ms: float = Field(default=5.0, ge=0, alias="HISTORY_FLUSH_MS")
+    history_batch_max: int = Field(default=256, ge=1, alias="HISTORY_BATCH_MAX")
+    history_retention_days: float = Field(default=90.0, ge=0, alias="HISTORY_RETENTION_DAYS")
+    history_keep_recent: int = Field(default=50, ge=1, alias="HISTORY_KEEP_RECENT")
+    history_compact_interval_seconds: float = Field(default=3600.0, ge=1, alias="HISTORY_COMPACT_INTERVAL_SECONDS")
+    backup_interval_seconds: float = Field(default=0.0, ge=0, alias="BACKUP_INTERVAL_SECONDS")
+    backup_dir: str | None = Field(default=None, alias="BACKUP_DIR")
+    backup_keep: int = Field(default=7, ge=1, alias="BACKUP_KEEP")
+    backup_step_pages: int = Field(default=256, ge=1, alias="BACKUP_STEP_PAGES")
+    backup_step_sleep_ms: float = Field(default=10.0, ge=0, alias="BACKUP_STEP_SLEEP_MS")
+    user_context_cache_users: int = Field(default=1024, ge=1, alias="USER_CONTEXT_CACHE_USERS")
+    user_context_ttl_seconds: float = Field(default=300.0, gt=0, alias="USER_CONTEXT_TTL_SECONDS")
+    user_context_shared_ttl_seconds: float = Field(default=5.0, gt=0, alias="USER_CONTEXT_SHARED_TTL_SECONDS")
+    preference_half_life_days: float = Field(default=0.0, ge=0, alias="PREFERENCE_HALF_LIFE_DAYS")
 
     openai_api_key: str | None = Field(default=None, alias="OPENAI_API_KEY")
     openai_model: str = Field(default="gpt-4o-mini", alias="OPENAI_MODEL")
@@ -26,10 +50,37 @@ class Settings(BaseModel):
 
     jwt_secret: str = Field(default="dev-secret-change-me", alias="JWT_SECRET")
     jwt_algorithm: str = Field(default="HS256", alias="JWT_ALGORITHM")
+    admin_token: str | None = Field(default=None, alias="ADMIN_TOKEN")
+    password_hash_threads: int = Field(default=2, ge=1, alias="PASSWORD_HASH_THREADS")
+    password_hash_max_waiting: int = Field(default=32, ge=0, alias="PASSWORD_HASH_MAX_WAITING")
+    password_hash_queue_timeout_ms: float = Field(default=2000.0, ge=0, alias="PASSWORD_HASH_QUEUE_TIMEOUT_MS")
+    password_hash_rounds: int | None = Field(default=None, ge=4, le=31, alias="PASSWORD_HASH_ROUNDS")
+    password_hash_target_ms: float = Field(default=250.0, gt=0, alias="PASSWORD_HASH_TARGET_MS")
+    password_hash_min_rounds: int = Field(default=10, ge=4, le=31, alias="PASSWORD_HASH_MIN_ROUNDS")
 
     unsplash_access_key: str | None = Field(default=None, alias="UNSPLASH_ACCESS_KEY")
     pexels_api_key: str | None = Field(default=None, alias="PEXELS_API_KEY")
 
+    vision_workers: int = Field(default=4, ge=1, alias="VISION_WORKERS")
+    vision_backend: Literal["thread", "process"] = Field(default="thread", alias="VISION_BACKEND")
+    vision_shm_slot_bytes: int = Field(default=48 * 1024 * 1024, ge=1, alias="VISION_SHM_SLOT_BYTES")
+    vision_adaptive_quality: bool = Field(default=True, alias="VISION_ADAPTIVE_QUALITY")
+    vision_reduced_max_side: int = Field(default=960, ge=64, alias="VISION_REDUCED_MAX_SIDE")
+    face_detector_engine: Literal["haar", "yunet", "res10"] = Field(default="haar", alias="FACE_DETECTOR_ENGINE")
+    face_model_dir: str | None = Field(default=None, alias="FACE_MODEL_DIR")
+    analyze_batch_max_images: int = Field(default=12, ge=1, alias="ANALYZE_BATCH_MAX_IMAGES")
+    saved_outfits_bulk_max: int = Field(default=500, ge=1, alias="SAVED_OUTFITS_BULK_MAX")
+    transfer_batch_rows: int = Field(default=5000, ge=1, alias="TRANSFER_BATCH_ROWS")
+
+    max_upload_bytes: int = Field(default=25 * 1024 * 1024, ge=1, alias="MAX_UPLOAD_BYTES")
+    max_image_pixels: int = Field(default=50_000_000, ge=1, alias="MAX_IMAGE_PIXELS")
+
+    analysis_ttl_seconds: int = Field(default=1800, ge=1, alias="ANALYSIS_TTL_SECONDS")
+    analysis_store_max_entries: int = Field(default=1000, ge=1, alias="ANALYSIS_STORE_MAX_ENTRIES")
+
+    live_keyframe_interval: int = Field(default=10, ge=1, alias="LIVE_KEYFRAME_INTERVAL")
+    live_max_frame_bytes: int = Field(default=512 * 1024, ge=1, alias="LIVE_MAX_FRAME_BYTES")
+
 
 _settings: Settings | None = None
 
@@ -42,6 +93,30 @@ def get_settings() -> Settings:
             "APP_ENV": os.getenv("APP_ENV", "dev"),
             "LOG_LEVEL": os.getenv("LOG_LEVEL", "INFO"),
             "DATABASE_PATH": os.getenv("DATABASE_PATH", str(Path("backend") / "data" / "app.db")),
+            "DATABASE_URL": os.getenv("DATABASE_URL") or None,
+            "DATABASE_POOL_MIN": os.getenv("DATABASE_POOL_MIN", "2"),
+            "DATABASE_POOL_MAX": os.getenv("DATABASE_POOL_MAX", "10"),
+            "DATABASE_STATEMENT_CACHE": os.getenv("DATABASE_STATEMENT_CACHE", "256"),
+            "SQLITE_CACHE_KIB": os.getenv("SQLITE_CACHE_KIB", str(16 * 1024)),
+            "SQLITE_MMAP_BYTES": os.getenv("SQLITE_MMAP_BYTES", str(256 * 1024 * 1024)),
+            "SQLITE_SHARDS": os.getenv("SQLITE_SHARDS", "1"),
+            "DB_READ_THREADS": os.getenv("DB_READ_THREADS", "8"),
+            "DB_AUTH_THREADS": os.getenv("DB_AUTH_THREADS", "2"),
+            "HISTORY_WRITE_BEHIND": os.getenv("HISTORY_WRITE_BEHIND", "true"),
+            "HISTORY_FLUSH_MS": os.getenv("HISTORY_FLUSH_MS", "5"),
+            "HISTORY_BATCH_MAX": os.getenv("HISTORY_BATCH_MAX", "256"),
+            "HISTORY_RETENTION_DAYS": os.getenv("HISTORY_RETENTION_DAYS", "90"),
+            "HISTORY_KEEP_RECENT": os.getenv("HISTORY_KEEP_RECENT", "50"),
+            "HISTORY_COMPACT_INTERVAL_SECONDS": os.getenv("HISTORY_COMPACT_INTERVAL_SECONDS", "3600"),
+            "BACKUP_INTERVAL_SECONDS": os.getenv("BACKUP_INTERVAL_SECONDS", "0"),
+            "BACKUP_DIR": os.getenv("BACKUP_DIR") or None,
+            "BACKUP_KEEP": os.getenv("BACKUP_KEEP", "7"),
+            "BACKUP_STEP_PAGES": os.getenv("BACKUP_STEP_PAGES", "256"),
+            "BACKUP_STEP_SLEEP_MS": os.getenv("BACKUP_STEP_SLEEP_MS", "10"),
+            "USER_CONTEXT_CACHE_USERS": os.getenv("USER_CONTEXT_CACHE_USERS", "1024"),
+            "USER_CONTEXT_TTL_SECONDS": os.getenv("USER_CONTEXT_TTL_SECONDS", "300"),
+            "USER_CONTEXT_SHARED_TTL_SECONDS": os.getenv("USER_CONTEXT_SHARED_TTL_SECONDS", "5"),
+            "PREFERENCE_HALF_LIFE_DAYS": os.getenv("PREFERENCE_HALF_LIFE_DAYS", "0"),
             "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY"),
             "OPENAI_MODEL": os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
             "OPENAI_BASE_URL": os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1"),
@@ -49,6 +124,29 @@ def get_settings() -> Settings:
             "GROQ_MODEL": os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile"),
             "UNSPLASH_ACCESS_KEY": os.getenv("UNSPLASH_ACCESS_KEY"),
             "PEXELS_API_KEY": os.getenv("PEXELS_API_KEY"),
+            "ADMIN_TOKEN": os.getenv("ADMIN_TOKEN") or None,
+            "PASSWORD_HASH_THREADS": os.getenv("PASSWORD_HASH_THREADS", "2"),
+            "PASSWORD_HASH_MAX_WAITING": os.getenv("PASSWORD_HASH_MAX_WAITING", "32"),
+            "PASSWORD_HASH_QUEUE_TIMEOUT_MS": os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT_MS", "2000"),
+            "PASSWORD_HASH_ROUNDS": os.getenv("PASSWORD_HASH_ROUNDS") or None,
+            "PASSWORD_HASH_TARGET_MS": os.getenv("PASSWORD_HASH_TARGET_MS", "250"),
+            "PASSWORD_HASH_MIN_ROUNDS": os.getenv("PASSWORD_HASH_MIN_ROUNDS", "10"),
+            "VISION_WORKERS": os.getenv("VISION_WORKERS", "4"),
+            "VISION_BACKEND": os.getenv("VISION_BACKEND", "thread"),
+            "VISION_SHM_SLOT_BYTES": os.getenv("VISION_SHM_SLOT_BYTES", str(48 * 1024 * 1024)),
+            "VISION_ADAPTIVE_QUALITY": os.getenv("VISION_ADAPTIVE_QUALITY", "true"),
+            "VISION_REDUCED_MAX_SIDE": os.getenv("VISION_REDUCED_MAX_SIDE", "960"),
+            "FACE_DETECTOR_ENGINE": os.getenv("FACE_DETECTOR_ENGINE", "haar"),
+            "FACE_MODEL_DIR": os.getenv("FACE_MODEL_DIR"),
+            "ANALYZE_BATCH_MAX_IMAGES": os.getenv("ANALYZE_BATCH_MAX_IMAGES", "12"),
+            "SAVED_OUTFITS_BULK_MAX": os.getenv("SAVED_OUTFITS_BULK_MAX", "500"),
+            "TRANSFER_BATCH_ROWS": os.getenv("TRANSFER_BATCH_ROWS", "5000"),
+            "MAX_UPLOAD_BYTES": os.getenv("MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)),
+            "MAX_IMAGE_PIXELS": os.getenv("MAX_IMAGE_PIXELS", "50000000"),
+            "ANALYSIS_TTL_SECONDS": os.getenv("ANALYSIS_TTL_SECONDS", "1800"),
+            "ANALYSIS_STORE_MAX_ENTRIES": os.getenv("ANALYSIS_STORE_MAX_ENTRIES", "1000"),
+            "LIVE_KEYFRAME_INTERVAL": os.getenv("LIVE_KEYFRAME_INTERVAL", "10"),
+            "LIVE_MAX_FRAME_BYTES": os.getenv("LIVE_MAX_FRAME_BYTES", str(512 * 1024)),
         }
         _settings = Settings.model_validate(data)
     return _settings
@@ -20,3 +20,15 @@ class DependencyMissingError(AppError):
 class InvalidInputError(AppError):
     pass
 
+
+
+class PayloadTooLargeError(InvalidInputError):
+    """Upload exceeds a configured byte or pixel budget."""
+
+
+class OverloadedError(AppError):
+    """A bounded pool is saturated; the request is rejected instead of queued (HTTP 503)."""
+
+    def __init__(self, message: str, retry_after_s: int = 1):
+        self.retry_after_s = retry_after_s
+        super().__init__(message)
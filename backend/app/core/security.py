@@ -1,25 +1,65 @@
 from __future__ import annotations
 
+import threading
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Any, Optional
+from typing import Any, Callable, Optional, TypeVar
 
+import anyio
 import bcrypt
 import jwt
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 
 from .config import Settings, get_settings
-from ..repositories.user import UserRepository, UserRow
+from .errors import OverloadedError
+from ..repositories.base import UserStore
+from ..repositories.user import UserRow
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/v1/auth/login")
 
+T = TypeVar("T")
 
-def get_password_hash(password: str) -> str:
-    salt = bcrypt.gensalt()
+
+def get_password_hash(password: str, rounds: int | None = None) -> str:
+    salt = bcrypt.gensalt(rounds) if rounds else bcrypt.gensalt()
     return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
 
 
+def bcrypt_rounds(hashed_password: str) -> int | None:
+    """Cost factor of a `$2b$12$...` hash, None if it is not a bcrypt hash."""
+    parts = hashed_password.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def calibrate_bcrypt_rounds(
+    target_ms: float, min_rounds: int = 10, max_rounds: int = 16, probe_rounds: int = 8, samples: int = 3
+) -> tuple[int, float]:
+    """
+    The highest bcrypt cost whose hash takes at most `target_ms` on this
+    machine (never below `min_rounds`), and its estimated time in ms. Each
+    extra round doubles the work, so a few cheap hashes at `probe_rounds`
+    (fastest one counts) extrapolate to every cost.
+    """
+    salt = bcrypt.gensalt(probe_rounds)
+    probe_s = float("inf")
+    for _ in range(max(1, samples)):
+        start = time.perf_counter()
+        bcrypt.hashpw(b"calibration", salt)
+        probe_s = min(probe_s, time.perf_counter() - start)
+
+    def _estimate_ms(rounds: int) -> float:
+        return probe_s * 2 ** (rounds - probe_rounds) * 1000
+
+    rounds = max(4, int(min_rounds))
+    while rounds < max_rounds and _estimate_ms(rounds + 1) <= target_ms:
+        rounds += 1
+    return rounds, round(_estimate_ms(rounds), 1)
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     try:
         return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
@@ -27,6 +67,128 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 
+# Stored hashes up to this many rounds above the current cost are kept (see PasswordHasher).
+_REHASH_SLACK = 1
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing / verification off the event loop, on at most
+    `threads` worker threads (bcrypt releases the GIL, so other requests keep
+    being served while a hash runs).
+
+    Callers beyond `threads` wait for a slot, but at most `max_waiting` of
+    them and for at most `queue_timeout_ms`; past either limit the call
+    fails immediately with OverloadedError (HTTP 503 + Retry-After) instead
+    of piling up behind work that takes hundreds of milliseconds each.
+
+    New hashes use cost `rounds` (see calibrate_bcrypt_rounds); `rehash()`
+    upgrades a stored hash below that cost after a login, and downgrades one
+    more than `_REHASH_SLACK` rounds above it. The slack keeps API nodes whose
+    calibration lands one round apart from rehashing the same users back and
+    forth.
+    """
+
+    def __init__(
+        self, threads: int = 2, max_waiting: int = 32, queue_timeout_ms: float = 2000.0, rounds: int = 12
+    ):
+        self.rounds = int(rounds)
+        self._threads = max(1, int(threads))
+        self._max_waiting = max(0, int(max_waiting))
+        self._queue_timeout_s = max(0.0, float(queue_timeout_ms)) / 1000.0
+        # Admission (bounded wait) is the semaphore; the limiter only keeps bcrypt off anyio's shared thread pool.
+        self._slots = anyio.Semaphore(self._threads)
+        self._limiter = anyio.CapacityLimiter(self._threads)
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._calls = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._rehashed = 0
+        self._wait_ms_max = 0.0
+        self._run_ms_total = 0.0
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password, self.rounds)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        stored = bcrypt_rounds(hashed_password)
+        return stored is None or not self.rounds <= stored <= self.rounds + _REHASH_SLACK
+
+    async def rehash(self, plain_password: str, hashed_password: str) -> str | None:
+        """
+        A new hash of an already verified password at the current cost, or
+        None if the stored one is close enough (see needs_rehash). Only runs on an idle thread,
+        never queues: when the pool is busy it returns None and the next
+        login tries again.
+        """
+        if not self.needs_rehash(hashed_password):
+            return None
+        try:
+            new_hash = await self._run(get_password_hash, plain_password, self.rounds, wait=False)
+        except OverloadedError:
+            return None
+        with self._lock:
+            self._rehashed += 1
+        return new_hash
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "rounds": self.rounds,
+                "threads": self._threads,
+                "busy": self._threads - self._slots.value,
+                "waiting": self._waiting,
+                "calls": self._calls,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+                "rehashed": self._rehashed,
+                "wait_ms_max": round(self._wait_ms_max, 3),
+                "run_ms_avg": round(self._run_ms_total / self._calls, 3) if self._calls else 0.0,
+            }
+
+    async def _run(self, fn: Callable[..., T], *args: Any, wait: bool = True) -> T:
+        queued = time.perf_counter()
+        try:
+            self._slots.acquire_nowait()
+        except anyio.WouldBlock:
+            if not wait:
+                raise OverloadedError("No idle password-hashing thread") from None
+            await self._wait_for_slot()
+        try:
+            start = time.perf_counter()
+            result = await anyio.to_thread.run_sync(fn, *args, limiter=self._limiter)
+            with self._lock:
+                self._calls += 1
+                self._wait_ms_max = max(self._wait_ms_max, (start - queued) * 1000)
+                self._run_ms_total += (time.perf_counter() - start) * 1000
+            return result
+        finally:
+            self._slots.release()
+
+    async def _wait_for_slot(self) -> None:
+        with self._lock:
+            if self._waiting >= self._max_waiting:
+                self._rejected += 1
+                raise OverloadedError("Too many concurrent password checks, retry shortly")
+            self._waiting += 1
+        acquired = False
+        try:
+            with anyio.move_on_after(self._queue_timeout_s):
+                await self._slots.acquire()
+                acquired = True
+        finally:
+            with self._lock:
+                self._waiting -= 1
+                if not acquired:
+                    self._timed_out += 1
+        if not acquired:
+            raise OverloadedError("Password check queue wait exceeded, retry shortly")
+
+
 def create_access_token(data: dict[str, Any], settings: Settings, expires_minutes: int = 60 * 24) -> str:
     to_encode = data.copy()
     now = datetime.now(timezone.utc)
@@ -58,7 +220,7 @@ async def get_current_user(
     except jwt.PyJWTError:
         raise credentials_exception
 
-    user_repo: UserRepository = request.app.state.user_repo  # type: ignore[attr-defined]
+    user_repo: UserStore = request.app.state.user_repo  # type: ignore[attr-defined]
     user = await user_repo.get_by_id(sub)
     if user is None:
         raise credentials_exception
@@ -4,6 +4,7 @@ import os
 import logging
 import time
 
+import anyio
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -13,12 +14,14 @@ load_dotenv()
 
 from .api.v1.router import router as v1_router
 from .core.config import get_settings
-from .core.errors import AppError, DependencyMissingError, InvalidInputError
+from .core.errors import AppError, DependencyMissingError, InvalidInputError, OverloadedError, PayloadTooLargeError
+from .core.security import PasswordHasher, calibrate_bcrypt_rounds
 from .core.logging import configure_logging, new_correlation_id, set_correlation_id
-from .repositories.history import HistoryRepository
-from .repositories.user import UserRepository
-from .repositories.saved_outfits import SavedOutfitRepository
+from .repositories.factory import open_storage
+from .services.outfit_scoring import OutfitCatalog
 from .services.stylist import StylistService
+from .services.user_memory import preference_features
+from .utils.uploads import UploadBodyLimit, upload_body_limits
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +32,9 @@ def create_app() -> FastAPI:
 
     app = FastAPI(title=settings.app_name)
 
+    # Innermost, so rejected uploads still get CORS headers and an access log line.
+    app.add_middleware(UploadBodyLimit, limits=upload_body_limits(settings))
+
     # ✅ CORS MIDDLEWARE (placed correctly here)
     app.add_middleware(
         CORSMiddleware,
@@ -36,6 +42,7 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],
     )
 
     # health check
@@ -46,20 +53,56 @@ def create_app() -> FastAPI:
     # startup
     @app.on_event("startup")
     async def _startup() -> None:
-        history_repo = HistoryRepository(settings.database_path)
-        user_repo = UserRepository(settings.database_path)
-        saved_repo = SavedOutfitRepository(settings.database_path)
-
-        await history_repo.init()
-        await user_repo.init()
-        await saved_repo.init()
-
-        app.state.history_repo = history_repo
-        app.state.user_repo = user_repo
-        app.state.saved_outfits = saved_repo
-        app.state.stylist = StylistService(settings, history_repo, saved_repo=saved_repo)
+        catalog = OutfitCatalog()
+        storage = await open_storage(settings, outfits=catalog, preference_features=preference_features)
+        logger.info("storage_opened", extra={"backend": storage.backend})
+        if storage.backups is not None:
+            storage.backups.start()
+
+        app.state.storage = storage
+        app.state.history_repo = storage.history
+        app.state.user_repo = storage.users
+        app.state.saved_outfits = storage.saved
+        app.state.appearance_profiles = storage.profiles
+        rounds = settings.password_hash_rounds
+        if rounds is None:
+            rounds, hash_ms = await anyio.to_thread.run_sync(
+                calibrate_bcrypt_rounds, settings.password_hash_target_ms, settings.password_hash_min_rounds
+            )
+            logger.info(
+                "bcrypt_calibrated",
+                extra={"rounds": rounds, "hash_ms": hash_ms, "target_ms": settings.password_hash_target_ms},
+            )
+        app.state.password_hasher = PasswordHasher(
+            threads=settings.password_hash_threads,
+            max_waiting=settings.password_hash_max_waiting,
+            queue_timeout_ms=settings.password_hash_queue_timeout_ms,
+            rounds=rounds,
+        )
+        user_context_ttl = settings.user_context_ttl_seconds
+        if storage.backend == "postgres":
+            # The user-context cache is per process; other API nodes write to the same database.
+            user_context_ttl = min(user_context_ttl, settings.user_context_shared_ttl_seconds)
+        app.state.stylist = StylistService(
+            settings,
+            storage.history,
+            saved_repo=storage.saved,
+            profile_repo=storage.profiles,
+            catalog=catalog,
+            preference_repo=storage.preferences,
+            user_context_ttl_seconds=user_context_ttl,
+        )
         logger.info("startup_complete")
 
+    @app.on_event("shutdown")
+    async def _shutdown() -> None:
+        stylist = getattr(app.state, "stylist", None)
+        if stylist is not None:
+            stylist.close()
+        storage = getattr(app.state, "storage", None)
+        if storage is not None:
+            await storage.close()
+
     # logging middleware
     @app.middleware("http")
     async def correlation_and_access_logs(request: Request, call_next):
@@ -98,6 +141,16 @@ def create_app() -> FastAPI:
     async def dep_missing_handler(request: Request, exc: DependencyMissingError):
         return JSONResponse(status_code=503, content={"detail": str(exc)})
 
+    @app.exception_handler(OverloadedError)
+    async def overloaded_handler(request: Request, exc: OverloadedError):
+        return JSONResponse(
+            status_code=503, content={"detail": str(exc)}, headers={"Retry-After": str(exc.retry_after_s)}
+        )
+
+    @app.exception_handler(PayloadTooLargeError)
+    async def payload_too_large_handler(request: Request, exc: PayloadTooLargeError):
+        return JSONResponse(status_code=413, content={"detail": str(exc)})
+
     @app.exception_handler(InvalidInputError)
     async def invalid_input_handler(request: Request, exc: InvalidInputError):
         return JSONResponse(status_code=400, content={"detail": str(exc)})
@@ -21,9 +21,42 @@ class SkinTone(BaseModel):
     undertone: Literal["warm", "cool", "neutral"] = "neutral"
 
 
+QualityTier = Literal["full", "reduced", "skin_only"]
+
+
 class AnalyzeResponse(BaseModel):
     faces: list[FaceBox]
     dominant_skin_tone: SkinTone | None = None
+    quality_tier: QualityTier = "full"
+    analysis_id: str | None = None
+
+
+class BatchAnalyzeResult(BaseModel):
+    type: Literal["result"] = "result"
+    index: int
+    filename: str | None = None
+    analysis: AnalyzeResponse | None = None
+    color_palette: list[str] = Field(default_factory=list)
+    error: str | None = None
+
+
+class BatchAnalyzeSummary(BaseModel):
+    type: Literal["summary"] = "summary"
+    images: int
+    analyzed: int
+    dominant_skin_tone: SkinTone | None = None
+    color_palette: list[str] = Field(default_factory=list)
+
+
+class LiveAnalysisUpdate(BaseModel):
+    type: Literal["update"] = "update"
+    frame: int
+    keyframe: bool
+    tracking: Literal["detected", "tracked", "lost"]
+    face: FaceBox | None = None
+    skin_tone: SkinTone | None = None
+    color_palette: list[str] = Field(default_factory=list)
+    latency_ms: float
 
 
 class RecommendRequest(BaseModel):
@@ -34,6 +67,8 @@ class RecommendRequest(BaseModel):
     culture: str | None = None
     gender: str | None = None
     image_base64: str | None = None
+    # Id returned by /v1/analyze; reuses that analysis instead of re-uploading the image.
+    analysis_id: str | None = None
     extra_context: dict[str, Any] = Field(default_factory=dict)
 
 
@@ -82,10 +117,26 @@ class HistoryEntry(BaseModel):
     user_id: str
     outfit_id: str
     created_at: datetime
-    payload: dict[str, Any] = Field(default_factory=dict)
+    # None when the client asked for metadata only (include_payload=false).
+    payload: dict[str, Any] | None = Field(default_factory=dict)
 
 
 class HistoryResponse(BaseModel):
     user_id: str
     entries: list[HistoryEntry]
+    # Pass back as `cursor` to fetch the next (older) page; None on the last page.
+    next_cursor: str | None = None
+
+
+class SaveOutfitsRequest(BaseModel):
+    # Outfit payloads as accepted by /save-outfit (id taken from "outfit_id" or "id").
+    outfits: list[dict[str, Any]] = Field(min_length=1)
+
+
+class DeleteOutfitsRequest(BaseModel):
+    outfit_ids: list[str] = Field(min_length=1)
+
+
+class SavedOutfitsExistResponse(BaseModel):
+    saved: dict[str, bool]
 
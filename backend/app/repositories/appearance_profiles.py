@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+
+from .db import ConnectionStats, SqliteConnectionManager, connection_manager
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+@dataclass(frozen=True)
+class AppearanceProfileRow:
+    user_id: str
+    updated_at: datetime
+    payload: dict[str, Any]
+
+
+class AppearanceProfileRepository:
+    """A user's most recent image analysis (faces, skin tone, palette), one row per user."""
+
+    def __init__(self, database_path: str, db: SqliteConnectionManager | None = None):
+        self._db_path = database_path
+        self._db = db or connection_manager(database_path)
+
+    def connection_stats(self) -> ConnectionStats:
+        return self._db.stats()
+
+    async def init(self) -> None:
+        Path(self._db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        def _init() -> None:
+            with self._db.connect() as conn:
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS appearance_profiles (
+                        user_id TEXT PRIMARY KEY,
+                        updated_at TEXT NOT NULL,
+                        payload_json TEXT NOT NULL
+                    )
+                    """
+                )
+                conn.commit()
+
+        await self._db.run("write", "appearance_profiles.init", _init)
+
+    async def upsert(self, user_id: str, payload: dict[str, Any]) -> None:
+        updated_at = _utc_now().isoformat()
+        payload_json = json.dumps(payload, ensure_ascii=False)
+
+        def _upsert() -> None:
+            with self._db.connect() as conn:
+                conn.execute(
+                    """
+                    INSERT INTO appearance_profiles(user_id, updated_at, payload_json) VALUES (?, ?, ?)
+                    ON CONFLICT(user_id) DO UPDATE SET updated_at=excluded.updated_at, payload_json=excluded.payload_json
+                    """,
+                    (user_id, updated_at, payload_json),
+                )
+                conn.commit()
+
+        await self._db.run("write", "appearance_profiles.upsert", _upsert)
+
+    async def get(self, user_id: str) -> Optional[AppearanceProfileRow]:
+        def _select() -> Optional[AppearanceProfileRow]:
+            with self._db.connect() as conn:
+                row = conn.execute(
+                    "SELECT user_id, updated_at, payload_json FROM appearance_profiles WHERE user_id=?",
+                    (user_id,),
+                ).fetchone()
+            if row is None:
+                return None
+            uid, updated_at, payload_json = row
+            try:
+                payload = json.loads(payload_json)
+            except Exception:
+                payload = {}
+            try:
+                updated_dt = datetime.fromisoformat(updated_at)
+            except Exception:
+                updated_dt = _utc_now()
+            return AppearanceProfileRow(user_id=str(uid), updated_at=updated_dt, payload=payload)
+
+        return await self._db.run("read", "appearance_profiles.get", _select)
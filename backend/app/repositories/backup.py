@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import logging
+import shutil
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Sequence
+
+
+logger = logging.getLogger(__name__)
+
+_SNAPSHOT_FORMAT = "%Y%m%dT%H%M%SZ"
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class BackupResult:
+    snapshot: str
+    started_at: str
+    duration_s: float
+    files: int
+    pages: int
+    bytes: int
+    restarts: int
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class SqliteBackupJob:
+    """
+    Snapshots of live SQLite files with the online backup API.
+
+    Each run copies every file in `sources` into
+    `<backup_dir>/<UTC timestamp>/<file name>`, `step_pages` pages at a time
+    with a `step_sleep_ms` pause after each step, so the write lane keeps
+    committing while a large file is copied. The snapshot directory is
+    written under a temporary name and renamed when every file is complete,
+    so a directory with a timestamp name is always a whole snapshot; only
+    the newest `keep` are kept.
+
+    Before any page is copied, a read transaction is opened on every source
+    and held until the whole run ends. In WAL mode that pins one snapshot per
+    file (writers keep appending to the WAL, which is only checkpointed past
+    it once the run ends), so each file is copied as of that moment, and
+    SQLite does not restart the copy from the first page on every concurrent
+    commit. The files are pinned back to back, milliseconds apart, rather
+    than as each earlier file finishes copying. There is still no
+    transaction spanning files, though: the guarantee is point-in-time per
+    file, and two related commits on different files can straddle the pins
+    so that only one of them is in the snapshot. Should a copy restart anyway (a file not in
+    WAL mode), after `max_restarts` the file is copied in one step instead.
+
+    With `interval_s` > 0, `start()` runs a backup every `interval_s`
+    seconds on a background thread (first one after one interval).
+    """
+
+    def __init__(
+        self,
+        sources: Sequence[str],
+        backup_dir: str,
+        interval_s: float = 0.0,
+        keep: int = 7,
+        step_pages: int = 256,
+        step_sleep_ms: float = 10.0,
+        max_restarts: int = 5,
+    ):
+        self._sources = [str(s) for s in sources]
+        self._backup_dir = Path(backup_dir)
+        self._interval_s = max(0.0, float(interval_s))
+        self._keep = max(1, int(keep))
+        self._step_pages = max(1, int(step_pages))
+        self._step_sleep_s = max(0.0, float(step_sleep_ms)) / 1000.0
+        self._max_restarts = max(0, int(max_restarts))
+        self._run_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._completed = 0
+        self._failed = 0
+        self._running = False
+        self._last: BackupResult | None = None
+        self._last_error: str | None = None
+
+    def start(self) -> None:
+        if self._interval_s and self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="sqlite-backup", daemon=True)
+            self._thread.start()
+
+    def close(self) -> None:
+        """Stop the schedule; a backup in progress stops at its next step and is discarded."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def stats(self) -> dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "enabled": bool(self._interval_s),
+                "interval_s": self._interval_s,
+                "backup_dir": str(self._backup_dir),
+                "running": self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+                "snapshots": len(self.snapshots()),
+                "last": self._last.as_dict() if self._last else None,
+                "last_error": self._last_error,
+            }
+
+    def snapshots(self) -> list[Path]:
+        """Complete snapshot directories, oldest first."""
+        if not self._backup_dir.is_dir():
+            return []
+        found = []
+        for path in self._backup_dir.iterdir():
+            try:
+                datetime.strptime(path.name, _SNAPSHOT_FORMAT)
+            except ValueError:
+                continue
+            if path.is_dir():
+                found.append(path)
+        return sorted(found)
+
+    def run_once(self) -> BackupResult:
+        """Take one snapshot now (blocking; concurrent calls run one after the other)."""
+        with self._run_lock:
+            with self._stats_lock:
+                self._running = True
+            try:
+                result = self._backup()
+            except Exception as exc:
+                with self._stats_lock:
+                    self._failed += 1
+                    self._last_error = f"{type(exc).__name__}: {exc}"
+                raise
+            finally:
+                with self._stats_lock:
+                    self._running = False
+            with self._stats_lock:
+                self._completed += 1
+                self._last = result
+                self._last_error = None
+            self._rotate()
+            logger.info("sqlite_backup_completed", extra=result.as_dict())
+            return result
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self._interval_s):
+            try:
+                self.run_once()
+            except Exception:
+                if not self._stop.is_set():
+                    logger.exception("sqlite_backup_failed")
+
+    def _backup(self) -> BackupResult:
+        started = datetime.now(timezone.utc)
+        t0 = time.perf_counter()
+        name = started.strftime(_SNAPSHOT_FORMAT)
+        final = self._backup_dir / name
+        if final.exists():
+            # Two runs in the same second (e.g. a manual one right after a scheduled one).
+            time.sleep(1.0)
+            return self._backup()
+        tmp = self._backup_dir / f".{name}.tmp"
+        tmp.mkdir(parents=True, exist_ok=True)
+        pages = restarts = 0
+        pinned: list[sqlite3.Connection] = []
+        try:
+            for source in self._sources:
+                pinned.append(self._pin(source))
+            for source, src in zip(self._sources, pinned):
+                copied, restarted = self._copy(source, src, tmp / Path(source).name)
+                pages += copied
+                restarts += restarted
+            tmp.rename(final)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        finally:
+            for src in pinned:
+                src.close()
+        return BackupResult(
+            snapshot=str(final),
+            started_at=started.isoformat(),
+            duration_s=round(time.perf_counter() - t0, 3),
+            files=len(self._sources),
+            pages=pages,
+            bytes=sum(p.stat().st_size for p in final.iterdir()),
+            restarts=restarts,
+        )
+
+    @staticmethod
+    def _pin(source: str) -> sqlite3.Connection:
+        """Open `source` with a read transaction that pins its current WAL snapshot (see class docstring)."""
+        src = sqlite3.connect(source, isolation_level=None, check_same_thread=False)
+        try:
+            src.execute("BEGIN")
+            src.execute("SELECT count(*) FROM sqlite_master").fetchone()
+        except BaseException:
+            src.close()
+            raise
+        return src
+
+    def _copy(self, source: str, src: sqlite3.Connection, target: Path) -> tuple[int, int]:
+        """Copy the pinned `src` (opened from `source`) into `target`; returns (pages in the snapshot, restarts)."""
+        restarts = 0
+        last_remaining: int | None = None
+
+        def _progress(status: int, remaining: int, total: int) -> None:
+            nonlocal restarts, last_remaining
+            if self._stop.is_set():
+                raise InterruptedError("backup cancelled")
+            if last_remaining is not None and remaining > last_remaining:
+                restarts += 1
+                if restarts > self._max_restarts:
+                    raise _TooManyRestarts()
+            last_remaining = remaining
+            if remaining and self._step_sleep_s:
+                # sqlite3's own `sleep` only applies to BUSY/LOCKED steps; this is the pause between steps.
+                time.sleep(self._step_sleep_s)
+
+        dst = sqlite3.connect(target)
+        try:
+            try:
+                src.backup(dst, pages=self._step_pages, progress=_progress)
+            except _TooManyRestarts:
+                logger.info("sqlite_backup_single_step", extra={"database": source, "restarts": restarts})
+                src.backup(dst)
+            # A snapshot is one self-contained file, not a WAL database.
+            dst.execute("PRAGMA journal_mode=DELETE")
+            total = dst.execute("PRAGMA page_count").fetchone()[0]
+        finally:
+            dst.close()
+        return total, restarts
+
+    def _rotate(self) -> None:
+        snapshots = self.snapshots()
+        for old in snapshots[: max(0, len(snapshots) - self._keep)]:
+            shutil.rmtree(old, ignore_errors=True)
+            logger.info("sqlite_backup_rotated", extra={"snapshot": str(old)})
@@ -0,0 +1,101 @@
+"""
+Storage interfaces the API and services depend on.
+
+`HistoryRepository`, `SavedOutfitRepository`, `UserRepository` and
+`AppearanceProfileRepository` (SQLite) and their `Postgres*` counterparts in
+`postgres.py` both satisfy these; `factory.open_storage` picks one from
+settings.
+"""
+
+from __future__ import annotations
+
+from typing import Any, AsyncIterator, Mapping, Optional, Protocol
+
+from .appearance_profiles import AppearanceProfileRow
+from .history import HistoryListener, HistoryPageRow, HistoryRow
+from .pagination import Page
+from .preferences import PreferenceEvent, PreferenceSnapshot
+from .saved_outfits import SavedOutfitListener, SavedOutfitPageRow, SavedOutfitRow
+from .user import UserRow
+
+
+class UserStore(Protocol):
+    async def init(self) -> None: ...
+
+    async def create_user(
+        self,
+        *,
+        user_id: str,
+        email: str,
+        password_hash: str,
+        display_name: str | None = None,
+        gender: str | None = None,
+    ) -> UserRow: ...
+
+    async def get_by_email(self, email: str) -> Optional[UserRow]: ...
+
+    async def get_by_id(self, user_id: str) -> Optional[UserRow]: ...
+
+    async def update_password_hash(self, user_id: str, old_hash: str, new_hash: str) -> bool: ...
+
+
+class HistoryStore(Protocol):
+    async def init(self) -> None: ...
+
+    def add_listener(self, listener: HistoryListener) -> None: ...
+
+    def write_stats(self) -> dict[str, Any]: ...
+
+    async def add_entry(self, user_id: str, outfit_id: str, payload: dict[str, Any]) -> None: ...
+
+    async def list_recent(self, user_id: str, limit: int = 50) -> list[HistoryRow]: ...
+
+    async def list_page(self, user_id: str, limit: int = 50, cursor: str | None = None) -> Page[HistoryPageRow]: ...
+
+    def export_batches(self, user_id: str | None = None, batch_rows: int = 1000) -> AsyncIterator[list[HistoryPageRow]]: ...
+
+    async def import_rows(self, rows: list[HistoryRow]) -> int: ...
+
+    async def flush(self) -> None: ...
+
+    async def close(self) -> None: ...
+
+
+class SavedOutfitStore(Protocol):
+    async def init(self) -> None: ...
+
+    def add_listener(self, listener: SavedOutfitListener) -> None: ...
+
+    async def add_saved_outfit(self, user_id: str, outfit_id: str, payload: dict[str, Any]) -> None: ...
+
+    async def save_many(self, user_id: str, outfits: list[tuple[str, dict[str, Any]]]) -> int: ...
+
+    async def exists(self, user_id: str, outfit_ids: list[str]) -> set[str]: ...
+
+    async def list_for_user(self, user_id: str, limit: int = 50) -> list[SavedOutfitRow]: ...
+
+    async def list_page(self, user_id: str, limit: int = 50, cursor: str | None = None) -> Page[SavedOutfitPageRow]: ...
+
+    async def delete_for_user(self, user_id: str, outfit_id: str) -> None: ...
+
+    async def delete_many(self, user_id: str, outfit_ids: list[str]) -> int: ...
+
+    def export_batches(
+        self, user_id: str | None = None, batch_rows: int = 1000
+    ) -> AsyncIterator[list[SavedOutfitPageRow]]: ...
+
+    async def import_rows(self, rows: list[SavedOutfitRow]) -> int: ...
+
+
+class AppearanceProfileStore(Protocol):
+    async def init(self) -> None: ...
+
+    async def upsert(self, user_id: str, payload: dict[str, Any]) -> None: ...
+
+    async def get(self, user_id: str) -> Optional[AppearanceProfileRow]: ...
+
+
+class PreferenceStore(Protocol):
+    async def top(self, user_id: str, limits: Mapping[str, int]) -> PreferenceSnapshot: ...
+
+    def advance(self, snapshot: PreferenceSnapshot, event: PreferenceEvent) -> PreferenceSnapshot: ...
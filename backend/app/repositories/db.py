@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, TypeVar
+
+from .executor import DatabaseExecutor, Lane
+
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class ConnectionStats:
+    opened: int
+    reused: int
+    open_connections: int
+    reuse_ratio: float
+    reaped: int
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class SqliteConnectionManager:
+    """
+    Hands out one SQLite connection per thread, kept for as long as that
+    thread lives.
+
+    A connection (with its parsed schema and prepared-statement cache) is
+    reused for every call its thread makes. Connections are owned by their
+    thread: whenever a new one is opened, those whose thread has exited are
+    closed, so the number of open connections stays bounded by the number of
+    live threads that touched this database, even when callers use
+    short-lived threads.
+    Every connection is opened in WAL mode with `synchronous=NORMAL`, so
+    readers no longer block behind a writer and commits skip the per-
+    transaction fsync of the rollback journal.
+
+    `connect()` returns the calling thread's connection; use it as
+    `with db.connect() as conn:` to commit on success and roll back on error
+    (it is not closed on exit). Repositories reach those threads through
+    `run()`, which schedules the call on this database's DatabaseExecutor.
+    """
+
+    def __init__(
+        self,
+        database_path: str,
+        cache_kib: int = 16 * 1024,
+        mmap_bytes: int = 256 * 1024 * 1024,
+        cached_statements: int = 256,
+        busy_timeout_ms: int = 5000,
+        read_threads: int = 8,
+        auth_threads: int = 2,
+    ):
+        self.database_path = database_path
+        self._cache_kib = int(cache_kib)
+        self._mmap_bytes = int(mmap_bytes)
+        self._cached_statements = int(cached_statements)
+        self._busy_timeout_ms = int(busy_timeout_ms)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()
+        self._connections: list[tuple[threading.Thread, sqlite3.Connection]] = []
+        self._opened = 0
+        self._reused = 0
+        self._reaped = 0
+        self.executor = DatabaseExecutor(read_threads=read_threads, auth_threads=auth_threads)
+
+    async def run(self, lane: Lane, label: str, fn: Callable[..., T], *args: Any) -> T:
+        """Run blocking `fn(*args)` in `lane` of the database executor; see DatabaseExecutor."""
+        return await self.executor.run(lane, label, fn, *args)
+
+    def connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            with self._lock:
+                self._reused += 1
+            return conn
+
+        conn = self._open()
+        self._local.conn = conn
+        with self._lock:
+            orphaned = [c for thread, c in self._connections if not thread.is_alive()]
+            self._connections = [(t, c) for t, c in self._connections if t.is_alive()]
+            self._connections.append((threading.current_thread(), conn))
+            self._opened += 1
+            self._reaped += len(orphaned)
+        for stale in orphaned:
+            _close_quietly(stale)
+        return conn
+
+    def stats(self) -> ConnectionStats:
+        with self._lock:
+            total = self._opened + self._reused
+            return ConnectionStats(
+                opened=self._opened,
+                reused=self._reused,
+                open_connections=len(self._connections),
+                reuse_ratio=round(self._reused / total, 4) if total else 0.0,
+                reaped=self._reaped,
+            )
+
+    def close(self) -> None:
+        self.executor.shutdown()
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for _thread, conn in connections:
+            _close_quietly(conn)
+        # Threads still holding a closed connection reopen on next use.
+        self._local = threading.local()
+
+    def _open(self) -> sqlite3.Connection:
+        Path(self.database_path).parent.mkdir(parents=True, exist_ok=True)
+        # check_same_thread=False only so close() can run from the shutdown hook;
+        # each connection is otherwise used by the thread that opened it.
+        conn = sqlite3.connect(
+            self.database_path,
+            timeout=self._busy_timeout_ms / 1000,
+            cached_statements=self._cached_statements,
+            check_same_thread=False,
+        )
+        # Lane threads start together; switching a fresh file to WAL from several at once fails with "locked".
+        with self._open_lock:
+            # Only takes effect on a new, empty database file (existing files need a full VACUUM).
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size=-{self._cache_kib}")
+        conn.execute(f"PRAGMA mmap_size={self._mmap_bytes}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute(f"PRAGMA busy_timeout={self._busy_timeout_ms}")
+        return conn
+
+
+def _close_quietly(conn: sqlite3.Connection) -> None:
+    try:
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+
+_managers: dict[str, SqliteConnectionManager] = {}
+_managers_lock = threading.Lock()
+
+
+def connection_manager(database_path: str, **options: Any) -> SqliteConnectionManager:
+    """The process-wide manager for `database_path` (created on first call with `options`)."""
+    key = str(Path(database_path).resolve())
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = SqliteConnectionManager(database_path, **options)
+            _managers[key] = manager
+        return manager
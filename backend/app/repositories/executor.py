@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Literal, TypeVar
+
+import anyio
+
+
+T = TypeVar("T")
+
+Lane = Literal["read", "write", "auth"]
+
+
+@dataclass
+class _MethodStats:
+    lane: Lane
+    calls: int = 0
+    waiting: int = 0
+    max_waiting: int = 0
+    wait_ms_total: float = 0.0
+    wait_ms_max: float = 0.0
+    run_ms_total: float = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "lane": self.lane,
+            "calls": self.calls,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "wait_ms_avg": round(self.wait_ms_total / self.calls, 3) if self.calls else 0.0,
+            "wait_ms_max": round(self.wait_ms_max, 3),
+            "run_ms_avg": round(self.run_ms_total / self.calls, 3) if self.calls else 0.0,
+        }
+
+
+class DatabaseExecutor:
+    """
+    Runs blocking repository calls on this executor's own long-lived worker
+    threads, in lanes with their own threads and capacity instead of
+    anyio's shared (idle-expiring) worker pool:
+
+    - `write`: one thread, matching SQLite's single writer, so writers queue
+      here instead of spinning on the busy timeout, and every lane write goes
+      through the same connection
+    - `read`: `read_threads` concurrent readers (WAL readers never block)
+    - `auth`: a small reserved lane for login / token lookups, so they never
+      wait behind a burst of uploads, history reads or writes
+
+    Lane threads live until `shutdown()`, so the per-thread connections of
+    SqliteConnectionManager are opened once per thread and then reused.
+    A call cancelled while queued never runs; one already running finishes
+    before the cancellation propagates, like a non-cancellable thread call.
+
+    Every call is labelled (e.g. "history.list_page") and counted: queue
+    depth, time spent waiting for a lane slot, and time running.
+    """
+
+    def __init__(self, read_threads: int = 8, auth_threads: int = 2):
+        self._capacity: dict[Lane, int] = {"read": max(1, int(read_threads)), "write": 1, "auth": max(1, int(auth_threads))}
+        self._pools: dict[Lane, ThreadPoolExecutor] = {}
+        self._busy: dict[Lane, int] = {lane: 0 for lane in self._capacity}
+        self._lock = threading.Lock()
+        self._methods: dict[str, _MethodStats] = {}
+
+    async def run(self, lane: Lane, label: str, fn: Callable[..., T], *args: Any) -> T:
+        with self._lock:
+            stats = self._methods.get(label)
+            if stats is None:
+                stats = self._methods[label] = _MethodStats(lane=lane)
+            stats.waiting += 1
+            stats.max_waiting = max(stats.max_waiting, stats.waiting)
+        queued = time.perf_counter()
+        started = False
+
+        def _call() -> T:
+            nonlocal started
+            start = time.perf_counter()
+            wait_ms = (start - queued) * 1000
+            with self._lock:
+                started = True
+                stats.waiting -= 1
+                stats.calls += 1
+                stats.wait_ms_total += wait_ms
+                stats.wait_ms_max = max(stats.wait_ms_max, wait_ms)
+                self._busy[lane] += 1
+            try:
+                return fn(*args)
+            finally:
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                with self._lock:
+                    stats.run_ms_total += elapsed_ms
+                    self._busy[lane] -= 1
+
+        future = self._pool(lane).submit(_call)
+        try:
+            return await asyncio.wrap_future(future)
+        except anyio.get_cancelled_exc_class():
+            if not future.cancelled():
+                with anyio.CancelScope(shield=True), contextlib.suppress(Exception):
+                    await asyncio.wrap_future(future)
+            raise
+        finally:
+            with self._lock:
+                if not started:  # cancelled while still queued
+                    stats.waiting -= 1
+
+    def shutdown(self) -> None:
+        """Stop the lane threads after their current calls; the next `run()` starts new ones."""
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lanes = {
+                lane: {
+                    "capacity": capacity,
+                    "busy": self._busy[lane],
+                    "waiting": sum(m.waiting for m in self._methods.values() if m.lane == lane),
+                }
+                for lane, capacity in self._capacity.items()
+            }
+            methods = {label: m.as_dict() for label, m in sorted(self._methods.items())}
+        return {"lanes": lanes, "methods": methods}
+
+    def _pool(self, lane: Lane) -> ThreadPoolExecutor:
+        with self._lock:
+            pool = self._pools.get(lane)
+            if pool is None:
+                pool = self._pools[lane] = ThreadPoolExecutor(
+                    max_workers=self._capacity[lane], thread_name_prefix=f"db-{lane}"
+                )
+            return pool
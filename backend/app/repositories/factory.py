@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Literal
+
+import anyio
+
+from ..core.config import Settings
+from ..core.errors import InvalidInputError
+from .appearance_profiles import AppearanceProfileRepository
+from .backup import SqliteBackupJob
+from .base import AppearanceProfileStore, HistoryStore, PreferenceStore, SavedOutfitStore, UserStore
+from .db import SqliteConnectionManager, connection_manager
+from .history import HistoryRepository, OutfitResolver
+from .postgres import (
+    PostgresAppearanceProfileRepository,
+    PostgresHistoryRepository,
+    PostgresPool,
+    PostgresSavedOutfitRepository,
+    PostgresUserRepository,
+)
+from .preferences import FeatureExtractor, PreferenceRepository
+from .saved_outfits import SavedOutfitRepository
+from .sharding import (
+    ShardedAppearanceProfileRepository,
+    ShardedHistoryRepository,
+    ShardedPreferenceRepository,
+    ShardedSavedOutfitRepository,
+    shard_path,
+)
+from .user import UserRepository
+
+
+logger = logging.getLogger(__name__)
+
+Backend = Literal["sqlite", "postgres"]
+
+
+@dataclass
+class Storage:
+    """The repositories of one backend, plus what has to be closed on shutdown."""
+
+    backend: Backend
+    users: UserStore
+    history: HistoryStore
+    saved: SavedOutfitStore
+    profiles: AppearanceProfileStore
+    # SQLite only: materialized preference aggregates (see PreferenceRepository).
+    preferences: PreferenceStore | None = None
+    sqlite: SqliteConnectionManager | None = None
+    # SQLite with SQLITE_SHARDS > 1: one manager per shard file (`sqlite` then only holds users).
+    sqlite_shards: list[SqliteConnectionManager] = field(default_factory=list)
+    pool: PostgresPool | None = None
+    # SQLite only: online snapshots of every file above; the API starts its schedule.
+    backups: SqliteBackupJob | None = None
+
+    def metrics(self) -> dict[str, Any]:
+        out: dict[str, Any] = {"backend": self.backend}
+        if self.sqlite is not None:
+            out["sqlite"] = self.sqlite.stats().as_dict()
+            out["db_executor"] = self.sqlite.executor.stats()
+        if self.sqlite_shards:
+            out["sqlite_shards"] = [
+                {"database": db.database_path, "sqlite": db.stats().as_dict(), "db_executor": db.executor.stats()}
+                for db in self.sqlite_shards
+            ]
+        if self.pool is not None:
+            out["postgres_pool"] = self.pool.stats().as_dict()
+        if self.backups is not None:
+            out["backups"] = self.backups.stats()
+        return out
+
+    async def close(self) -> None:
+        if self.backups is not None:
+            await anyio.to_thread.run_sync(self.backups.close)
+        try:
+            # Raises if the history writer had to drop rows; close the databases regardless.
+            await self.history.close()
+        finally:
+            for db in self.sqlite_shards:
+                db.close()
+            if self.sqlite is not None:
+                self.sqlite.close()
+            if self.pool is not None:
+                await self.pool.close()
+
+
+def resolve_backend(settings: Settings) -> tuple[Backend, str]:
+    """
+    ("postgres", dsn) for a postgres:// or postgresql:// DATABASE_URL,
+    ("sqlite", path) for a sqlite:/// URL, otherwise SQLite at DATABASE_PATH.
+    """
+    url = (settings.database_url or "").strip()
+    if not url:
+        return "sqlite", settings.database_path
+    if url.startswith(("postgres://", "postgresql://")):
+        return "postgres", url
+    if url.startswith("sqlite:///"):
+        return "sqlite", url[len("sqlite:///"):]
+    raise InvalidInputError(f"Unsupported DATABASE_URL scheme: {url.split(':', 1)[0]}")
+
+
+async def open_storage(
+    settings: Settings,
+    outfits: OutfitResolver | None = None,
+    preference_features: FeatureExtractor | None = None,
+) -> Storage:
+    """
+    Build and initialise the repositories for the configured backend.
+
+    `preference_features` turns a history / saved payload into preference
+    signals (see `services.user_memory.preference_features`); SQLite storage
+    keeps materialized preference aggregates only when it is given.
+    """
+    backend, target = resolve_backend(settings)
+    if backend == "postgres":
+        return await _open_postgres(settings, target, outfits)
+    return await _open_sqlite(settings, target, outfits, preference_features)
+
+
+@dataclass
+class _SqliteShard:
+    db: SqliteConnectionManager
+    preferences: PreferenceRepository | None
+    history: HistoryRepository
+    saved: SavedOutfitRepository
+    profiles: AppearanceProfileRepository
+
+
+def _sqlite_manager(settings: Settings, path: str) -> SqliteConnectionManager:
+    return connection_manager(
+        path,
+        cache_kib=settings.sqlite_cache_kib,
+        mmap_bytes=settings.sqlite_mmap_bytes,
+        read_threads=settings.db_read_threads,
+        auth_threads=settings.db_auth_threads,
+    )
+
+
+async def _open_sqlite_shard(
+    settings: Settings, path: str, outfits: OutfitResolver | None, features: FeatureExtractor | None
+) -> _SqliteShard:
+    """The per-user repositories on one database file, initialised and backfilled."""
+    db = _sqlite_manager(settings, path)
+    preference_repo = None
+    if features is not None:
+        preference_repo = PreferenceRepository(
+            path,
+            features=features,
+            db=db,
+            half_life_days=settings.preference_half_life_days,
+        )
+    shard = _SqliteShard(
+        db=db,
+        preferences=preference_repo,
+        history=HistoryRepository(
+            path,
+            db=db,
+            outfits=outfits,
+            write_behind=settings.history_write_behind,
+            flush_interval_ms=settings.history_flush_ms,
+            max_batch=settings.history_batch_max,
+            preferences=preference_repo,
+            retention_days=settings.history_retention_days,
+            keep_recent=settings.history_keep_recent,
+            compact_interval_s=settings.history_compact_interval_seconds,
+        ),
+        saved=SavedOutfitRepository(path, db=db, preferences=preference_repo),
+        profiles=AppearanceProfileRepository(path, db=db),
+    )
+
+    # Preference tables first: history and saved-outfit writes update them.
+    if shard.preferences is not None:
+        await shard.preferences.init()
+    await shard.history.init()
+    await shard.saved.init()
+    await shard.profiles.init()
+    if shard.preferences is not None and await shard.preferences.backfill(
+        shard.history.preference_events, shard.saved.preference_events
+    ):
+        logger.info("preference_aggregates_rebuilt", extra={"database": path})
+    return shard
+
+
+async def _open_sqlite(
+    settings: Settings, path: str, outfits: OutfitResolver | None, features: FeatureExtractor | None
+) -> Storage:
+    db = _sqlite_manager(settings, path)
+    user_repo = UserRepository(path, db=db)
+    await user_repo.init()
+
+    if settings.sqlite_shards <= 1:
+        shard = await _open_sqlite_shard(settings, path, outfits, features)
+        return Storage(
+            backend="sqlite",
+            users=user_repo,
+            history=shard.history,
+            saved=shard.saved,
+            profiles=shard.profiles,
+            preferences=shard.preferences,
+            sqlite=db,
+            backups=_backup_job(settings, [path]),
+        )
+
+    # Users stay in the main file (looked up by email); everything keyed by user id is sharded.
+    shards = [
+        await _open_sqlite_shard(settings, shard_path(path, i), outfits, features)
+        for i in range(settings.sqlite_shards)
+    ]
+    preferences = [s.preferences for s in shards if s.preferences is not None]
+    return Storage(
+        backend="sqlite",
+        users=user_repo,
+        history=ShardedHistoryRepository([s.history for s in shards]),
+        saved=ShardedSavedOutfitRepository([s.saved for s in shards]),
+        profiles=ShardedAppearanceProfileRepository([s.profiles for s in shards]),
+        preferences=ShardedPreferenceRepository(preferences) if preferences else None,
+        sqlite=db,
+        sqlite_shards=[s.db for s in shards],
+        backups=_backup_job(settings, [path, *(s.db.database_path for s in shards)]),
+    )
+
+
+def _backup_job(settings: Settings, files: list[str]) -> SqliteBackupJob:
+    return SqliteBackupJob(
+        files,
+        settings.backup_dir or str(Path(files[0]).parent / "backups"),
+        interval_s=settings.backup_interval_seconds,
+        keep=settings.backup_keep,
+        step_pages=settings.backup_step_pages,
+        step_sleep_ms=settings.backup_step_sleep_ms,
+    )
+
+
+async def _open_postgres(settings: Settings, dsn: str, outfits: OutfitResolver | None) -> Storage:
+    pool = PostgresPool(
+        dsn,
+        min_size=settings.database_pool_min,
+        max_size=settings.database_pool_max,
+        statement_cache_size=settings.database_statement_cache,
+    )
+    await pool.open()
+    storage = Storage(
+        backend="postgres",
+        users=PostgresUserRepository(pool),
+        history=PostgresHistoryRepository(pool, outfits=outfits),
+        saved=PostgresSavedOutfitRepository(pool),
+        profiles=PostgresAppearanceProfileRepository(pool),
+        pool=pool,
+    )
+    try:
+        await storage.users.init()
+        await storage.history.init()
+        await storage.saved.init()
+        await storage.profiles.init()
+    except Exception:
+        await pool.close()
+        raise
+    return storage
@@ -1,13 +1,28 @@
 from __future__ import annotations
 
 import json
+import logging
+import math
 import sqlite3
-from dataclasses import dataclass
-from datetime import datetime, timezone
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from functools import cached_property, partial
 from pathlib import Path
-from typing import Any
+from typing import Any, AsyncIterator, Callable, Iterator, Protocol
 
 import anyio
+from pydantic_core import to_json
+
+from ..models.schemas import Outfit
+from ..utils.json_stream import json_text
+from .db import ConnectionStats, SqliteConnectionManager, connection_manager
+from .pagination import Cursor, Page, decode_cursor, encode_cursor
+from .preferences import PreferenceEvent, PreferenceRepository
+
+
+logger = logging.getLogger(__name__)
 
 
 def _utc_now() -> datetime:
@@ -22,15 +37,131 @@ class HistoryRow:
     payload: dict[str, Any]
 
 
+@dataclass(frozen=True)
+class HistoryPageRow:
+    """A history row from `list_page`; the payload is only rebuilt when first accessed."""
+
+    user_id: str
+    outfit_id: str
+    created_at: datetime
+    loader: Callable[[], dict[str, Any]] = field(repr=False, compare=False)
+    json_loader: Callable[[], bytes] = field(repr=False, compare=False)
+
+    @cached_property
+    def payload(self) -> dict[str, Any]:
+        return self.loader()
+
+    @cached_property
+    def payload_json(self) -> bytes:
+        """The same payload as UTF-8 JSON, assembled from stored JSON without a decode/encode round trip."""
+        return self.json_loader()
+
+
+class OutfitResolver(Protocol):
+    """Looks up catalog outfits so history rows only need to store the id."""
+
+    @property
+    def version(self) -> str: ...
+
+    def resolve(self, outfit_id: str) -> dict[str, Any] | None: ...
+
+    def resolve_json(self, outfit_id: str) -> bytes | None: ...
+
+
+# Called with (user_id, payload) after every add_entry.
+HistoryListener = Callable[[str, dict[str, Any]], None]
+
+# Outfit fields that are resolved from the catalog on read and never stored in v2 rows.
+_OUTFIT_FIELDS = frozenset(Outfit.model_fields)
+
+
 class HistoryRepository:
-    def __init__(self, database_path: str):
+    """
+    Outfit history per user.
+
+    Rows are stored compactly in `history_v2`: outfit id, catalog version,
+    score and a small JSON of whatever in the payload is not an outfit field
+    (context, diversity penalty). `list_recent` rebuilds the full payload by
+    merging that with the catalog outfit from `outfits`, as long as the
+    catalog's content version still matches the row's; rows written against
+    an earlier catalog come back as id + score + context. Legacy rows in
+    `history` (full payload dumps) are still read, and `init()` starts a
+    background thread that moves them to `history_v2` in small batches.
+
+    With `write_behind=True`, `add_entry` only enqueues: a single writer thread
+    group-commits pending rows every `flush_interval_ms` (or as soon as
+    `max_batch` rows are waiting) in one transaction. Rows that are queued but
+    not yet committed are merged into `list_recent`, so this process always
+    reads its own writes. Call `close()` on shutdown to flush the queue.
+
+    With `preferences`, every insert also updates the user's preference
+    aggregates in the same transaction (for write-behind rows: when the
+    batch commits, not when `add_entry` returns).
+
+    With `preferences` and `retention_days` > 0, a background thread
+    compacts `history_v2` every `compact_interval_s`: rows older than the
+    retention window, beyond each user's newest `keep_recent`, are folded
+    into per-user, per-day feature rows in `history_rollup` and deleted in
+    small batches, then freed pages are returned with incremental vacuum.
+    The preference aggregates already include those rows; the rollup keeps
+    them available when the aggregates are rebuilt.
+    """
+
+    def __init__(
+        self,
+        database_path: str,
+        db: SqliteConnectionManager | None = None,
+        write_behind: bool = False,
+        flush_interval_ms: float = 5.0,
+        max_batch: int = 256,
+        outfits: OutfitResolver | None = None,
+        migrate_batch: int = 500,
+        preferences: PreferenceRepository | None = None,
+        retention_days: float = 0.0,
+        keep_recent: int = 50,
+        compact_interval_s: float = 3600.0,
+        vacuum_pages: int = 256,
+    ):
         self._db_path = database_path
+        self._db = db or connection_manager(database_path)
+        self._outfits = outfits
+        self._preferences = preferences
+        self._migrate_batch = max(1, int(migrate_batch))
+        self._migrated = 0
+        self._migration: threading.Thread | None = None
+        self._retention_days = max(0.0, float(retention_days))
+        self._keep_recent = max(1, int(keep_recent))
+        self._compact_interval_s = max(1.0, float(compact_interval_s))
+        self._vacuum_pages = max(1, int(vacuum_pages))
+        self._compaction: threading.Thread | None = None
+        self._compacted = 0
+        self._vacuumed_pages = 0
+        self._last_compaction: str | None = None
+        self._stop_background = threading.Event()
+        self._listeners: list[HistoryListener] = []
+        self._writer: _HistoryWriter | None = None
+        if write_behind:
+            self._writer = _HistoryWriter(self._db, flush_interval_ms / 1000.0, max_batch, self._record_preferences)
+
+    def connection_stats(self) -> ConnectionStats:
+        return self._db.stats()
+
+    def add_listener(self, listener: HistoryListener) -> None:
+        self._listeners.append(listener)
+
+    def write_stats(self) -> dict[str, Any]:
+        stats = self._writer.stats() if self._writer else {"write_behind": False}
+        stats["legacy_rows_migrated"] = self._migrated
+        stats["rows_compacted"] = self._compacted
+        stats["vacuumed_pages"] = self._vacuumed_pages
+        stats["last_compaction"] = self._last_compaction
+        return stats
 
     async def init(self) -> None:
         Path(self._db_path).parent.mkdir(parents=True, exist_ok=True)
 
-        def _init() -> None:
-            with sqlite3.connect(self._db_path) as conn:
+        def _init() -> bool:
+            with self._db.connect() as conn:
                 conn.execute(
                     """
                     CREATE TABLE IF NOT EXISTS history (
@@ -42,45 +173,721 @@ class HistoryRepository:
                     """
                 )
                 conn.execute("CREATE INDEX IF NOT EXISTS idx_history_user ON history(user_id, created_at)")
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS history_v2 (
+                        user_id TEXT NOT NULL,
+                        outfit_id TEXT NOT NULL,
+                        created_at TEXT NOT NULL,
+                        catalog_version TEXT,
+                        score REAL,
+                        extra_json TEXT
+                    )
+                    """
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_history_v2_user ON history_v2(user_id, created_at)")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_history_v2_created ON history_v2(created_at)")
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS history_rollup (
+                        user_id TEXT NOT NULL,
+                        day TEXT NOT NULL,
+                        kind TEXT NOT NULL,
+                        value TEXT NOT NULL,
+                        weight REAL NOT NULL,
+                        PRIMARY KEY (user_id, day, kind, value)
+                    ) WITHOUT ROWID
+                    """
+                )
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS history_rollup_days (
+                        user_id TEXT NOT NULL,
+                        day TEXT NOT NULL,
+                        rows INTEGER NOT NULL,
+                        PRIMARY KEY (user_id, day)
+                    ) WITHOUT ROWID
+                    """
+                )
                 conn.commit()
+                return bool(conn.execute("SELECT EXISTS(SELECT 1 FROM history)").fetchone()[0])
 
-        await anyio.to_thread.run_sync(_init)
+        has_legacy = await self._db.run("write", "history.init", _init)
+        if self._writer:
+            self._writer.start()
+        if has_legacy and self._migration is None:
+            self._migration = threading.Thread(target=self.migrate_legacy_rows, name="history-migrate", daemon=True)
+            self._migration.start()
+        if self._preferences is not None and self._retention_days and self._compaction is None:
+            self._compaction = threading.Thread(target=self._compaction_loop, name="history-compact", daemon=True)
+            self._compaction.start()
 
     async def add_entry(self, user_id: str, outfit_id: str, payload: dict[str, Any]) -> None:
-        created_at = _utc_now().isoformat()
-        payload_json = json.dumps(payload, ensure_ascii=False)
+        created = _utc_now()
+        entry = _PendingEntry(
+            row=HistoryRow(user_id, outfit_id, created, payload),
+            params=self._v2_params(user_id, outfit_id, created.isoformat(), payload),
+        )
 
-        def _insert() -> None:
-            with sqlite3.connect(self._db_path) as conn:
-                conn.execute(
-                    "INSERT INTO history(user_id, outfit_id, created_at, payload_json) VALUES (?, ?, ?, ?)",
-                    (user_id, outfit_id, created_at, payload_json),
-                )
-                conn.commit()
+        if self._writer:
+            self._writer.submit(entry)
+        else:
+            await self._db.run("write", "history.add_entry", self._insert_one, entry)
 
-        await anyio.to_thread.run_sync(_insert)
+        for listener in self._listeners:
+            listener(user_id, payload)
 
     async def list_recent(self, user_id: str, limit: int = 50) -> list[HistoryRow]:
         limit = max(1, min(500, limit))
+        # Snapshot before querying: a row committed in between shows up in both
+        # and is de-duplicated below, instead of in neither.
+        pending = self._writer.pending_for(user_id) if self._writer else []
 
         def _select() -> list[HistoryRow]:
-            with sqlite3.connect(self._db_path) as conn:
+            with self._db.connect() as conn:
+                # One statement, so a row being migrated is seen exactly once.
                 cur = conn.execute(
-                    "SELECT user_id, outfit_id, created_at, payload_json FROM history WHERE user_id=? ORDER BY created_at DESC LIMIT ?",
-                    (user_id, limit),
+                    """
+                    SELECT outfit_id, created_at, catalog_version, score, extra_json, NULL FROM history_v2 WHERE user_id=?
+                    UNION ALL
+                    SELECT outfit_id, created_at, NULL, NULL, NULL, payload_json FROM history WHERE user_id=?
+                    ORDER BY created_at DESC LIMIT ?
+                    """,
+                    (user_id, user_id, limit),
                 )
                 rows: list[HistoryRow] = []
-                for u, oid, created_at, payload_json in cur.fetchall():
-                    try:
-                        payload = json.loads(payload_json)
-                    except Exception:
-                        payload = {}
+                for oid, created_at, version, score, extra_json, payload_json in cur.fetchall():
+                    if payload_json is not None:
+                        payload = _loads(payload_json)
+                    else:
+                        payload = self._expand(oid, version, score, extra_json)
                     try:
                         dt = datetime.fromisoformat(created_at)
                     except Exception:
                         dt = _utc_now()
-                    rows.append(HistoryRow(user_id=u, outfit_id=oid, created_at=dt, payload=payload))
+                    rows.append(HistoryRow(user_id=user_id, outfit_id=oid, created_at=dt, payload=payload))
                 return rows
 
-        return await anyio.to_thread.run_sync(_select)
+        rows = await self._db.run("read", "history.list_recent", _select)
+        if not pending:
+            return rows
+
+        seen = {(r.outfit_id, r.created_at) for r in rows}
+        merged = rows + [p for p in pending if (p.outfit_id, p.created_at) not in seen]
+        merged.sort(key=lambda r: r.created_at, reverse=True)
+        return merged[:limit]
+
+    async def list_page(self, user_id: str, limit: int = 50, cursor: str | None = None) -> Page[HistoryPageRow]:
+        """
+        Newest-first page of at most `limit` rows after `cursor` (a
+        `next_cursor` from the previous page). Keyset pagination on
+        (created_at, rowid) per table, so every page is an index range scan
+        however deep it is.
+        """
+        limit = max(1, min(500, limit))
+        after = decode_cursor(cursor) if cursor else None
+        if self._writer and self._writer.pending_for(user_id):
+            # Pages only see committed rows (they need a rowid for the cursor);
+            # wait out the group-commit window so this user's own writes show up.
+            await self._drain()
+
+        # Source 1 (history_v2) sorts before source 0 (legacy) at equal created_at.
+        v2_sql = (
+            "SELECT 1 AS src, rowid AS rid, outfit_id, created_at, catalog_version, score, extra_json, NULL AS payload_json "
+            "FROM history_v2 WHERE user_id=?"
+        )
+        legacy_sql = "SELECT 0, rowid, outfit_id, created_at, NULL, NULL, NULL, payload_json FROM history WHERE user_id=?"
+        v2_params: list[Any] = [user_id]
+        legacy_params: list[Any] = [user_id]
+        if after is not None:
+            if after.source >= 1:
+                v2_sql += " AND (created_at, rowid) < (?, ?)"
+                v2_params += [after.created_at, after.rowid]
+                legacy_sql += " AND created_at <= ?"
+                legacy_params += [after.created_at]
+            else:
+                v2_sql += " AND created_at < ?"
+                v2_params += [after.created_at]
+                legacy_sql += " AND (created_at, rowid) < (?, ?)"
+                legacy_params += [after.created_at, after.rowid]
+        sql = (
+            f"SELECT * FROM ({v2_sql} ORDER BY created_at DESC, rowid DESC LIMIT ?) "
+            f"UNION ALL SELECT * FROM ({legacy_sql} ORDER BY created_at DESC, rowid DESC LIMIT ?) "
+            "ORDER BY created_at DESC, src DESC, rid DESC LIMIT ?"
+        )
+        params = [*v2_params, limit + 1, *legacy_params, limit + 1, limit + 1]
+
+        def _select() -> list[tuple[Any, ...]]:
+            with self._db.connect() as conn:
+                return conn.execute(sql, params).fetchall()
+
+        found = await self._db.run("read", "history.list_page", _select)
+        items: list[HistoryPageRow] = []
+        for _src, _rid, oid, created_at, version, score, extra_json, payload_json in found[:limit]:
+            try:
+                dt = datetime.fromisoformat(created_at)
+            except Exception:
+                dt = _utc_now()
+            if payload_json is not None:
+                loader = partial(_loads, payload_json)
+                json_loader = partial(str.encode, payload_json, "utf-8")
+            else:
+                loader = partial(self._expand, oid, version, score, extra_json)
+                json_loader = partial(self._expand_json, oid, version, score, extra_json)
+            items.append(
+                HistoryPageRow(user_id=user_id, outfit_id=oid, created_at=dt, loader=loader, json_loader=json_loader)
+            )
+
+        next_cursor = None
+        if len(found) > limit:
+            src, rid, _oid, created_at, *_rest = found[limit - 1]
+            next_cursor = encode_cursor(Cursor(created_at=created_at, rowid=int(rid), source=int(src)))
+        return Page(items=items, next_cursor=next_cursor)
+
+    async def export_batches(
+        self, user_id: str | None = None, batch_rows: int = 1000
+    ) -> AsyncIterator[list[HistoryPageRow]]:
+        """
+        Every stored row (of one user, or of everyone), oldest first, in
+        batches of `batch_rows`. Each batch is its own keyset query, so memory
+        stays flat however many rows there are and no read transaction is held
+        between batches. Compacted history (rollups) is not included.
+        """
+        batch_rows = max(1, int(batch_rows))
+        await self._drain()
+        if self._migration is not None and self._migration.is_alive():
+            # Otherwise a row could move from `history` to `history_v2` between the two passes.
+            await anyio.to_thread.run_sync(self._migration.join)
+
+        legacy_sql = "SELECT rowid, user_id, outfit_id, created_at, payload_json FROM history WHERE rowid > ?"
+        v2_sql = (
+            "SELECT rowid, user_id, outfit_id, created_at, catalog_version, score, extra_json FROM history_v2 "
+            "WHERE (created_at, rowid) > (?, ?)"
+        )
+        if user_id is not None:
+            legacy_sql += " AND user_id=?"
+            v2_sql += " AND user_id=?"
+        legacy_sql += " ORDER BY rowid LIMIT ?"
+        v2_sql += " ORDER BY created_at, rowid LIMIT ?"
+        user_params = (user_id,) if user_id is not None else ()
+
+        def _select(sql: str, params: tuple[Any, ...]) -> list[tuple[Any, ...]]:
+            with self._db.connect() as conn:
+                return conn.execute(sql, params).fetchall()
+
+        last_rowid = 0
+        while True:
+            found = await self._db.run(
+                "read", "history.export", _select, legacy_sql, (last_rowid, *user_params, batch_rows)
+            )
+            if not found:
+                break
+            yield [
+                HistoryPageRow(
+                    user_id=str(uid),
+                    outfit_id=str(oid),
+                    created_at=_datetime(created_at),
+                    loader=partial(_loads, payload_json),
+                    json_loader=partial(str.encode, payload_json, "utf-8"),
+                )
+                for _rid, uid, oid, created_at, payload_json in found
+            ]
+            last_rowid = int(found[-1][0])
+
+        after: tuple[str, int] = ("", 0)
+        while True:
+            found = await self._db.run("read", "history.export", _select, v2_sql, (*after, *user_params, batch_rows))
+            if not found:
+                break
+            yield [
+                HistoryPageRow(
+                    user_id=str(uid),
+                    outfit_id=str(oid),
+                    created_at=_datetime(created_at),
+                    loader=partial(self._expand, oid, version, score, extra_json),
+                    json_loader=partial(self._expand_json, oid, version, score, extra_json),
+                )
+                for _rid, uid, oid, created_at, version, score, extra_json in found
+            ]
+            after = (found[-1][3], int(found[-1][0]))
+
+    async def import_rows(self, rows: list[HistoryRow]) -> int:
+        """
+        Insert `rows` (keeping their created_at) in one transaction, preference
+        aggregates included. A row whose (user_id, outfit_id, created_at) is
+        already stored is skipped, so re-running an interrupted import does
+        not duplicate rows or double-count aggregates. Callers split large
+        imports into batches so other writers get the lock in between.
+        Listeners are not called; see StylistService.invalidate_user_context.
+        Returns rows inserted.
+        """
+        entries = [
+            _PendingEntry(row=r, params=self._v2_params(r.user_id, r.outfit_id, r.created_at.isoformat(), r.payload))
+            for r in rows
+        ]
+        if not entries:
+            return 0
+
+        def _insert() -> int:
+            with self._db.connect() as conn:
+                inserted = [e for e in entries if conn.execute(_IMPORT_V2, (*e.params, *e.params[:3])).rowcount]
+                self._record_preferences(conn, inserted)
+            return len(inserted)
+
+        return await self._db.run("write", "history.import_rows", _insert)
+
+    def migrate_legacy_rows(self, pause: float = 0.01) -> int:
+        """
+        Move legacy full-payload rows into `history_v2`, `migrate_batch` rows
+        per transaction with a short pause in between so request traffic is
+        never blocked for long. Safe to run while serving; returns rows moved.
+        """
+        moved = 0
+        while not self._stop_background.is_set():
+            with self._db.connect() as conn:
+                batch = conn.execute(
+                    "SELECT rowid, user_id, outfit_id, created_at, payload_json FROM history ORDER BY rowid LIMIT ?",
+                    (self._migrate_batch,),
+                ).fetchall()
+                if not batch:
+                    break
+                conn.executemany(
+                    _INSERT_V2,
+                    [self._v2_params(uid, oid, created_at, _loads(payload_json)) for _rid, uid, oid, created_at, payload_json in batch],
+                )
+                conn.executemany("DELETE FROM history WHERE rowid=?", [(rid,) for rid, *_rest in batch])
+            moved += len(batch)
+            self._migrated += len(batch)
+            time.sleep(pause)
+        if moved:
+            logger.info("history_legacy_rows_migrated", extra={"rows": moved})
+        return moved
+
+    def compact(self, pause: float = 0.01) -> int:
+        """
+        Fold history_v2 rows older than the retention window (keeping each
+        user's newest `keep_recent`) into `history_rollup` and delete them,
+        `migrate_batch` rows per short transaction, then run incremental
+        vacuum. Safe to run while serving; returns rows compacted.
+        """
+        if self._preferences is None or not self._retention_days:
+            return 0
+        cutoff = (_utc_now() - timedelta(days=self._retention_days)).isoformat()
+        after: tuple[str, int] = ("", 0)
+        compacted = 0
+        while not self._stop_background.is_set():
+            with self._db.connect() as conn:
+                batch = conn.execute(_COMPACT_CANDIDATES, (cutoff, *after, self._keep_recent - 1, self._migrate_batch)).fetchall()
+                if not batch:
+                    break
+                days: dict[tuple[str, str], int] = {}
+                weights: dict[tuple[str, str, str, str], float] = {}
+                for _rid, uid, oid, created_at, version, score, extra_json in batch:
+                    day = created_at[:10]
+                    days[(uid, day)] = days.get((uid, day), 0) + 1
+                    for kind, values in self._preferences.features("history", self._expand(oid, version, score, extra_json)).items():
+                        for value, weight in values.items():
+                            key = (uid, day, kind, value)
+                            weights[key] = weights.get(key, 0.0) + weight
+                conn.executemany(
+                    "INSERT INTO history_rollup_days(user_id, day, rows) VALUES (?, ?, ?) "
+                    "ON CONFLICT(user_id, day) DO UPDATE SET rows = rows + excluded.rows",
+                    [(uid, day, n) for (uid, day), n in days.items()],
+                )
+                conn.executemany(
+                    "INSERT INTO history_rollup(user_id, day, kind, value, weight) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(user_id, day, kind, value) DO UPDATE SET weight = weight + excluded.weight",
+                    [(*key, weight) for key, weight in weights.items()],
+                )
+                conn.executemany("DELETE FROM history_v2 WHERE rowid=?", [(rid,) for rid, *_rest in batch])
+            last = batch[-1]
+            after = (last[3], int(last[0]))
+            compacted += len(batch)
+            self._compacted += len(batch)
+            time.sleep(pause)
+
+        self._vacuum(pause)
+        self._last_compaction = _utc_now().isoformat()
+        if compacted:
+            logger.info("history_compacted", extra={"rows": compacted})
+        return compacted
+
+    def _vacuum(self, pause: float) -> None:
+        with self._db.connect() as conn:
+            mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        if mode != 2:
+            # auto_vacuum can only be switched on for an existing file by a full VACUUM.
+            logger.info("history_incremental_vacuum_unavailable", extra={"auto_vacuum": mode})
+            return
+        while not self._stop_background.is_set():
+            with self._db.connect() as conn:
+                free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if not free:
+                    break
+                conn.execute(f"PRAGMA incremental_vacuum({self._vacuum_pages})").fetchall()
+            self._vacuumed_pages += min(free, self._vacuum_pages)
+            time.sleep(pause)
+
+    def _compaction_loop(self) -> None:
+        while True:
+            try:
+                self.compact()
+            except Exception:
+                logger.exception("history_compaction_failed")
+            if self._stop_background.wait(self._compact_interval_s):
+                return
+
+    def preference_events(self, conn: sqlite3.Connection) -> Iterator[PreferenceEvent]:
+        """
+        Every stored row as a preference event, for `PreferenceRepository.backfill`,
+        plus one rolled-up event per user and day of compacted history.
+        """
+        rollup = conn.execute(
+            """
+            SELECT d.user_id, d.day, d.rows, r.kind, r.value, r.weight
+            FROM history_rollup_days d LEFT JOIN history_rollup r ON r.user_id = d.user_id AND r.day = d.day
+            ORDER BY d.user_id, d.day
+            """
+        )
+        group: tuple[str, str, int] | None = None
+        features: dict[str, dict[str, float]] = {}
+        for uid, day, rows, kind, value, weight in rollup:
+            if group is not None and group[:2] != (uid, day):
+                yield _rollup_event(*group, features)
+                features = {}
+            group = (uid, day, int(rows))
+            if kind is not None:
+                features.setdefault(kind, {})[value] = float(weight)
+        if group is not None:
+            yield _rollup_event(*group, features)
+
+        cur = conn.execute(
+            """
+            SELECT user_id, outfit_id, created_at, catalog_version, score, extra_json, NULL FROM history_v2
+            UNION ALL
+            SELECT user_id, outfit_id, created_at, NULL, NULL, NULL, payload_json FROM history
+            """
+        )
+        for uid, oid, created_at, version, score, extra_json, payload_json in cur:
+            payload = _loads(payload_json) if payload_json is not None else self._expand(oid, version, score, extra_json)
+            yield PreferenceEvent(user_id=str(uid), source="history", payload=payload, at=_timestamp(created_at))
+
+    def _insert_one(self, entry: _PendingEntry) -> None:
+        with self._db.connect() as conn:
+            conn.execute(_INSERT_V2, entry.params)
+            self._record_preferences(conn, [entry])
+            conn.commit()
+
+    def _record_preferences(self, conn: sqlite3.Connection, entries: list[_PendingEntry]) -> None:
+        if self._preferences is not None:
+            self._preferences.record(
+                conn,
+                (
+                    PreferenceEvent(e.row.user_id, "history", e.row.payload, e.row.created_at.timestamp())
+                    for e in entries
+                ),
+            )
+
+    def _v2_params(self, user_id: str, outfit_id: str, created_at: str, payload: dict[str, Any]) -> tuple[Any, ...]:
+        return (user_id, outfit_id, created_at, *compact_payload(self._outfits, outfit_id, payload))
+
+    def _expand(self, outfit_id: str, version: str | None, score: float | None, extra_json: str | None) -> dict[str, Any]:
+        return expand_payload(self._outfits, outfit_id, version, score, extra_json)
+
+    def _expand_json(self, outfit_id: str, version: str | None, score: float | None, extra_json: str | None) -> bytes:
+        return expand_payload_json(self._outfits, outfit_id, version, score, extra_json)
+
+    async def flush(self) -> None:
+        """Wait for queued writes; raises RuntimeError if any were dropped after retrying."""
+        if self._writer:
+            await anyio.to_thread.run_sync(self._writer.flush)
+
+    async def _drain(self) -> None:
+        if self._writer:
+            await anyio.to_thread.run_sync(self._writer.drain)
+
+    async def close(self) -> None:
+        self._stop_background.set()
+        if self._migration is not None:
+            await anyio.to_thread.run_sync(self._migration.join)
+        if self._compaction is not None:
+            await anyio.to_thread.run_sync(self._compaction.join)
+        if self._writer:
+            await anyio.to_thread.run_sync(self._writer.close)
+
+
+# A failed group commit is retried after 0.1, 0.2, 0.4 and 0.8 s before its rows are dropped.
+_WRITE_ATTEMPTS = 5
+_RETRY_BASE_DELAY = 0.1
+
+_INSERT_V2 = (
+    "INSERT INTO history_v2(user_id, outfit_id, created_at, catalog_version, score, extra_json) VALUES (?, ?, ?, ?, ?, ?)"
+)
+
+# _INSERT_V2 unless the natural key (user_id, outfit_id, created_at) is already stored; found via idx_history_v2_user.
+_IMPORT_V2 = (
+    "INSERT INTO history_v2(user_id, outfit_id, created_at, catalog_version, score, extra_json) "
+    "SELECT ?, ?, ?, ?, ?, ? WHERE NOT EXISTS "
+    "(SELECT 1 FROM history_v2 WHERE user_id=? AND outfit_id=? AND created_at=?)"
+)
+
+
+# Old rows past each user's newest `keep_recent`, oldest first, resuming after (created_at, rowid).
+_COMPACT_CANDIDATES = """
+    SELECT h.rowid, h.user_id, h.outfit_id, h.created_at, h.catalog_version, h.score, h.extra_json FROM history_v2 h
+    WHERE h.created_at < ?
+      AND (h.created_at, h.rowid) > (?, ?)
+      AND h.created_at < (
+          SELECT n.created_at FROM history_v2 n WHERE n.user_id = h.user_id
+          ORDER BY n.created_at DESC LIMIT 1 OFFSET ?
+      )
+    ORDER BY h.created_at, h.rowid LIMIT ?
+"""
+
+
+def compact_payload(
+    outfits: OutfitResolver | None, outfit_id: str, payload: dict[str, Any]
+) -> tuple[str | None, float | None, str | None]:
+    """
+    (catalog_version, score, extra_json) stored for `payload`. Outfit fields
+    equal to the catalog entry come back from the catalog on read; fields
+    that differ (e.g. the per-request `image` / `vibe_images` picked by image
+    search) and everything else are kept in extra_json, as is the whole
+    outfit when it is not in the catalog. The catalog version is stored
+    with the row so a later catalog edit is not read back as this outfit.
+    """
+    catalog = outfits.resolve(outfit_id) if outfits else None
+    extra = {
+        k: v
+        for k, v in payload.items()
+        if k != "score" and k != "outfit_id" and (catalog is None or k not in _OUTFIT_FIELDS or catalog.get(k) != v)
+    }
+    score = payload.get("score")
+    return (
+        outfits.version if outfits else None,
+        float(score) if isinstance(score, (int, float)) and math.isfinite(score) else None,
+        json_text(extra) if extra else None,
+    )
+
 
+def _catalog_outfit(outfits: OutfitResolver | None, outfit_id: str, version: str | None) -> dict[str, Any] | None:
+    """The catalog outfit a row was written against, or None once the catalog has changed since."""
+    if outfits is None or version is None or version != outfits.version:
+        return None
+    return outfits.resolve(outfit_id)
+
+
+def expand_payload(
+    outfits: OutfitResolver | None, outfit_id: str, version: str | None, score: float | None, extra_json: str | None
+) -> dict[str, Any]:
+    """
+    The stored payload, rebuilt from the catalog when the row's `version` is
+    the current catalog's. Rows written against another catalog version (or
+    outfits no longer in the catalog) degrade to id + score + extra rather
+    than picking up colours and items the user was never shown.
+    """
+    outfit = _catalog_outfit(outfits, outfit_id, version)
+    payload: dict[str, Any] = dict(outfit) if outfit else {"outfit_id": outfit_id}
+    if score is not None:
+        payload["score"] = score
+    if extra_json:
+        payload.update(_loads(extra_json))
+    return payload
+
+
+def expand_payload_json(
+    outfits: OutfitResolver | None, outfit_id: str, version: str | None, score: float | None, extra_json: str | None
+) -> bytes:
+    """`expand_payload` spliced as JSON text: catalog outfit JSON, then score, then the extra object's members."""
+    base = outfits.resolve_json(outfit_id) if _catalog_outfit(outfits, outfit_id, version) is not None else None
+    extra = (extra_json or "").strip()
+    if base is not None and extra and not _OUTFIT_FIELDS.isdisjoint(_loads(extra)):
+        # Overridden outfit fields: splicing would repeat keys, so merge properly.
+        return to_json(expand_payload(outfits, outfit_id, version, score, extra_json), inf_nan_mode="null")
+    if base is None:
+        base = to_json({"outfit_id": outfit_id})
+    members: list[bytes] = []
+    if score is not None:
+        # A non-finite score (rows stored before scores were checked) is written as null, not as NaN.
+        members.append(b'"score":' + to_json(score, inf_nan_mode="null"))
+    # Remaining extra keys never overlap outfit fields or score, so plain concatenation is safe.
+    if extra.startswith("{") and extra.endswith("}") and extra[1:-1].strip():
+        members.append(extra[1:-1].encode("utf-8"))
+    if not members:
+        return base
+    return base[:-1] + b"," + b",".join(members) + b"}"
+
+
+def _rollup_event(user_id: str, day: str, rows: int, features: dict[str, dict[str, float]]) -> PreferenceEvent:
+    # Replayed at midday of the bucket; day resolution is plenty for day-scale half-lives.
+    at = datetime.fromisoformat(day).replace(hour=12, tzinfo=timezone.utc).timestamp()
+    return PreferenceEvent(user_id=user_id, source="history", payload={}, at=at, features=features, count=rows)
+
+
+def _datetime(created_at: str) -> datetime:
+    try:
+        return datetime.fromisoformat(created_at)
+    except Exception:
+        return _utc_now()
+
+
+def _timestamp(created_at: str) -> float:
+    try:
+        return datetime.fromisoformat(created_at).timestamp()
+    except Exception:
+        return _utc_now().timestamp()
+
+
+def _loads(raw: str) -> dict[str, Any]:
+    try:
+        value = json.loads(raw)
+    except Exception:
+        return {}
+    return value if isinstance(value, dict) else {}
+
+
+@dataclass(frozen=True)
+class _PendingEntry:
+    row: HistoryRow
+    params: tuple[Any, ...]
+
+
+class _HistoryWriter:
+    """
+    Group-commits queued history rows on one thread.
+
+    A batch whose commit fails stays pending (still visible to
+    `pending_for`) and is retried `_WRITE_ATTEMPTS` times with exponential
+    backoff, so a transient "database is locked" loses nothing. A batch that
+    still fails is dropped and counted; the next `flush()` or `close()`
+    raises with the number of rows lost.
+    """
+
+    def __init__(
+        self,
+        db: SqliteConnectionManager,
+        flush_interval: float,
+        max_batch: int,
+        on_write: Callable[[sqlite3.Connection, list[_PendingEntry]], None],
+    ):
+        self._db = db
+        self._on_write = on_write
+        self._flush_interval = max(0.0, float(flush_interval))
+        self._max_batch = max(1, int(max_batch))
+        self._cond = threading.Condition()
+        self._queue: list[_PendingEntry] = []
+        # Everything not yet committed, oldest first: the queue plus the batch being written.
+        self._uncommitted: list[_PendingEntry] = []
+        self._closed = False
+        self._thread: threading.Thread | None = None
+        self._batches = 0
+        self._rows = 0
+        self._largest_batch = 0
+        self._failed_rows = 0
+        self._retries = 0
+        self._lost_unreported = 0
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+            self._thread.start()
+
+    def submit(self, entry: _PendingEntry) -> None:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("History writer is closed")
+            self._queue.append(entry)
+            self._uncommitted.append(entry)
+            self._cond.notify_all()
+
+    def pending_for(self, user_id: str) -> list[HistoryRow]:
+        with self._cond:
+            return [e.row for e in self._uncommitted if e.row.user_id == user_id]
+
+    def drain(self, timeout: float | None = None) -> bool:
+        """Wait until every submitted row is committed or dropped."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._uncommitted, timeout)
+
+    def flush(self) -> None:
+        """Drain, then raise if rows were dropped since the last flush/close."""
+        self.drain()
+        self._raise_if_lost()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        self._raise_if_lost()
+
+    def _raise_if_lost(self) -> None:
+        with self._cond:
+            lost, self._lost_unreported = self._lost_unreported, 0
+        if lost:
+            raise RuntimeError(f"{lost} history rows could not be written (see history_write_behind_failed)")
+
+    def stats(self) -> dict[str, Any]:
+        with self._cond:
+            return {
+                "write_behind": True,
+                "pending": len(self._uncommitted),
+                "batches": self._batches,
+                "rows": self._rows,
+                "largest_batch": self._largest_batch,
+                "avg_batch": round(self._rows / self._batches, 2) if self._batches else 0.0,
+                "failed_rows": self._failed_rows,
+                "retries": self._retries,
+            }
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or self._closed)
+                if not self._queue:
+                    return
+                # Group-commit window: let more rows join unless the batch is already full.
+                deadline = time.monotonic() + self._flush_interval
+                while len(self._queue) < self._max_batch and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._queue[: self._max_batch]
+                del self._queue[: self._max_batch]
+
+            ok = self._write(batch)
+
+            with self._cond:
+                del self._uncommitted[: len(batch)]
+                if ok:
+                    self._batches += 1
+                    self._rows += len(batch)
+                    self._largest_batch = max(self._largest_batch, len(batch))
+                else:
+                    self._failed_rows += len(batch)
+                    self._lost_unreported += len(batch)
+                self._cond.notify_all()
+
+    def _write(self, batch: list[_PendingEntry]) -> bool:
+        for attempt in range(1, _WRITE_ATTEMPTS + 1):
+            try:
+                with self._db.connect() as conn:
+                    conn.executemany(_INSERT_V2, [e.params for e in batch])
+                    self._on_write(conn, batch)
+                return True
+            except Exception:
+                if attempt == _WRITE_ATTEMPTS:
+                    logger.exception("history_write_behind_failed", extra={"rows": len(batch), "attempts": attempt})
+                    return False
+                delay = _RETRY_BASE_DELAY * 2 ** (attempt - 1)
+                logger.warning(
+                    "history_write_behind_retry",
+                    exc_info=True,
+                    extra={"rows": len(batch), "attempt": attempt, "delay_s": delay},
+                )
+                with self._cond:
+                    self._retries += 1
+                time.sleep(delay)
+        return False
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+from ..core.errors import InvalidInputError
+
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class Cursor:
+    """
+    Position of the last row of a page in (created_at DESC, source DESC,
+    rowid DESC) order. `source` tells apart tables merged into one listing
+    (history_v2 vs legacy history); single-table listings use 0.
+    """
+
+    created_at: str
+    rowid: int
+    source: int = 0
+
+
+@dataclass(frozen=True)
+class Page(Generic[T]):
+    items: list[T]
+    next_cursor: str | None
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    raw = json.dumps([cursor.created_at, cursor.source, cursor.rowid], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> Cursor:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        created_at, source, rowid = json.loads(raw)
+        if not isinstance(created_at, str) or not isinstance(source, int) or not isinstance(rowid, int):
+            raise ValueError("bad cursor fields")
+    except Exception as e:
+        raise InvalidInputError("Invalid pagination cursor") from e
+    return Cursor(created_at=created_at, rowid=rowid, source=source)
@@ -0,0 +1,679 @@
+from __future__ import annotations
+
+import json
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import partial
+from typing import Any, AsyncIterator, List, Optional
+
+from ..core.errors import DependencyMissingError, InvalidInputError
+from ..utils.json_stream import json_text
+from .appearance_profiles import AppearanceProfileRow
+from .history import (
+    HistoryListener,
+    HistoryPageRow,
+    HistoryRow,
+    OutfitResolver,
+    compact_payload,
+    expand_payload,
+    expand_payload_json,
+)
+from .pagination import Cursor, Page, decode_cursor, encode_cursor
+from .saved_outfits import SavedOutfitListener, SavedOutfitPageRow, SavedOutfitRow
+from .user import UserRow
+
+
+# Serializes schema creation when several API nodes start against one database.
+_SCHEMA_LOCK_KEY = 0x5354594C45  # "STYLE"
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _require_asyncpg() -> Any:
+    try:
+        import asyncpg  # type: ignore
+    except Exception as e:
+        raise DependencyMissingError("asyncpg", "pip install asyncpg to use a postgres:// DATABASE_URL") from e
+    return asyncpg
+
+
+def _cursor_time(cursor: Cursor) -> datetime:
+    try:
+        return datetime.fromisoformat(cursor.created_at)
+    except Exception as e:
+        raise InvalidInputError("Invalid pagination cursor") from e
+
+
+def _loads(raw: str | None) -> dict[str, Any]:
+    try:
+        value = json.loads(raw) if raw else {}
+    except Exception:
+        return {}
+    return value if isinstance(value, dict) else {}
+
+
+@dataclass
+class PoolStats:
+    min_size: int
+    max_size: int
+    size: int
+    idle: int
+    acquires: int
+    acquire_wait_ms_total: float
+    acquire_wait_ms_max: float
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "size": self.size,
+            "idle": self.idle,
+            "in_use": self.size - self.idle,
+            "acquires": self.acquires,
+            "acquire_wait_ms_avg": round(self.acquire_wait_ms_total / self.acquires, 3) if self.acquires else 0.0,
+            "acquire_wait_ms_max": round(self.acquire_wait_ms_max, 3),
+        }
+
+
+class PostgresPool:
+    """
+    A bounded asyncpg pool shared by the Postgres repositories.
+
+    At most `max_size` connections are open; callers beyond that wait in
+    `acquire()`, so a traffic burst queues here instead of exhausting the
+    server's connection slots. Every query goes through asyncpg's per-
+    connection prepared statement cache (`statement_cache_size` entries),
+    so the fixed SQL in the repositories is parsed and planned once per
+    connection, not per call.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        min_size: int = 2,
+        max_size: int = 10,
+        statement_cache_size: int = 256,
+        command_timeout_s: float = 30.0,
+    ):
+        self._dsn = dsn
+        self._min_size = max(0, int(min_size))
+        self._max_size = max(1, int(max_size), self._min_size)
+        self._statement_cache_size = max(0, int(statement_cache_size))
+        self._command_timeout_s = command_timeout_s
+        self._pool: Any = None
+        self._acquires = 0
+        self._wait_ms_total = 0.0
+        self._wait_ms_max = 0.0
+
+    async def open(self) -> None:
+        if self._pool is not None:
+            return
+        asyncpg = _require_asyncpg()
+        self._pool = await asyncpg.create_pool(
+            dsn=self._dsn,
+            min_size=self._min_size,
+            max_size=self._max_size,
+            statement_cache_size=self._statement_cache_size,
+            command_timeout=self._command_timeout_s,
+        )
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Any]:
+        if self._pool is None:
+            raise RuntimeError("Postgres pool is not open")
+        start = time.perf_counter()
+        async with self._pool.acquire() as conn:
+            wait_ms = (time.perf_counter() - start) * 1000
+            self._acquires += 1
+            self._wait_ms_total += wait_ms
+            self._wait_ms_max = max(self._wait_ms_max, wait_ms)
+            yield conn
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[Any]:
+        async with self.acquire() as conn:
+            async with conn.transaction():
+                yield conn
+
+    async def ensure_schema(self, statements: list[str]) -> None:
+        """Run idempotent DDL under a transaction-scoped advisory lock."""
+        async with self.transaction() as conn:
+            await conn.execute("SELECT pg_advisory_xact_lock($1)", _SCHEMA_LOCK_KEY)
+            for statement in statements:
+                await conn.execute(statement)
+
+    def stats(self) -> PoolStats:
+        pool = self._pool
+        return PoolStats(
+            min_size=self._min_size,
+            max_size=self._max_size,
+            size=pool.get_size() if pool is not None else 0,
+            idle=pool.get_idle_size() if pool is not None else 0,
+            acquires=self._acquires,
+            acquire_wait_ms_total=self._wait_ms_total,
+            acquire_wait_ms_max=self._wait_ms_max,
+        )
+
+
+async def _cursor_batches(pool: PostgresPool, sql: str, args: tuple[Any, ...], batch_rows: int) -> AsyncIterator[list[Any]]:
+    """Rows of `sql` in lists of `batch_rows`, fetched from a server-side cursor in one read-only transaction."""
+    async with pool.acquire() as conn:
+        async with conn.transaction(readonly=True):
+            cursor = await conn.cursor(sql, *args)
+            while True:
+                records = await cursor.fetch(batch_rows)
+                if not records:
+                    return
+                yield records
+
+
+class PostgresUserRepository:
+    def __init__(self, pool: PostgresPool):
+        self._pool = pool
+
+    async def init(self) -> None:
+        await self._pool.ensure_schema(
+            [
+                """
+                CREATE TABLE IF NOT EXISTS users (
+                    id TEXT PRIMARY KEY,
+                    email TEXT NOT NULL UNIQUE,
+                    password_hash TEXT NOT NULL,
+                    display_name TEXT,
+                    gender TEXT,
+                    created_at TIMESTAMPTZ NOT NULL
+                )
+                """
+            ]
+        )
+
+    async def create_user(
+        self,
+        *,
+        user_id: str,
+        email: str,
+        password_hash: str,
+        display_name: str | None = None,
+        gender: str | None = None,
+    ) -> UserRow:
+        created = _utc_now()
+        async with self._pool.acquire() as conn:
+            await conn.execute(
+                "INSERT INTO users(id, email, password_hash, display_name, gender, created_at) VALUES ($1, $2, $3, $4, $5, $6)",
+                user_id,
+                email,
+                password_hash,
+                display_name,
+                gender,
+                created,
+            )
+        return UserRow(
+            id=user_id,
+            email=email,
+            password_hash=password_hash,
+            display_name=display_name,
+            gender=gender,
+            created_at=created,
+        )
+
+    async def get_by_email(self, email: str) -> Optional[UserRow]:
+        return await self._select_one("email", email)
+
+    async def get_by_id(self, user_id: str) -> Optional[UserRow]:
+        return await self._select_one("id", user_id)
+
+    async def update_password_hash(self, user_id: str, old_hash: str, new_hash: str) -> bool:
+        async with self._pool.acquire() as conn:
+            status = await conn.execute(
+                "UPDATE users SET password_hash=$1 WHERE id=$2 AND password_hash=$3",
+                new_hash,
+                user_id,
+                old_hash,
+            )
+        return status.endswith(" 1")
+
+    async def _select_one(self, column: str, value: str) -> Optional[UserRow]:
+        async with self._pool.acquire() as conn:
+            row = await conn.fetchrow(
+                f"SELECT id, email, password_hash, display_name, gender, created_at FROM users WHERE {column}=$1",
+                value,
+            )
+        if row is None:
+            return None
+        return UserRow(
+            id=str(row["id"]),
+            email=str(row["email"]),
+            password_hash=str(row["password_hash"]),
+            display_name=row["display_name"],
+            gender=row["gender"],
+            created_at=row["created_at"],
+        )
+
+
+class PostgresHistoryRepository:
+    """
+    Outfit history in Postgres, stored in the same compact form as SQLite's
+    `history_v2` (outfit id, catalog version, score, JSONB of the non-outfit
+    fields) and expanded from `outfits` on read.
+
+    Rows are inserted directly: Postgres takes concurrent writers, so there
+    is no write-behind queue, and every node reads every node's writes.
+    Preference aggregates and compaction are SQLite-only for now; user
+    profiles are rebuilt from recent rows instead.
+    """
+
+    def __init__(self, pool: PostgresPool, outfits: OutfitResolver | None = None):
+        self._pool = pool
+        self._outfits = outfits
+        self._listeners: list[HistoryListener] = []
+
+    def add_listener(self, listener: HistoryListener) -> None:
+        self._listeners.append(listener)
+
+    def write_stats(self) -> dict[str, Any]:
+        return {"write_behind": False}
+
+    async def init(self) -> None:
+        await self._pool.ensure_schema(
+            [
+                """
+                CREATE TABLE IF NOT EXISTS history (
+                    id BIGSERIAL PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    outfit_id TEXT NOT NULL,
+                    created_at TIMESTAMPTZ NOT NULL,
+                    catalog_version TEXT,
+                    score DOUBLE PRECISION,
+                    extra JSONB
+                )
+                """,
+                "CREATE INDEX IF NOT EXISTS idx_history_user ON history(user_id, created_at DESC, id DESC)",
+            ]
+        )
+
+    async def add_entry(self, user_id: str, outfit_id: str, payload: dict[str, Any]) -> None:
+        created = _utc_now()
+        catalog_version, score, extra_json = compact_payload(self._outfits, outfit_id, payload)
+        async with self._pool.acquire() as conn:
+            await conn.execute(
+                "INSERT INTO history(user_id, outfit_id, created_at, catalog_version, score, extra) "
+                "VALUES ($1, $2, $3, $4, $5, $6::jsonb)",
+                user_id,
+                outfit_id,
+                created,
+                catalog_version,
+                score,
+                extra_json,
+            )
+        for listener in self._listeners:
+            listener(user_id, payload)
+
+    async def list_recent(self, user_id: str, limit: int = 50) -> list[HistoryRow]:
+        limit = max(1, min(500, limit))
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(
+                "SELECT outfit_id, created_at, catalog_version, score, extra::text AS extra_json FROM history "
+                "WHERE user_id=$1 ORDER BY created_at DESC, id DESC LIMIT $2",
+                user_id,
+                limit,
+            )
+        return [
+            HistoryRow(
+                user_id=user_id,
+                outfit_id=r["outfit_id"],
+                created_at=r["created_at"],
+                payload=self._expand(r),
+            )
+            for r in rows
+        ]
+
+    async def list_page(self, user_id: str, limit: int = 50, cursor: str | None = None) -> Page[HistoryPageRow]:
+        """Newest-first page after `cursor`, keyset-paginated on (created_at, id)."""
+        limit = max(1, min(500, limit))
+        after = decode_cursor(cursor) if cursor else None
+        async with self._pool.acquire() as conn:
+            if after is None:
+                found = await conn.fetch(
+                    "SELECT id, outfit_id, created_at, catalog_version, score, extra::text AS extra_json FROM history "
+                    "WHERE user_id=$1 ORDER BY created_at DESC, id DESC LIMIT $2",
+                    user_id,
+                    limit + 1,
+                )
+            else:
+                found = await conn.fetch(
+                    "SELECT id, outfit_id, created_at, catalog_version, score, extra::text AS extra_json FROM history "
+                    "WHERE user_id=$1 AND (created_at, id) < ($2, $3) ORDER BY created_at DESC, id DESC LIMIT $4",
+                    user_id,
+                    _cursor_time(after),
+                    after.rowid,
+                    limit + 1,
+                )
+
+        items = [
+            HistoryPageRow(
+                user_id=user_id,
+                outfit_id=r["outfit_id"],
+                created_at=r["created_at"],
+                loader=partial(self._expand, r),
+                json_loader=partial(self._expand_json, r),
+            )
+            for r in found[:limit]
+        ]
+        next_cursor = None
+        if len(found) > limit:
+            last = found[limit - 1]
+            next_cursor = encode_cursor(Cursor(created_at=last["created_at"].isoformat(), rowid=int(last["id"])))
+        return Page(items=items, next_cursor=next_cursor)
+
+    async def export_batches(
+        self, user_id: str | None = None, batch_rows: int = 1000
+    ) -> AsyncIterator[list[HistoryPageRow]]:
+        """Every row (of one user, or of everyone), oldest first, read through a server-side cursor."""
+        batch_rows = max(1, int(batch_rows))
+        sql = "SELECT id, user_id, outfit_id, created_at, catalog_version, score, extra::text AS extra_json FROM history"
+        args: tuple[Any, ...] = ()
+        if user_id is not None:
+            sql += " WHERE user_id=$1"
+            args = (user_id,)
+        sql += " ORDER BY created_at, id"
+        async for records in _cursor_batches(self._pool, sql, args, batch_rows):
+            yield [
+                HistoryPageRow(
+                    user_id=r["user_id"],
+                    outfit_id=r["outfit_id"],
+                    created_at=r["created_at"],
+                    loader=partial(self._expand, r),
+                    json_loader=partial(self._expand_json, r),
+                )
+                for r in records
+            ]
+
+    async def import_rows(self, rows: list[HistoryRow]) -> int:
+        """
+        Insert `rows` (keeping their created_at) in one statement, skipping
+        any whose (user_id, outfit_id, created_at) is already stored, so a
+        re-run import does not duplicate rows. Returns rows inserted.
+        """
+        if not rows:
+            return 0
+        params = [(r.user_id, r.outfit_id, r.created_at, *compact_payload(self._outfits, r.outfit_id, r.payload)) for r in rows]
+        async with self._pool.transaction() as conn:
+            written = await conn.fetch(
+                """
+                INSERT INTO history(user_id, outfit_id, created_at, catalog_version, score, extra)
+                SELECT DISTINCT ON (r.user_id, r.outfit_id, r.created_at)
+                       r.user_id, r.outfit_id, r.created_at, r.catalog_version, r.score, r.extra::jsonb
+                FROM unnest($1::text[], $2::text[], $3::timestamptz[], $4::text[], $5::float8[], $6::text[])
+                     AS r(user_id, outfit_id, created_at, catalog_version, score, extra)
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM history h
+                    WHERE h.user_id = r.user_id AND h.created_at = r.created_at AND h.outfit_id = r.outfit_id
+                )
+                RETURNING id
+                """,
+                *[list(column) for column in zip(*params)],
+            )
+        return len(written)
+
+    def _expand(self, r: Any) -> dict[str, Any]:
+        return expand_payload(self._outfits, r["outfit_id"], r["catalog_version"], r["score"], r["extra_json"])
+
+    def _expand_json(self, r: Any) -> bytes:
+        return expand_payload_json(self._outfits, r["outfit_id"], r["catalog_version"], r["score"], r["extra_json"])
+
+    async def flush(self) -> None:
+        return None
+
+    async def close(self) -> None:
+        return None
+
+
+class PostgresSavedOutfitRepository:
+    """Saved outfits in Postgres: JSONB payloads, at most one row per (user_id, outfit_id)."""
+
+    def __init__(self, pool: PostgresPool):
+        self._pool = pool
+        self._listeners: list[SavedOutfitListener] = []
+
+    def add_listener(self, listener: SavedOutfitListener) -> None:
+        self._listeners.append(listener)
+
+    async def init(self) -> None:
+        await self._pool.ensure_schema(
+            [
+                """
+                CREATE TABLE IF NOT EXISTS saved_outfits (
+                    id BIGSERIAL PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    outfit_id TEXT NOT NULL,
+                    created_at TIMESTAMPTZ NOT NULL,
+                    payload JSONB NOT NULL,
+                    UNIQUE (user_id, outfit_id)
+                )
+                """,
+                "CREATE INDEX IF NOT EXISTS idx_saved_outfits_user ON saved_outfits(user_id, created_at DESC, id DESC)",
+            ]
+        )
+
+    async def add_saved_outfit(self, user_id: str, outfit_id: str, payload: dict[str, Any]) -> None:
+        await self.save_many(user_id, [(outfit_id, payload)])
+
+    async def save_many(self, user_id: str, outfits: list[tuple[str, dict[str, Any]]]) -> int:
+        """Upsert (outfit_id, payload) pairs in one statement; a repeated id keeps its last payload. Returns rows written."""
+        latest = dict(outfits)
+        if not latest:
+            return 0
+        ids = list(latest)
+        payloads = [json_text(latest[oid]) for oid in ids]
+        async with self._pool.acquire() as conn:
+            # xmax is 0 only on freshly inserted tuples, which tells new saves from replaced ones.
+            written = await conn.fetch(
+                """
+                INSERT INTO saved_outfits(user_id, outfit_id, created_at, payload)
+                SELECT $1, o.outfit_id, $2, o.payload::jsonb FROM unnest($3::text[], $4::text[]) AS o(outfit_id, payload)
+                ON CONFLICT (user_id, outfit_id) DO UPDATE SET created_at=excluded.created_at, payload=excluded.payload
+                RETURNING outfit_id, (xmax = 0) AS inserted
+                """,
+                user_id,
+                _utc_now(),
+                ids,
+                payloads,
+            )
+        replaced = {r["outfit_id"] for r in written if not r["inserted"]}
+        for oid, payload in latest.items():
+            for listener in self._listeners:
+                listener(user_id, oid, payload, oid in replaced)
+        return len(latest)
+
+    async def import_rows(self, rows: list[SavedOutfitRow]) -> int:
+        """
+        Upsert `rows` (`id` ignored, `created_at` kept) in one transaction;
+        where the (user, outfit) already exists the newer copy wins. Returns rows written.
+        """
+        latest: dict[tuple[str, str], SavedOutfitRow] = {}
+        for row in rows:
+            key = (row.user_id, row.outfit_id)
+            if key not in latest or row.created_at >= latest[key].created_at:
+                latest[key] = row
+        if not latest:
+            return 0
+        async with self._pool.transaction() as conn:
+            written = await conn.fetch(
+                """
+                INSERT INTO saved_outfits(user_id, outfit_id, created_at, payload)
+                SELECT o.user_id, o.outfit_id, o.created_at, o.payload::jsonb
+                FROM unnest($1::text[], $2::text[], $3::timestamptz[], $4::text[]) AS o(user_id, outfit_id, created_at, payload)
+                ON CONFLICT (user_id, outfit_id) DO UPDATE SET created_at=excluded.created_at, payload=excluded.payload
+                WHERE excluded.created_at > saved_outfits.created_at
+                RETURNING id
+                """,
+                [r.user_id for r in latest.values()],
+                [r.outfit_id for r in latest.values()],
+                [r.created_at for r in latest.values()],
+                [json_text(r.payload) for r in latest.values()],
+            )
+        return len(written)
+
+    async def export_batches(
+        self, user_id: str | None = None, batch_rows: int = 1000
+    ) -> AsyncIterator[list[SavedOutfitPageRow]]:
+        """Every saved outfit (of one user, or of everyone) in id order, read through a server-side cursor."""
+        batch_rows = max(1, int(batch_rows))
+        sql = "SELECT id, user_id, outfit_id, created_at, payload::text AS payload_json FROM saved_outfits"
+        args: tuple[Any, ...] = ()
+        if user_id is not None:
+            sql += " WHERE user_id=$1"
+            args = (user_id,)
+        sql += " ORDER BY id"
+        async for records in _cursor_batches(self._pool, sql, args, batch_rows):
+            yield [
+                SavedOutfitPageRow(
+                    id=int(r["id"]),
+                    user_id=r["user_id"],
+                    outfit_id=r["outfit_id"],
+                    created_at=r["created_at"],
+                    payload_json=r["payload_json"].encode("utf-8"),
+                )
+                for r in records
+            ]
+
+    async def exists(self, user_id: str, outfit_ids: list[str]) -> set[str]:
+        ids = list(dict.fromkeys(outfit_ids))
+        if not ids:
+            return set()
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(
+                "SELECT outfit_id FROM saved_outfits WHERE user_id=$1 AND outfit_id = ANY($2::text[])",
+                user_id,
+                ids,
+            )
+        return {str(r["outfit_id"]) for r in rows}
+
+    async def list_for_user(self, user_id: str, limit: int = 50) -> List[SavedOutfitRow]:
+        limit = max(1, min(200, limit))
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(
+                "SELECT id, outfit_id, created_at, payload::text AS payload_json FROM saved_outfits "
+                "WHERE user_id=$1 ORDER BY created_at DESC, id DESC LIMIT $2",
+                user_id,
+                limit,
+            )
+        return [
+            SavedOutfitRow(
+                id=int(r["id"]),
+                user_id=user_id,
+                outfit_id=str(r["outfit_id"]),
+                created_at=r["created_at"],
+                payload=_loads(r["payload_json"]),
+            )
+            for r in rows
+        ]
+
+    async def list_page(self, user_id: str, limit: int = 50, cursor: str | None = None) -> Page[SavedOutfitPageRow]:
+        """Newest-first page after `cursor`, keyset-paginated on (created_at, id)."""
+        limit = max(1, min(200, limit))
+        after = decode_cursor(cursor) if cursor else None
+        async with self._pool.acquire() as conn:
+            if after is None:
+                found = await conn.fetch(
+                    "SELECT id, outfit_id, created_at, payload::text AS payload_json FROM saved_outfits "
+                    "WHERE user_id=$1 ORDER BY created_at DESC, id DESC LIMIT $2",
+                    user_id,
+                    limit + 1,
+                )
+            else:
+                found = await conn.fetch(
+                    "SELECT id, outfit_id, created_at, payload::text AS payload_json FROM saved_outfits "
+                    "WHERE user_id=$1 AND (created_at, id) < ($2, $3) ORDER BY created_at DESC, id DESC LIMIT $4",
+                    user_id,
+                    _cursor_time(after),
+                    after.rowid,
+                    limit + 1,
+                )
+
+        items = [
+            SavedOutfitPageRow(
+                id=int(r["id"]),
+                user_id=user_id,
+                outfit_id=str(r["outfit_id"]),
+                created_at=r["created_at"],
+                payload_json=r["payload_json"].encode("utf-8"),
+            )
+            for r in found[:limit]
+        ]
+        next_cursor = None
+        if len(found) > limit:
+            last = found[limit - 1]
+            next_cursor = encode_cursor(Cursor(created_at=last["created_at"].isoformat(), rowid=int(last["id"])))
+        return Page(items=items, next_cursor=next_cursor)
+
+    async def delete_for_user(self, user_id: str, outfit_id: str) -> None:
+        await self.delete_many(user_id, [outfit_id])
+
+    async def delete_many(self, user_id: str, outfit_ids: list[str]) -> int:
+        ids = list(dict.fromkeys(outfit_ids))
+        if not ids:
+            return 0
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(
+                "DELETE FROM saved_outfits WHERE user_id=$1 AND outfit_id = ANY($2::text[]) RETURNING outfit_id",
+                user_id,
+                ids,
+            )
+        for r in rows:
+            for listener in self._listeners:
+                listener(user_id, str(r["outfit_id"]), None, False)
+        return len(rows)
+
+
+class PostgresAppearanceProfileRepository:
+    """A user's most recent image analysis, one JSONB row per user."""
+
+    def __init__(self, pool: PostgresPool):
+        self._pool = pool
+
+    async def init(self) -> None:
+        await self._pool.ensure_schema(
+            [
+                """
+                CREATE TABLE IF NOT EXISTS appearance_profiles (
+                    user_id TEXT PRIMARY KEY,
+                    updated_at TIMESTAMPTZ NOT NULL,
+                    payload JSONB NOT NULL
+                )
+                """
+            ]
+        )
+
+    async def upsert(self, user_id: str, payload: dict[str, Any]) -> None:
+        async with self._pool.acquire() as conn:
+            await conn.execute(
+                """
+                INSERT INTO appearance_profiles(user_id, updated_at, payload) VALUES ($1, $2, $3::jsonb)
+                ON CONFLICT (user_id) DO UPDATE SET updated_at=excluded.updated_at, payload=excluded.payload
+                """,
+                user_id,
+                _utc_now(),
+                json_text(payload),
+            )
+
+    async def get(self, user_id: str) -> Optional[AppearanceProfileRow]:
+        async with self._pool.acquire() as conn:
+            row = await conn.fetchrow(
+                "SELECT user_id, updated_at, payload::text AS payload_json FROM appearance_profiles WHERE user_id=$1",
+                user_id,
+            )
+        if row is None:
+            return None
+        return AppearanceProfileRow(
+            user_id=str(row["user_id"]), updated_at=row["updated_at"], payload=_loads(row["payload_json"])
+        )
@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import math
+import sqlite3
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterable, Literal, Mapping
+
+
+from .db import ConnectionStats, SqliteConnectionManager, connection_manager
+
+
+PreferenceSource = Literal["history", "saved"]
+
+# Maps (source, payload) to weighted feature counts per kind, e.g.
+# {"color": {"navy": 2.0}, "vibe": {...}, "occasion": {...}, "liked": {"o1": 1.0}}.
+FeatureExtractor = Callable[[PreferenceSource, "dict[str, Any]"], "dict[str, dict[str, float]]"]
+
+# Scores are stored relative to a per-user landmark time; once the newest
+# event's boost exp(rate * (t - landmark)) exceeds e^this, the user's scores
+# are rescaled to a new landmark so they stay well inside float range.
+_RESCALE_EXPONENT = 40.0
+# Rows whose score drops to this (relative to the landmark) are deleted:
+# removed saves, and features decayed to nothing by a rescale.
+_PRUNE_BELOW = 1e-6
+
+_UPSERT = (
+    "INSERT INTO user_pref_features(user_id, kind, value, score) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(user_id, kind, value) DO UPDATE SET score = score + excluded.score"
+)
+
+
+@dataclass(frozen=True)
+class PreferenceEvent:
+    """
+    One history entry or saved outfit being added (sign=1) or removed
+    (sign=-1). A rolled-up event (compacted history) carries its summed
+    `features` and the number of rows it stands for in `count`.
+    """
+
+    user_id: str
+    source: PreferenceSource
+    payload: dict[str, Any]
+    at: float  # unix seconds of the row's created_at
+    sign: int = 1
+    features: dict[str, dict[str, float]] | None = None
+    count: int = 1
+
+
+@dataclass(frozen=True)
+class PreferenceSnapshot:
+    """A user's top aggregate rows per kind, scores relative to `landmark`."""
+
+    user_id: str
+    interactions: int = 0
+    landmark: float | None = None
+    scores: dict[str, dict[str, float]] = field(default_factory=dict)
+
+    def ranked(self, kind: str, limit: int | None = None) -> list[str]:
+        values = self.scores.get(kind, {})
+        ordered = sorted(values, key=lambda v: (-values[v], v))
+        return ordered if limit is None else ordered[:limit]
+
+
+class PreferenceRepository:
+    """
+    Per-user preference counters (colours, vibes, occasions, liked outfit
+    ids), kept in `user_pref_features` and updated inside the same
+    transaction as the history / saved-outfit write that changes them.
+
+    With `half_life_days` > 0 counts use forward exponential decay: an event
+    at time t adds weight * exp(rate * (t - landmark)), so older events weigh
+    less without ever rewriting old rows, and an event can still be removed
+    exactly. Reading a profile is one indexed top-N read per kind,
+    independent of how much history the user has.
+    """
+
+    def __init__(
+        self,
+        database_path: str,
+        features: FeatureExtractor,
+        db: SqliteConnectionManager | None = None,
+        half_life_days: float = 0.0,
+    ):
+        self._db_path = database_path
+        self._db = db or connection_manager(database_path)
+        self._features = features
+        self._half_life_days = max(0.0, float(half_life_days))
+        self.decay_rate = math.log(2) / (self._half_life_days * 86400.0) if self._half_life_days else 0.0
+
+    def connection_stats(self) -> ConnectionStats:
+        return self._db.stats()
+
+    def features(self, source: PreferenceSource, payload: dict[str, Any]) -> dict[str, dict[str, float]]:
+        return self._features(source, payload)
+
+    async def init(self) -> None:
+        Path(self._db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        def _init() -> None:
+            with self._db.connect() as conn:
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS user_pref_features (
+                        user_id TEXT NOT NULL,
+                        kind TEXT NOT NULL,
+                        value TEXT NOT NULL,
+                        score REAL NOT NULL,
+                        PRIMARY KEY (user_id, kind, value)
+                    ) WITHOUT ROWID
+                    """
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_user_pref_rank ON user_pref_features(user_id, kind, score DESC, value)"
+                )
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS user_pref_totals (
+                        user_id TEXT PRIMARY KEY,
+                        interactions INTEGER NOT NULL,
+                        landmark REAL NOT NULL
+                    )
+                    """
+                )
+                conn.execute("CREATE TABLE IF NOT EXISTS user_pref_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+                conn.commit()
+
+        await self._db.run("write", "preferences.init", _init)
+
+    async def backfill(self, *sources: Callable[[sqlite3.Connection], Iterable[PreferenceEvent]]) -> bool:
+        """
+        Rebuild every user's aggregates from `sources` when they were never
+        built, or were built with a different half-life. Runs in a single
+        write transaction, so no history or saved-outfit write can slip in
+        between reading the rows and storing the counters. Returns whether a
+        rebuild happened.
+        """
+        setting = repr(self._half_life_days)
+
+        def _backfill() -> bool:
+            with self._db.connect() as conn:
+                row = conn.execute("SELECT value FROM user_pref_meta WHERE key='half_life_days'").fetchone()
+                if row is not None and row[0] == setting:
+                    return False
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute("DELETE FROM user_pref_features")
+                conn.execute("DELETE FROM user_pref_totals")
+                for source in sources:
+                    batch: list[PreferenceEvent] = []
+                    for event in source(conn):
+                        batch.append(event)
+                        if len(batch) >= 1000:
+                            self.record(conn, batch)
+                            batch = []
+                    self.record(conn, batch)
+                conn.execute(
+                    "INSERT INTO user_pref_meta(key, value) VALUES ('half_life_days', ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value=excluded.value",
+                    (setting,),
+                )
+                return True
+
+        return await self._db.run("write", "preferences.backfill", _backfill)
+
+    def record(self, conn: sqlite3.Connection, events: Iterable[PreferenceEvent]) -> None:
+        """Apply `events` on `conn` as part of the caller's transaction (does not commit)."""
+        by_user: dict[str, list[PreferenceEvent]] = {}
+        for event in events:
+            by_user.setdefault(event.user_id, []).append(event)
+
+        for user_id, user_events in by_user.items():
+            row = conn.execute(
+                "SELECT interactions, landmark FROM user_pref_totals WHERE user_id=?", (user_id,)
+            ).fetchone()
+            interactions, landmark = (int(row[0]), float(row[1])) if row else (0, min(e.at for e in user_events))
+
+            newest = max(e.at for e in user_events)
+            if self.decay_rate and self.decay_rate * (newest - landmark) > _RESCALE_EXPONENT:
+                conn.execute(
+                    "UPDATE user_pref_features SET score = score * ? WHERE user_id=?",
+                    (math.exp(-self.decay_rate * (newest - landmark)), user_id),
+                )
+                landmark = newest
+
+            deltas: dict[tuple[str, str], float] = {}
+            for event in user_events:
+                boost = event.sign * self._boost(event.at, landmark)
+                for kind, values in self._event_features(event).items():
+                    for value, weight in values.items():
+                        deltas[(kind, value)] = deltas.get((kind, value), 0.0) + weight * boost
+                interactions += event.sign * event.count
+
+            conn.executemany(_UPSERT, [(user_id, kind, value, score) for (kind, value), score in deltas.items()])
+            conn.execute("DELETE FROM user_pref_features WHERE user_id=? AND score <= ?", (user_id, _PRUNE_BELOW))
+            conn.execute(
+                "INSERT INTO user_pref_totals(user_id, interactions, landmark) VALUES (?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET interactions=excluded.interactions, landmark=excluded.landmark",
+                (user_id, max(0, interactions), landmark),
+            )
+
+    async def top(self, user_id: str, limits: Mapping[str, int]) -> PreferenceSnapshot:
+        """The highest-scoring `limits[kind]` rows of each kind, in one query."""
+        kinds = list(limits)
+        sql = " UNION ALL ".join(
+            "SELECT * FROM (SELECT kind, value, score FROM user_pref_features "
+            "WHERE user_id=? AND kind=? ORDER BY score DESC, value LIMIT ?)"
+            for _kind in kinds
+        )
+        params: list[Any] = []
+        for kind in kinds:
+            params.extend((user_id, kind, max(1, int(limits[kind]))))
+
+        def _select() -> PreferenceSnapshot:
+            with self._db.connect() as conn:
+                totals = conn.execute(
+                    "SELECT interactions, landmark FROM user_pref_totals WHERE user_id=?", (user_id,)
+                ).fetchone()
+                if totals is None:
+                    return PreferenceSnapshot(user_id=user_id)
+                scores: dict[str, dict[str, float]] = {kind: {} for kind in kinds}
+                for kind, value, score in conn.execute(sql, params):
+                    scores[kind][value] = float(score)
+            return PreferenceSnapshot(
+                user_id=user_id, interactions=int(totals[0]), landmark=float(totals[1]), scores=scores
+            )
+
+        return await self._db.run("read", "preferences.top", _select)
+
+    def advance(self, snapshot: PreferenceSnapshot, event: PreferenceEvent) -> PreferenceSnapshot:
+        """
+        `snapshot` with `event` applied in memory, using the same weighting as
+        `record`, so a cached snapshot can follow writes without a re-read.
+        """
+        landmark = snapshot.landmark if snapshot.landmark is not None else event.at
+        scores = {kind: dict(values) for kind, values in snapshot.scores.items()}
+        if self.decay_rate and self.decay_rate * (event.at - landmark) > _RESCALE_EXPONENT:
+            factor = math.exp(-self.decay_rate * (event.at - landmark))
+            scores = {
+                kind: {v: s * factor for v, s in values.items() if s * factor > _PRUNE_BELOW}
+                for kind, values in scores.items()
+            }
+            landmark = event.at
+
+        boost = event.sign * self._boost(event.at, landmark)
+        for kind, values in self._event_features(event).items():
+            bucket = scores.setdefault(kind, {})
+            for value, weight in values.items():
+                score = bucket.get(value, 0.0) + weight * boost
+                if score > _PRUNE_BELOW:
+                    bucket[value] = score
+                else:
+                    bucket.pop(value, None)
+
+        return PreferenceSnapshot(
+            user_id=snapshot.user_id,
+            interactions=max(0, snapshot.interactions + event.sign * event.count),
+            landmark=landmark,
+            scores=scores,
+        )
+
+    def _event_features(self, event: PreferenceEvent) -> dict[str, dict[str, float]]:
+        return event.features if event.features is not None else self._features(event.source, event.payload)
+
+    def _boost(self, at: float, landmark: float) -> float:
+        return math.exp(self.decay_rate * (at - landmark)) if self.decay_rate else 1.0
@@ -2,12 +2,17 @@ from __future__ import annotations
 
 import json
 import sqlite3
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
+from functools import cached_property
 from pathlib import Path
-from typing import Any, List
+from typing import Any, AsyncIterator, Callable, Iterator, List
 
-import anyio
+
+from ..utils.json_stream import json_text
+from .db import ConnectionStats, SqliteConnectionManager, connection_manager
+from .pagination import Cursor, Page, decode_cursor, encode_cursor
+from .preferences import PreferenceEvent, PreferenceRepository
 
 
 def _utc_now() -> datetime:
@@ -23,15 +28,62 @@ class SavedOutfitRow:
     payload: dict[str, Any]
 
 
+@dataclass(frozen=True)
+class SavedOutfitPageRow:
+    """
+    A saved outfit from `list_page`. `payload_json` is the stored JSON as
+    UTF-8 bytes; `payload` parses it on first access.
+    """
+
+    id: int
+    user_id: str
+    outfit_id: str
+    created_at: datetime
+    payload_json: bytes = field(repr=False, compare=False)
+
+    @cached_property
+    def payload(self) -> dict[str, Any]:
+        return _loads(self.payload_json)
+
+
+# Called with (user_id, outfit_id, payload, replaced) after a save, and with payload=None after
+# a delete. `replaced` is True when the save overwrote an existing row (whose old payload is gone).
+SavedOutfitListener = Callable[[str, str, "dict[str, Any] | None", bool], None]
+
+# Ids per `IN (...)` query: SQLite builds before 3.32 allow only 999 bound variables per statement.
+_IN_CHUNK = 500
+
+
 class SavedOutfitRepository:
-    def __init__(self, database_path: str):
+    """
+    Saved / liked outfits, at most one row per (user_id, outfit_id): saving
+    an outfit again replaces its payload and moves it to the top. Bulk saves
+    and deletes run in one transaction.
+    """
+
+    def __init__(
+        self,
+        database_path: str,
+        db: SqliteConnectionManager | None = None,
+        preferences: PreferenceRepository | None = None,
+    ):
         self._db_path = database_path
+        self._db = db or connection_manager(database_path)
+        # Preference aggregates are updated in the same transaction as each save / delete.
+        self._preferences = preferences
+        self._listeners: list[SavedOutfitListener] = []
+
+    def add_listener(self, listener: SavedOutfitListener) -> None:
+        self._listeners.append(listener)
+
+    def connection_stats(self) -> ConnectionStats:
+        return self._db.stats()
 
     async def init(self) -> None:
         Path(self._db_path).parent.mkdir(parents=True, exist_ok=True)
 
         def _init() -> None:
-            with sqlite3.connect(self._db_path) as conn:
+            with self._db.connect() as conn:
                 conn.execute(
                     """
                     CREATE TABLE IF NOT EXISTS saved_outfits (
@@ -44,29 +96,167 @@ class SavedOutfitRepository:
                     """
                 )
                 conn.execute("CREATE INDEX IF NOT EXISTS idx_saved_outfits_user ON saved_outfits(user_id, created_at)")
+                has_unique = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type='index' AND name='uq_saved_outfits_user_outfit'"
+                ).fetchone()
+                if not has_unique:
+                    # Older databases allowed re-saving the same outfit; keep only the newest copy.
+                    duplicates = conn.execute(
+                        """
+                        SELECT s.id, s.user_id, s.created_at, s.payload_json FROM saved_outfits s
+                        WHERE EXISTS (
+                            SELECT 1 FROM saved_outfits n
+                            WHERE n.user_id = s.user_id AND n.outfit_id = s.outfit_id
+                              AND (n.created_at, n.id) > (s.created_at, s.id)
+                        )
+                        """
+                    ).fetchall()
+                    self._record_removed(conn, [(uid, created_at, payload_json) for _sid, uid, created_at, payload_json in duplicates])
+                    conn.executemany("DELETE FROM saved_outfits WHERE id=?", [(sid,) for sid, *_rest in duplicates])
+                    conn.execute(
+                        "CREATE UNIQUE INDEX uq_saved_outfits_user_outfit ON saved_outfits(user_id, outfit_id)"
+                    )
                 conn.commit()
 
-        await anyio.to_thread.run_sync(_init)
+        await self._db.run("write", "saved_outfits.init", _init)
 
     async def add_saved_outfit(self, user_id: str, outfit_id: str, payload: dict[str, Any]) -> None:
-        created_at = _utc_now().isoformat()
-        payload_json = json.dumps(payload, ensure_ascii=False)
+        await self.save_many(user_id, [(outfit_id, payload)])
 
-        def _insert() -> None:
-            with sqlite3.connect(self._db_path) as conn:
-                conn.execute(
-                    "INSERT INTO saved_outfits(user_id, outfit_id, created_at, payload_json) VALUES (?, ?, ?, ?)",
-                    (user_id, outfit_id, created_at, payload_json),
-                )
+    async def save_many(self, user_id: str, outfits: list[tuple[str, dict[str, Any]]]) -> int:
+        """Upsert (outfit_id, payload) pairs in one transaction; a repeated id keeps its last payload. Returns rows written."""
+        latest = dict(outfits)
+        if not latest:
+            return 0
+        created = _utc_now()
+        created_at = created.isoformat()
+        rows = [(user_id, oid, created_at, json_text(payload)) for oid, payload in latest.items()]
+
+        def _upsert() -> set[str]:
+            with self._db.connect() as conn:
+                replaced = self._select_existing(conn, user_id, list(latest))
+                self._record_removed(conn, [(user_id, old_at, old_json) for _oid, old_at, old_json in replaced])
+                conn.executemany(_UPSERT, rows)
+                if self._preferences is not None:
+                    self._preferences.record(
+                        conn, [PreferenceEvent(user_id, "saved", payload, created.timestamp()) for payload in latest.values()]
+                    )
                 conn.commit()
+                return {oid for oid, _created_at, _payload_json in replaced}
+
+        replaced = await self._db.run("write", "saved_outfits.save_many", _upsert)
+        for oid, payload in latest.items():
+            for listener in self._listeners:
+                listener(user_id, oid, payload, oid in replaced)
+        return len(latest)
+
+    async def import_rows(self, rows: list[SavedOutfitRow]) -> int:
+        """
+        Upsert `rows` (their `id` is ignored, `created_at` kept) in one
+        transaction. Where the (user, outfit) already exists the newer copy
+        wins. Listeners are not called; see StylistService.invalidate_user_context.
+        Returns rows written.
+        """
+        latest: dict[tuple[str, str], SavedOutfitRow] = {}
+        for row in rows:
+            key = (row.user_id, row.outfit_id)
+            if key not in latest or row.created_at >= latest[key].created_at:
+                latest[key] = row
+        by_user: dict[str, list[SavedOutfitRow]] = {}
+        for row in latest.values():
+            by_user.setdefault(row.user_id, []).append(row)
+
+        def _upsert() -> int:
+            written = 0
+            with self._db.connect() as conn:
+                for uid, user_rows in by_user.items():
+                    existing = {
+                        oid: (old_at, old_json)
+                        for oid, old_at, old_json in self._select_existing(conn, uid, [r.outfit_id for r in user_rows])
+                    }
+                    newer = [
+                        r for r in user_rows
+                        if r.outfit_id not in existing or r.created_at > _datetime(existing[r.outfit_id][0])
+                    ]
+                    self._record_removed(conn, [(uid, *existing[r.outfit_id]) for r in newer if r.outfit_id in existing])
+                    conn.executemany(
+                        _UPSERT,
+                        [(uid, r.outfit_id, r.created_at.isoformat(), json_text(r.payload)) for r in newer],
+                    )
+                    if self._preferences is not None:
+                        self._preferences.record(
+                            conn, [PreferenceEvent(uid, "saved", r.payload, r.created_at.timestamp()) for r in newer]
+                        )
+                    written += len(newer)
+            return written
+
+        if not latest:
+            return 0
+        return await self._db.run("write", "saved_outfits.import_rows", _upsert)
+
+    async def export_batches(
+        self, user_id: str | None = None, batch_rows: int = 1000
+    ) -> AsyncIterator[list[SavedOutfitPageRow]]:
+        """Every saved outfit (of one user, or of everyone) in id order, one keyset query per batch."""
+        batch_rows = max(1, int(batch_rows))
+        sql = "SELECT id, user_id, outfit_id, created_at, payload_json FROM saved_outfits WHERE id > ?"
+        if user_id is not None:
+            sql += " AND user_id=?"
+        sql += " ORDER BY id LIMIT ?"
+        user_params = (user_id,) if user_id is not None else ()
 
-        await anyio.to_thread.run_sync(_insert)
+        def _select(after: int) -> list[tuple[Any, ...]]:
+            with self._db.connect() as conn:
+                return conn.execute(sql, (after, *user_params, batch_rows)).fetchall()
+
+        after = 0
+        while True:
+            found = await self._db.run("read", "saved_outfits.export", _select, after)
+            if not found:
+                return
+            yield [
+                SavedOutfitPageRow(
+                    id=int(sid),
+                    user_id=str(uid),
+                    outfit_id=str(oid),
+                    created_at=_datetime(created_at),
+                    payload_json=payload_json.encode("utf-8"),
+                )
+                for sid, uid, oid, created_at, payload_json in found
+            ]
+            after = int(found[-1][0])
+
+    async def exists(self, user_id: str, outfit_ids: list[str]) -> set[str]:
+        """Which of `outfit_ids` the user has saved (unique-index lookups, no payloads read)."""
+        ids = list(dict.fromkeys(outfit_ids))
+        if not ids:
+            return set()
+
+        def _select() -> set[str]:
+            found: set[str] = set()
+            with self._db.connect() as conn:
+                for start in range(0, len(ids), _IN_CHUNK):
+                    chunk = ids[start : start + _IN_CHUNK]
+                    placeholders = ",".join("?" * len(chunk))
+                    cur = conn.execute(
+                        f"SELECT outfit_id FROM saved_outfits WHERE user_id=? AND outfit_id IN ({placeholders})",
+                        (user_id, *chunk),
+                    )
+                    found.update(str(oid) for (oid,) in cur)
+            return found
+
+        return await self._db.run("read", "saved_outfits.exists", _select)
+
+    def preference_events(self, conn: sqlite3.Connection) -> Iterator[PreferenceEvent]:
+        """Every saved outfit as a preference event, for `PreferenceRepository.backfill`."""
+        for uid, created_at, payload_json in conn.execute("SELECT user_id, created_at, payload_json FROM saved_outfits"):
+            yield PreferenceEvent(user_id=str(uid), source="saved", payload=_loads(payload_json), at=_timestamp(created_at))
 
     async def list_for_user(self, user_id: str, limit: int = 50) -> List[SavedOutfitRow]:
         limit = max(1, min(200, limit))
 
         def _select() -> List[SavedOutfitRow]:
-            with sqlite3.connect(self._db_path) as conn:
+            with self._db.connect() as conn:
                 cur = conn.execute(
                     "SELECT id, user_id, outfit_id, created_at, payload_json FROM saved_outfits WHERE user_id=? ORDER BY created_at DESC LIMIT ?",
                     (user_id, limit),
@@ -92,15 +282,122 @@ class SavedOutfitRepository:
                     )
                 return rows
 
-        return await anyio.to_thread.run_sync(_select)
+        return await self._db.run("read", "saved_outfits.list_for_user", _select)
+
+    async def list_page(self, user_id: str, limit: int = 50, cursor: str | None = None) -> Page[SavedOutfitPageRow]:
+        """Newest-first page after `cursor`, keyset-paginated on (created_at, id)."""
+        limit = max(1, min(200, limit))
+        after = decode_cursor(cursor) if cursor else None
+        sql = "SELECT id, outfit_id, created_at, payload_json FROM saved_outfits WHERE user_id=?"
+        params: list[Any] = [user_id]
+        if after is not None:
+            sql += " AND (created_at, id) < (?, ?)"
+            params += [after.created_at, after.rowid]
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        def _select() -> list[tuple[Any, ...]]:
+            with self._db.connect() as conn:
+                return conn.execute(sql, params).fetchall()
+
+        found = await self._db.run("read", "saved_outfits.list_page", _select)
+        items: list[SavedOutfitPageRow] = []
+        for sid, oid, created_at, payload_json in found[:limit]:
+            try:
+                created_dt = datetime.fromisoformat(created_at)
+            except Exception:
+                created_dt = _utc_now()
+            items.append(
+                SavedOutfitPageRow(
+                    id=int(sid),
+                    user_id=user_id,
+                    outfit_id=str(oid),
+                    created_at=created_dt,
+                    payload_json=payload_json.encode("utf-8"),
+                )
+            )
+
+        next_cursor = None
+        if len(found) > limit:
+            sid, _oid, created_at, _payload = found[limit - 1]
+            next_cursor = encode_cursor(Cursor(created_at=created_at, rowid=int(sid)))
+        return Page(items=items, next_cursor=next_cursor)
 
     async def delete_for_user(self, user_id: str, outfit_id: str) -> None:
-        def _delete() -> None:
-            with sqlite3.connect(self._db_path) as conn:
-                conn.execute(
+        await self.delete_many(user_id, [outfit_id])
+
+    async def delete_many(self, user_id: str, outfit_ids: list[str]) -> int:
+        """Delete the given saved outfits in one transaction. Returns rows deleted."""
+        ids = list(dict.fromkeys(outfit_ids))
+        if not ids:
+            return 0
+
+        def _delete() -> list[str]:
+            with self._db.connect() as conn:
+                removed = self._select_existing(conn, user_id, ids)
+                self._record_removed(conn, [(user_id, old_at, old_json) for _oid, old_at, old_json in removed])
+                conn.executemany(
                     "DELETE FROM saved_outfits WHERE user_id=? AND outfit_id=?",
-                    (user_id, outfit_id),
+                    [(user_id, oid) for oid, _created_at, _payload_json in removed],
                 )
                 conn.commit()
+                return [oid for oid, _created_at, _payload_json in removed]
+
+        deleted = await self._db.run("write", "saved_outfits.delete_many", _delete)
+        for oid in deleted:
+            for listener in self._listeners:
+                listener(user_id, oid, None, False)
+        return len(deleted)
+
+    def _select_existing(self, conn: sqlite3.Connection, user_id: str, outfit_ids: list[str]) -> list[tuple[str, str, str]]:
+        found: list[tuple[str, str, str]] = []
+        for start in range(0, len(outfit_ids), _IN_CHUNK):
+            chunk = outfit_ids[start : start + _IN_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            found.extend(
+                conn.execute(
+                    "SELECT outfit_id, created_at, payload_json FROM saved_outfits "
+                    f"WHERE user_id=? AND outfit_id IN ({placeholders})",
+                    (user_id, *chunk),
+                )
+            )
+        return found
+
+    def _record_removed(self, conn: sqlite3.Connection, rows: list[tuple[str, str, str]]) -> None:
+        """Take (user_id, created_at, payload_json) rows that are about to go away out of the preference aggregates."""
+        if self._preferences is not None and rows:
+            self._preferences.record(
+                conn,
+                [
+                    PreferenceEvent(uid, "saved", _loads(payload_json), _timestamp(created_at), sign=-1)
+                    for uid, created_at, payload_json in rows
+                ],
+            )
+
+
+_UPSERT = (
+    "INSERT INTO saved_outfits(user_id, outfit_id, created_at, payload_json) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(user_id, outfit_id) DO UPDATE SET created_at=excluded.created_at, payload_json=excluded.payload_json"
+)
+
+
+def _datetime(created_at: str) -> datetime:
+    try:
+        return datetime.fromisoformat(created_at)
+    except Exception:
+        return _utc_now()
+
+
+def _timestamp(created_at: str) -> float:
+    try:
+        return datetime.fromisoformat(created_at).timestamp()
+    except Exception:
+        return _utc_now().timestamp()
+
 
-        await anyio.to_thread.run_sync(_delete)
+def _loads(raw: str | bytes) -> dict[str, Any]:
+    try:
+        value = json.loads(raw)
+    except Exception:
+        return {}
+    return value if isinstance(value, dict) else {}
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from typing import Any, AsyncIterator, Generic, Mapping, Optional, Sequence, TypeVar
+
+import anyio
+
+from .appearance_profiles import AppearanceProfileRepository, AppearanceProfileRow
+from .history import HistoryListener, HistoryPageRow, HistoryRepository, HistoryRow
+from .pagination import Page
+from .preferences import PreferenceEvent, PreferenceRepository, PreferenceSnapshot
+from .saved_outfits import SavedOutfitListener, SavedOutfitPageRow, SavedOutfitRepository, SavedOutfitRow
+
+
+S = TypeVar("S")
+
+
+def shard_for(user_id: str, shards: int) -> int:
+    """
+    Stable shard index of `user_id` among `shards`: jump consistent hash of a
+    64-bit BLAKE2b key. Going from N to N+1 shards moves only ~1/(N+1) of
+    users, all of them to the new shard, and the result never depends on
+    the Python process (unlike `hash()`).
+    """
+    if shards <= 1:
+        return 0
+    key = int.from_bytes(hashlib.blake2b(user_id.encode("utf-8"), digest_size=8).digest(), "big")
+    b, j = -1, 0
+    while j < shards:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return b
+
+
+def shard_path(database_path: str, index: int) -> str:
+    """`data/app.db` -> `data/app.shard3.db`. The main file keeps the users table."""
+    path = Path(database_path)
+    return str(path.with_name(f"{path.stem}.shard{index}{path.suffix}"))
+
+
+class _Sharded(Generic[S]):
+    def __init__(self, shards: Sequence[S]):
+        if not shards:
+            raise ValueError("At least one shard is required")
+        self.shards = list(shards)
+
+    def for_user(self, user_id: str) -> S:
+        return self.shards[shard_for(user_id, len(self.shards))]
+
+    def _group(self, rows: Sequence[Any]) -> dict[int, list[Any]]:
+        groups: dict[int, list[Any]] = {}
+        for row in rows:
+            groups.setdefault(shard_for(row.user_id, len(self.shards)), []).append(row)
+        return groups
+
+    async def _import(self, rows: Sequence[Any]) -> int:
+        """Write each shard's part of `rows` concurrently; shards have independent write locks."""
+        written = 0
+
+        async def _one(index: int, part: list[Any]) -> None:
+            nonlocal written
+            written += await self.shards[index].import_rows(part)  # type: ignore[attr-defined]
+
+        async with anyio.create_task_group() as tg:
+            for index, part in self._group(rows).items():
+                tg.start_soon(_one, index, part)
+        return written
+
+
+class ShardedPreferenceRepository(_Sharded[PreferenceRepository]):
+    """Routes aggregate reads to the user's shard; in-memory updates are shard-independent."""
+
+    async def top(self, user_id: str, limits: Mapping[str, int]) -> PreferenceSnapshot:
+        return await self.for_user(user_id).top(user_id, limits)
+
+    def advance(self, snapshot: PreferenceSnapshot, event: PreferenceEvent) -> PreferenceSnapshot:
+        return self.for_user(snapshot.user_id).advance(snapshot, event)
+
+
+class ShardedHistoryRepository(_Sharded[HistoryRepository]):
+    """
+    History spread over per-shard HistoryRepository instances, each with
+    its own database file, write lane and write-behind writer, so users on
+    different shards never wait on each other's write lock.
+    """
+
+    async def init(self) -> None:
+        for shard in self.shards:
+            await shard.init()
+
+    def add_listener(self, listener: HistoryListener) -> None:
+        for shard in self.shards:
+            shard.add_listener(listener)
+
+    def write_stats(self) -> dict[str, Any]:
+        return {"shards": [shard.write_stats() for shard in self.shards]}
+
+    async def add_entry(self, user_id: str, outfit_id: str, payload: dict[str, Any]) -> None:
+        await self.for_user(user_id).add_entry(user_id, outfit_id, payload)
+
+    async def list_recent(self, user_id: str, limit: int = 50) -> list[HistoryRow]:
+        return await self.for_user(user_id).list_recent(user_id, limit)
+
+    async def list_page(self, user_id: str, limit: int = 50, cursor: str | None = None) -> Page[HistoryPageRow]:
+        return await self.for_user(user_id).list_page(user_id, limit, cursor)
+
+    async def export_batches(
+        self, user_id: str | None = None, batch_rows: int = 1000
+    ) -> AsyncIterator[list[HistoryPageRow]]:
+        """One user's rows from their shard; everyone's rows shard by shard (oldest first within a shard)."""
+        shards = [self.for_user(user_id)] if user_id is not None else self.shards
+        for shard in shards:
+            async for batch in shard.export_batches(user_id=user_id, batch_rows=batch_rows):
+                yield batch
+
+    async def import_rows(self, rows: list[HistoryRow]) -> int:
+        return await self._import(rows)
+
+    async def flush(self) -> None:
+        for shard in self.shards:
+            await shard.flush()
+
+    async def close(self) -> None:
+        errors = []
+        for shard in self.shards:
+            try:
+                await shard.close()
+            except RuntimeError as exc:
+                errors.append(exc)
+        if errors:
+            raise errors[0]
+
+
+class ShardedSavedOutfitRepository(_Sharded[SavedOutfitRepository]):
+    async def init(self) -> None:
+        for shard in self.shards:
+            await shard.init()
+
+    def add_listener(self, listener: SavedOutfitListener) -> None:
+        for shard in self.shards:
+            shard.add_listener(listener)
+
+    async def add_saved_outfit(self, user_id: str, outfit_id: str, payload: dict[str, Any]) -> None:
+        await self.for_user(user_id).add_saved_outfit(user_id, outfit_id, payload)
+
+    async def save_many(self, user_id: str, outfits: list[tuple[str, dict[str, Any]]]) -> int:
+        return await self.for_user(user_id).save_many(user_id, outfits)
+
+    async def exists(self, user_id: str, outfit_ids: list[str]) -> set[str]:
+        return await self.for_user(user_id).exists(user_id, outfit_ids)
+
+    async def list_for_user(self, user_id: str, limit: int = 50) -> list[SavedOutfitRow]:
+        return await self.for_user(user_id).list_for_user(user_id, limit)
+
+    async def list_page(self, user_id: str, limit: int = 50, cursor: str | None = None) -> Page[SavedOutfitPageRow]:
+        return await self.for_user(user_id).list_page(user_id, limit, cursor)
+
+    async def delete_for_user(self, user_id: str, outfit_id: str) -> None:
+        await self.for_user(user_id).delete_for_user(user_id, outfit_id)
+
+    async def delete_many(self, user_id: str, outfit_ids: list[str]) -> int:
+        return await self.for_user(user_id).delete_many(user_id, outfit_ids)
+
+    async def export_batches(
+        self, user_id: str | None = None, batch_rows: int = 1000
+    ) -> AsyncIterator[list[SavedOutfitPageRow]]:
+        shards = [self.for_user(user_id)] if user_id is not None else self.shards
+        for shard in shards:
+            async for batch in shard.export_batches(user_id=user_id, batch_rows=batch_rows):
+                yield batch
+
+    async def import_rows(self, rows: list[SavedOutfitRow]) -> int:
+        return await self._import(rows)
+
+
+class ShardedAppearanceProfileRepository(_Sharded[AppearanceProfileRepository]):
+    async def init(self) -> None:
+        for shard in self.shards:
+            await shard.init()
+
+    async def upsert(self, user_id: str, payload: dict[str, Any]) -> None:
+        await self.for_user(user_id).upsert(user_id, payload)
+
+    async def get(self, user_id: str) -> Optional[AppearanceProfileRow]:
+        return await self.for_user(user_id).get(user_id)
@@ -1,12 +1,12 @@
 from __future__ import annotations
 
-import sqlite3
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional
 
-import anyio
+
+from .db import ConnectionStats, SqliteConnectionManager, connection_manager
 
 
 def _utc_now() -> datetime:
@@ -24,14 +24,18 @@ class UserRow:
 
 
 class UserRepository:
-    def __init__(self, database_path: str):
+    def __init__(self, database_path: str, db: SqliteConnectionManager | None = None):
         self._db_path = database_path
+        self._db = db or connection_manager(database_path)
+
+    def connection_stats(self) -> ConnectionStats:
+        return self._db.stats()
 
     async def init(self) -> None:
         Path(self._db_path).parent.mkdir(parents=True, exist_ok=True)
 
         def _init() -> None:
-            with sqlite3.connect(self._db_path) as conn:
+            with self._db.connect() as conn:
                 conn.execute(
                     """
                     CREATE TABLE IF NOT EXISTS users (
@@ -46,21 +50,21 @@ class UserRepository:
                 )
                 conn.commit()
 
-        await anyio.to_thread.run_sync(_init)
+        await self._db.run("write", "users.init", _init)
 
     async def create_user(self, *, user_id: str, email: str, password_hash: str, display_name: str | None = None, gender: str | None = None) -> UserRow:
 
         created_at = _utc_now().isoformat()
 
         def _insert() -> None:
-            with sqlite3.connect(self._db_path) as conn:
+            with self._db.connect() as conn:
                 conn.execute(
                     "INSERT INTO users(id, email, password_hash, display_name, gender, created_at) VALUES (?, ?, ?, ?, ?, ?)",
                     (user_id, email, password_hash, display_name, gender, created_at),
                 )
                 conn.commit()
 
-        await anyio.to_thread.run_sync(_insert)
+        await self._db.run("write", "users.create_user", _insert)
         return UserRow(
             id=user_id,
             email=email,
@@ -72,7 +76,7 @@ class UserRepository:
 
     async def get_by_email(self, email: str) -> Optional[UserRow]:
         def _select() -> Optional[UserRow]:
-            with sqlite3.connect(self._db_path) as conn:
+            with self._db.connect() as conn:
                 cur = conn.execute(
                     "SELECT id, email, password_hash, display_name, gender, created_at FROM users WHERE email=?",
                     (email,),
@@ -94,11 +98,11 @@ class UserRepository:
                     created_at=created_dt,
                 )
 
-        return await anyio.to_thread.run_sync(_select)
+        return await self._db.run("auth", "users.get_by_email", _select)
 
     async def get_by_id(self, user_id: str) -> Optional[UserRow]:
         def _select() -> Optional[UserRow]:
-            with sqlite3.connect(self._db_path) as conn:
+            with self._db.connect() as conn:
                 cur = conn.execute(
                     "SELECT id, email, password_hash, display_name, gender, created_at FROM users WHERE id=?",
                     (user_id,),
@@ -120,5 +124,19 @@ class UserRepository:
                     created_at=created_dt,
                 )
 
-        return await anyio.to_thread.run_sync(_select)
+        return await self._db.run("auth", "users.get_by_id", _select)
+
+    async def update_password_hash(self, user_id: str, old_hash: str, new_hash: str) -> bool:
+        """Replace the stored hash only if it is still `old_hash`; False if it changed meanwhile."""
+
+        def _update() -> bool:
+            with self._db.connect() as conn:
+                cur = conn.execute(
+                    "UPDATE users SET password_hash=? WHERE id=? AND password_hash=?",
+                    (new_hash, user_id, old_hash),
+                )
+                conn.commit()
+                return cur.rowcount > 0
+
+        return await self._db.run("write", "users.update_password_hash", _update)
 
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Generic, TypeVar
+
+
+T = TypeVar("T")
+
+
+class AnalysisStore(Generic[T]):
+    """
+    In-memory TTL store for recent analyses, keyed by an opaque id; when
+    full, the oldest entries are dropped first.
+
+    Lets `/v1/recommend` reference a prior `/v1/analyze` result instead of
+    re-uploading the image. Entries live in this process only; with several
+    server workers an id is only resolvable on the worker that issued it.
+    """
+
+    def __init__(self, ttl_seconds: float = 1800.0, max_entries: int = 1000):
+        self._ttl = float(ttl_seconds)
+        self._max_entries = max(1, int(max_entries))
+        self._entries: OrderedDict[str, tuple[float, T]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, value: T) -> str:
+        analysis_id = secrets.token_urlsafe(16)
+        expires_at = time.monotonic() + self._ttl
+        with self._lock:
+            self._entries[analysis_id] = (expires_at, value)
+            self._evict(time.monotonic())
+        return analysis_id
+
+    def get(self, analysis_id: str) -> T | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(analysis_id)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[analysis_id]
+                return None
+            return value
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self, now: float) -> None:
+        # Constant TTL and no reordering on get(): insertion order is expiry order.
+        while self._entries:
+            oldest_id, (expires_at, _value) = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self._max_entries:
+                break
+            del self._entries[oldest_id]
@@ -0,0 +1,144 @@
+"""
+NDJSON export / import of history and saved outfits.
+
+One JSON object per line: {"user_id", "outfit_id", "created_at", "payload"}.
+Exports are read in keyset batches (SQLite) or from a server-side cursor
+(Postgres) and written out as they arrive; imports are parsed line by line
+and written in batches of `batch_rows`, one transaction each, so memory use
+and write-lock hold times stay bounded whatever the file size.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, AsyncIterable, AsyncIterator, Literal
+
+from ..core.errors import InvalidInputError
+from ..repositories.base import HistoryStore, SavedOutfitStore
+from ..repositories.history import HistoryPageRow, HistoryRow
+from ..repositories.saved_outfits import SavedOutfitPageRow, SavedOutfitRow
+from ..utils.json_stream import json_object
+
+
+Dataset = Literal["history", "saved-outfits"]
+DATASETS: tuple[Dataset, ...] = ("history", "saved-outfits")
+
+# A single line longer than this is rejected instead of buffered.
+MAX_LINE_BYTES = 4 * 1024 * 1024
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    users: set[str] = field(default_factory=set)
+
+
+async def export_ndjson(
+    dataset: Dataset,
+    history: HistoryStore,
+    saved: SavedOutfitStore,
+    user_id: str | None = None,
+    batch_rows: int = 1000,
+) -> AsyncIterator[bytes]:
+    """Yield NDJSON, one chunk per repository batch."""
+    repo = history if dataset == "history" else saved
+    async for batch in repo.export_batches(user_id=user_id, batch_rows=batch_rows):
+        yield b"".join(_export_line(row) + b"\n" for row in batch)
+
+
+async def import_ndjson(
+    dataset: Dataset,
+    chunks: AsyncIterable[bytes],
+    history: HistoryStore,
+    saved: SavedOutfitStore,
+    batch_rows: int = 5000,
+    result: ImportResult | None = None,
+) -> ImportResult:
+    """
+    Parse NDJSON from `chunks` and write it in batches, counting into
+    `result`. A malformed line raises InvalidInputError with its line
+    number; batches before it stay committed (and counted in `result`).
+    """
+    batch_rows = max(1, int(batch_rows))
+    result = result if result is not None else ImportResult()
+    rows: list[Any] = []
+
+    async def _write() -> None:
+        if dataset == "history":
+            result.rows += await history.import_rows(rows)
+        else:
+            result.rows += await saved.import_rows(rows)
+        rows.clear()
+
+    async for line_no, record in _records(chunks):
+        user_id, outfit_id, created_at, payload = _parse(line_no, record)
+        if dataset == "history":
+            rows.append(HistoryRow(user_id=user_id, outfit_id=outfit_id, created_at=created_at, payload=payload))
+        else:
+            rows.append(SavedOutfitRow(id=0, user_id=user_id, outfit_id=outfit_id, created_at=created_at, payload=payload))
+        result.users.add(user_id)
+        if len(rows) >= batch_rows:
+            await _write()
+    if rows:
+        await _write()
+    return result
+
+
+def _export_line(row: HistoryPageRow | SavedOutfitPageRow) -> bytes:
+    fields = {"user_id": row.user_id, "outfit_id": row.outfit_id, "created_at": row.created_at.isoformat()}
+    return json_object(fields, {"payload": row.payload_json})
+
+
+async def _records(chunks: AsyncIterable[bytes]) -> AsyncIterator[tuple[int, Any]]:
+    buf = bytearray()
+    line_no = 0
+
+    def _decode(line: bytes) -> Any:
+        try:
+            return json.loads(line)
+        except ValueError as e:
+            raise InvalidInputError(f"Line {line_no}: invalid JSON ({e})") from e
+
+    async for chunk in chunks:
+        buf += chunk
+        start = 0
+        while True:
+            end = buf.find(b"\n", start)
+            if end < 0:
+                break
+            line_no += 1
+            line = bytes(buf[start:end]).strip()
+            start = end + 1
+            if line:
+                yield line_no, _decode(line)
+        del buf[:start]
+        if len(buf) > MAX_LINE_BYTES:
+            raise InvalidInputError(f"Line {line_no + 1}: longer than {MAX_LINE_BYTES} bytes")
+    line = bytes(buf).strip()
+    if line:
+        line_no += 1
+        yield line_no, _decode(line)
+
+
+def _parse(line_no: int, record: Any) -> tuple[str, str, datetime, dict[str, Any]]:
+    if not isinstance(record, dict):
+        raise InvalidInputError(f"Line {line_no}: expected a JSON object")
+    user_id = record.get("user_id")
+    outfit_id = record.get("outfit_id")
+    payload = record.get("payload")
+    if not isinstance(user_id, str) or not user_id:
+        raise InvalidInputError(f"Line {line_no}: user_id must be a non-empty string")
+    if not isinstance(outfit_id, str) or not outfit_id:
+        raise InvalidInputError(f"Line {line_no}: outfit_id must be a non-empty string")
+    if not isinstance(payload, dict):
+        raise InvalidInputError(f"Line {line_no}: payload must be an object")
+    try:
+        created_at = datetime.fromisoformat(str(record["created_at"]))
+    except (KeyError, ValueError) as e:
+        raise InvalidInputError(f"Line {line_no}: created_at must be an ISO 8601 timestamp") from e
+    # Stored times are UTC; a timestamp without an offset is taken as UTC.
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return user_id, outfit_id, created_at.astimezone(timezone.utc), payload
@@ -24,9 +24,17 @@ class DiversityEngine:
     def __init__(self, config: DiversityConfig | None = None):
         self._cfg = config or DiversityConfig()
 
-    def apply(self, scored: Iterable[ScoredOutfit], recent_history_payloads: list[dict]) -> list[ScoredOutfit]:
-        history = recent_history_payloads[: self._cfg.max_history]
-        history_sets = [_features_from_payload(p) for p in history]
+    def history_features(self, recent_history_payloads: list[dict]) -> list[set[str]]:
+        """Feature sets for `apply`; cacheable per user since they only depend on history."""
+        return [_features_from_payload(p) for p in recent_history_payloads[: self._cfg.max_history]]
+
+    def apply(
+        self,
+        scored: Iterable[ScoredOutfit],
+        recent_history_payloads: list[dict],
+        history_features: list[set[str]] | None = None,
+    ) -> list[ScoredOutfit]:
+        history_sets = history_features if history_features is not None else self.history_features(recent_history_payloads)
 
         out: list[ScoredOutfit] = []
         for s in scored:
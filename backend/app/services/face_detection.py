@@ -1,34 +1,87 @@
 from __future__ import annotations
 
+import threading
 from dataclasses import dataclass
-from typing import Any
+from pathlib import Path
+from typing import Any, Protocol
 
-from ..core.errors import DependencyMissingError
+from ..core.errors import DependencyMissingError, InvalidInputError
 from ..models.schemas import FaceBox
 
 
+DEFAULT_MODEL_DIR = Path(__file__).resolve().parents[2] / "models" / "face_detection"
+YUNET_MODEL = "face_detection_yunet_2023mar.onnx"
+RES10_PROTOTXT = "deploy.prototxt"
+RES10_MODEL = "res10_300x300_ssd_iter_140000.caffemodel"
+
+
 @dataclass(frozen=True)
 class FaceDetectionResult:
     faces: list[FaceBox]
 
 
+class FaceDetectionEngine(Protocol):
+    """A CPU face detector returning boxes in the coordinates of the given image."""
+
+    name: str
+
+    def detect(self, bgr_image) -> list[FaceBox]: ...
+
+
 class FaceDetector:
     """
-    OpenCV Haar-cascade face detector (lazy-imported).
+    Face detector facade over a pluggable engine (Haar by default).
+
+    Engines are lazy-loaded; a missing OpenCV build or model file surfaces as
+    DependencyMissingError on first use rather than at import time.
     """
 
-    def __init__(self, min_confidence: float = 0.5):
-        # min_confidence is mapped to Haar cascade minNeighbors / scaleFactor heuristically.
+    def __init__(self, min_confidence: float = 0.5, engine: str = "haar", model_dir: str | Path | None = None):
         self._min_confidence = float(min_confidence)
+        self._engine = create_face_engine(engine, min_confidence=self._min_confidence, model_dir=model_dir)
 
-    def detect(self, bgr_image) -> FaceDetectionResult:
-        cv2 = _require_cv2()
+    @property
+    def engine_name(self) -> str:
+        return self._engine.name
 
+    def detect(self, bgr_image) -> FaceDetectionResult:
         height, width = int(bgr_image.shape[0]), int(bgr_image.shape[1])
         if height == 0 or width == 0:
             return FaceDetectionResult(faces=[])
 
-        gray = cv2.cvtColor(bgr_image, cv2.COLOR_BGR2GRAY)
+        faces = self._engine.detect(bgr_image)
+        # Sort largest face first (more stable for selfies)
+        faces.sort(key=lambda f: f.w * f.h, reverse=True)
+        return FaceDetectionResult(faces=faces)
+
+
+def create_face_engine(name: str, min_confidence: float = 0.5, model_dir: str | Path | None = None) -> FaceDetectionEngine:
+    model_path = Path(model_dir) if model_dir else DEFAULT_MODEL_DIR
+    key = (name or "haar").strip().lower()
+    if key == "haar":
+        return HaarFaceEngine(min_confidence)
+    if key == "yunet":
+        return YuNetFaceEngine(model_path / YUNET_MODEL, min_confidence)
+    if key == "res10":
+        return Res10SsdFaceEngine(model_path / RES10_PROTOTXT, model_path / RES10_MODEL, min_confidence)
+    raise InvalidInputError(f"Unknown face detector engine: {name!r} (expected haar, yunet or res10)")
+
+
+class HaarFaceEngine:
+    """OpenCV Haar frontal-face cascade (ships with opencv-python)."""
+
+    name = "haar"
+
+    def __init__(self, min_confidence: float = 0.5):
+        # min_confidence is mapped to Haar cascade minNeighbors / scaleFactor heuristically.
+        self._min_confidence = float(min_confidence)
+        self._local = threading.local()
+
+    def _classifier(self, cv2: Any):
+        # CascadeClassifier is not safe to share across threads; keep one per vision worker.
+        classifier = getattr(self._local, "classifier", None)
+        if classifier is not None:
+            return classifier
 
         cascade_path = getattr(cv2.data, "haarcascades", "") + "haarcascade_frontalface_default.xml"
         if not cascade_path:
@@ -43,6 +96,12 @@ class FaceDetector:
                 "opencv-data",
                 "Failed to load Haar cascade; check your OpenCV installation.",
             )
+        self._local.classifier = classifier
+        return classifier
+
+    def detect(self, bgr_image) -> list[FaceBox]:
+        cv2 = _require_cv2()
+        gray = cv2.cvtColor(bgr_image, cv2.COLOR_BGR2GRAY)
 
         # Heuristic mapping: higher min_confidence -> stricter detection parameters.
         scale_factor = 1.1
@@ -52,7 +111,7 @@ class FaceDetector:
         elif self._min_confidence <= 0.3:
             min_neighbors = 3
 
-        detections = classifier.detectMultiScale(
+        detections = self._classifier(cv2).detectMultiScale(
             gray,
             scaleFactor=scale_factor,
             minNeighbors=min_neighbors,
@@ -66,10 +125,123 @@ class FaceDetector:
                 continue
             # Haar cascade does not give probability; we expose a fixed high confidence for now.
             faces.append(FaceBox(x=int(x), y=int(y), w=int(w), h=int(h), confidence=0.9))
+        return faces
 
-        # Sort largest face first (more stable for selfies)
-        faces.sort(key=lambda f: f.w * f.h, reverse=True)
-        return FaceDetectionResult(faces=faces)
+
+class YuNetFaceEngine:
+    """
+    OpenCV's YuNet CNN detector via cv2.FaceDetectorYN (OpenCV >= 4.5.4).
+
+    Inference runs on a copy downscaled to `max_side`, which keeps latency
+    roughly flat regardless of upload resolution.
+    """
+
+    name = "yunet"
+
+    def __init__(self, model_path: Path, min_confidence: float = 0.5, max_side: int = 640):
+        self._model_path = Path(model_path)
+        self._min_confidence = float(min_confidence)
+        self._max_side = int(max_side)
+        self._local = threading.local()
+
+    def _detector(self, cv2: Any, size: tuple[int, int]):
+        detector = getattr(self._local, "detector", None)
+        if detector is None:
+            if not hasattr(cv2, "FaceDetectorYN"):
+                raise DependencyMissingError("opencv-python>=4.5.4", "cv2.FaceDetectorYN is required for the yunet engine")
+            _require_model_file(self._model_path)
+            detector = cv2.FaceDetectorYN.create(str(self._model_path), "", size, self._min_confidence, 0.3, 50)
+            self._local.detector = detector
+        detector.setInputSize(size)
+        return detector
+
+    def detect(self, bgr_image) -> list[FaceBox]:
+        cv2 = _require_cv2()
+        small, scale = _downscale(cv2, bgr_image, self._max_side)
+        h, w = int(small.shape[0]), int(small.shape[1])
+        _ok, detections = self._detector(cv2, (w, h)).detect(small)
+        if detections is None:
+            return []
+
+        faces: list[FaceBox] = []
+        for row in detections:
+            box = _scaled_box(row[0], row[1], row[2], row[3], scale, bgr_image)
+            if box is not None:
+                faces.append(FaceBox(x=box[0], y=box[1], w=box[2], h=box[3], confidence=_clamp01(row[14])))
+        return faces
+
+
+class Res10SsdFaceEngine:
+    """OpenCV DNN ResNet-10 SSD face detector (Caffe weights, 300x300 input)."""
+
+    name = "res10"
+
+    def __init__(self, prototxt_path: Path, model_path: Path, min_confidence: float = 0.5):
+        self._prototxt_path = Path(prototxt_path)
+        self._model_path = Path(model_path)
+        self._min_confidence = float(min_confidence)
+        self._local = threading.local()
+
+    def _net(self, cv2: Any):
+        net = getattr(self._local, "net", None)
+        if net is None:
+            _require_model_file(self._prototxt_path)
+            _require_model_file(self._model_path)
+            net = cv2.dnn.readNetFromCaffe(str(self._prototxt_path), str(self._model_path))
+            self._local.net = net
+        return net
+
+    def detect(self, bgr_image) -> list[FaceBox]:
+        cv2 = _require_cv2()
+        height, width = int(bgr_image.shape[0]), int(bgr_image.shape[1])
+        blob = cv2.dnn.blobFromImage(cv2.resize(bgr_image, (300, 300)), 1.0, (300, 300), (104.0, 177.0, 123.0))
+        net = self._net(cv2)
+        net.setInput(blob)
+        detections = net.forward()
+
+        faces: list[FaceBox] = []
+        for i in range(detections.shape[2]):
+            score = float(detections[0, 0, i, 2])
+            if score < self._min_confidence:
+                continue
+            x1, y1, x2, y2 = detections[0, 0, i, 3:7].tolist()
+            box = _scaled_box(x1 * width, y1 * height, (x2 - x1) * width, (y2 - y1) * height, 1.0, bgr_image)
+            if box is not None:
+                faces.append(FaceBox(x=box[0], y=box[1], w=box[2], h=box[3], confidence=_clamp01(score)))
+        return faces
+
+
+def _downscale(cv2: Any, bgr_image, max_side: int) -> tuple[Any, float]:
+    h, w = int(bgr_image.shape[0]), int(bgr_image.shape[1])
+    if max(h, w) <= max_side:
+        return bgr_image, 1.0
+    scale = max_side / float(max(h, w))
+    small = cv2.resize(bgr_image, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+    return small, scale
+
+
+def _scaled_box(x: float, y: float, w: float, h: float, scale: float, bgr_image) -> tuple[int, int, int, int] | None:
+    """Map a box from detector space back to the original image and clip it to the frame."""
+    img_h, img_w = int(bgr_image.shape[0]), int(bgr_image.shape[1])
+    x1 = max(0, int(round(x / scale)))
+    y1 = max(0, int(round(y / scale)))
+    x2 = min(img_w, int(round((x + w) / scale)))
+    y2 = min(img_h, int(round((y + h) / scale)))
+    if x2 <= x1 or y2 <= y1:
+        return None
+    return x1, y1, x2 - x1, y2 - y1
+
+
+def _clamp01(value: Any) -> float:
+    return max(0.0, min(1.0, float(value)))
+
+
+def _require_model_file(path: Path) -> None:
+    if not path.is_file():
+        raise DependencyMissingError(
+            path.name,
+            f"Face detection model not found at {path}; run backend/fetch_face_models.py (see models/face_detection/README.md)",
+        )
 
 
 def _require_cv2() -> Any:
@@ -78,4 +250,3 @@ def _require_cv2() -> Any:
     except ModuleNotFoundError as e:
         raise DependencyMissingError("opencv-python", "Install backend/requirements.txt for face detection") from e
     return cv2
-
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from ..core.errors import DependencyMissingError
+from ..models.schemas import FaceBox, LiveAnalysisUpdate
+from ..utils.images import extract_color_palette_labels
+from .face_detection import FaceDetector
+from .skin_tone import SkinToneDetector, skin_tone_from_rgb
+
+
+class LiveAnalysisSession:
+    """
+    Per-connection state for streaming camera analysis.
+
+    Full-frame detection only runs on keyframes (every `keyframe_interval`
+    frames, or right after the face is lost). In between, the previous face
+    box is grown by `roi_margin` on each side and detection runs on that crop
+    only, which is a small fraction of the frame. Skin tone is an exponential
+    moving average over frames; the palette is refreshed on keyframes and
+    blended with decaying weights.
+
+    Not thread-safe: feed frames one at a time.
+    """
+
+    def __init__(
+        self,
+        faces: FaceDetector,
+        skin: SkinToneDetector,
+        keyframe_interval: int = 10,
+        roi_margin: float = 0.5,
+        smoothing: float = 0.3,
+        palette_decay: float = 0.7,
+        palette_size: int = 6,
+    ):
+        self._faces = faces
+        self._skin = skin
+        self._keyframe_interval = max(1, int(keyframe_interval))
+        self._roi_margin = float(roi_margin)
+        self._smoothing = float(smoothing)
+        self._palette_decay = float(palette_decay)
+        self._palette_size = int(palette_size)
+        self.reset()
+
+    def reset(self) -> None:
+        self._frame = 0
+        self._since_keyframe = 0
+        self._box: FaceBox | None = None
+        self._skin_rgb: tuple[float, float, float] | None = None
+        self._palette: dict[str, float] = {}
+
+    def process_frame(self, bgr) -> LiveAnalysisUpdate:
+        start = time.perf_counter()
+        self._frame += 1
+
+        keyframe = self._box is None or self._since_keyframe >= self._keyframe_interval
+        if keyframe:
+            detected = self._faces.detect(bgr).faces
+            face = detected[0] if detected else None
+            tracking = "detected" if face else "lost"
+            self._since_keyframe = 0
+        else:
+            face = self._track(bgr, self._box)  # type: ignore[arg-type]
+            tracking = "tracked" if face else "lost"
+        self._since_keyframe += 1
+        self._box = face
+
+        if face is not None:
+            self._update_skin(self._skin.detect(bgr, face).skin_tone.rgb)
+        if keyframe:
+            self._update_palette(bgr)
+
+        return LiveAnalysisUpdate(
+            frame=self._frame,
+            keyframe=keyframe,
+            tracking=tracking,
+            face=face,
+            skin_tone=skin_tone_from_rgb(tuple(round(c) for c in self._skin_rgb)) if self._skin_rgb else None,  # type: ignore[arg-type]
+            color_palette=self._ranked_palette(),
+            latency_ms=round((time.perf_counter() - start) * 1000, 2),
+        )
+
+    def _track(self, bgr, prev: FaceBox) -> FaceBox | None:
+        height, width = int(bgr.shape[0]), int(bgr.shape[1])
+        mx, my = int(prev.w * self._roi_margin), int(prev.h * self._roi_margin)
+        x1, y1 = max(0, prev.x - mx), max(0, prev.y - my)
+        x2, y2 = min(width, prev.x + prev.w + mx), min(height, prev.y + prev.h + my)
+        if x2 <= x1 or y2 <= y1:
+            return None
+
+        found = self._faces.detect(bgr[y1:y2, x1:x2]).faces
+        if not found:
+            return None
+        # Prefer the candidate closest to where the face was, not the largest.
+        cx, cy = prev.x + prev.w / 2 - x1, prev.y + prev.h / 2 - y1
+        best = min(found, key=lambda f: (f.x + f.w / 2 - cx) ** 2 + (f.y + f.h / 2 - cy) ** 2)
+        return FaceBox(x=best.x + x1, y=best.y + y1, w=best.w, h=best.h, confidence=best.confidence)
+
+    def _update_skin(self, rgb: tuple[int, int, int]) -> None:
+        if self._skin_rgb is None:
+            self._skin_rgb = (float(rgb[0]), float(rgb[1]), float(rgb[2]))
+            return
+        a = self._smoothing
+        self._skin_rgb = tuple(a * new + (1 - a) * old for new, old in zip(rgb, self._skin_rgb))  # type: ignore[assignment]
+
+    def _update_palette(self, bgr: Any) -> None:
+        try:
+            labels = extract_color_palette_labels(bgr)
+        except DependencyMissingError:
+            return
+        for name in self._palette:
+            self._palette[name] *= self._palette_decay
+        for rank, name in enumerate(labels):
+            self._palette[name] = self._palette.get(name, 0.0) + 1.0 / (rank + 1)
+
+    def _ranked_palette(self) -> list[str]:
+        ranked = sorted(self._palette.items(), key=lambda kv: kv[1], reverse=True)
+        return [name for name, _ in ranked[: self._palette_size]]
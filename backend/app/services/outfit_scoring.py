@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import json
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Iterable
+from typing import TYPE_CHECKING, Any, Iterable
 
 from ..models.schemas import Outfit, OutfitItem, ScoredOutfit, SkinTone
 
@@ -29,6 +30,42 @@ class OutfitCatalog:
     Expanded in-memory catalog with 30+ outfits covering all vibes and occasions.
     """
 
+    def __init__(self) -> None:
+        self._index: dict[str, dict[str, Any]] | None = None
+        self._json: dict[str, bytes] = {}
+        self._version: str | None = None
+
+    @property
+    def version(self) -> str:
+        """Content hash over every outfit; changes whenever any outfit is added, removed or edited."""
+        if self._version is None:
+            self._version = stable_hash(self._outfit_index())
+        return self._version
+
+    def resolve(self, outfit_id: str) -> dict[str, Any] | None:
+        """
+        The `model_dump()` of a catalog outfit, or None if the id is unknown.
+
+        The dict is shared between callers; treat it as read-only.
+        """
+        return self._outfit_index().get(outfit_id)
+
+    def resolve_json(self, outfit_id: str) -> bytes | None:
+        """`resolve()` as compact UTF-8 JSON, serialized once per outfit."""
+        cached = self._json.get(outfit_id)
+        if cached is None:
+            outfit = self.resolve(outfit_id)
+            if outfit is None:
+                return None
+            cached = json.dumps(outfit, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            self._json[outfit_id] = cached
+        return cached
+
+    def _outfit_index(self) -> dict[str, dict[str, Any]]:
+        if self._index is None:
+            self._index = {o.outfit_id: o.model_dump() for o in self.list_candidates()}
+        return self._index
+
     def list_candidates(self) -> list[Outfit]:
         return [
             # ── STREETWEAR ──────────────────────────────────────────
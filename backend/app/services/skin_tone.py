@@ -47,11 +47,15 @@ class SkinToneDetector:
 
         mean_bgr = center.reshape(-1, 3).mean(axis=0)
         b, g, r = [int(max(0, min(255, v))) for v in mean_bgr.tolist()]
-        rgb = (r, g, b)
-        hex_color = f"#{r:02x}{g:02x}{b:02x}"
-        tone = _bucket_by_luma(rgb)
-        undertone = _detect_undertone(rgb)
-        return SkinToneResult(skin_tone=SkinTone(rgb=rgb, hex=hex_color, tone=tone, undertone=undertone))
+        return SkinToneResult(skin_tone=skin_tone_from_rgb((r, g, b)))
+
+
+def skin_tone_from_rgb(rgb: tuple[int, int, int]) -> SkinTone:
+    """Bucket an (r, g, b) skin colour into a SkinTone (also used for multi-image averages)."""
+    r, g, b = [int(max(0, min(255, v))) for v in rgb]
+    rgb = (r, g, b)
+    hex_color = f"#{r:02x}{g:02x}{b:02x}"
+    return SkinTone(rgb=rgb, hex=hex_color, tone=_bucket_by_luma(rgb), undertone=_detect_undertone(rgb))
 
 
 def _require_numpy() -> Any:
@@ -1,21 +1,44 @@
 from __future__ import annotations
 
+import asyncio
+import logging
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, AsyncIterator, BinaryIO, Callable, Iterable, TypeVar
+
+import anyio
+from anyio.streams.memory import MemoryObjectSendStream
 
 from ..core.config import Settings
-from ..models.schemas import AnalyzeResponse, RecommendRequest, RecommendResponse, ScoredOutfit
-from ..repositories.history import HistoryRepository
-from ..repositories.saved_outfits import SavedOutfitRepository
-from ..utils.images import decode_base64_image_to_bgr, decode_image_bytes_to_bgr, extract_color_palette_labels
+from ..core.errors import AppError, InvalidInputError
+from ..models.schemas import (
+    AnalyzeResponse,
+    BatchAnalyzeResult,
+    BatchAnalyzeSummary,
+    LiveAnalysisUpdate,
+    RecommendRequest,
+    RecommendResponse,
+    QualityTier,
+    ScoredOutfit,
+)
+from ..repositories.base import AppearanceProfileStore, HistoryStore, PreferenceStore, SavedOutfitStore
+from ..utils.images import decode_base64_image_bytes, decode_base64_image_to_bgr, decode_image_bytes_to_bgr
+from .analysis_store import AnalysisStore
 from .diversity import DiversityEngine
 from .face_detection import FaceDetector
 from .image_search import ImageSearchService
+from .live_tracking import LiveAnalysisSession
 from .llm import LlmContext, LlmRecommender
 from .outfit_scoring import OutfitCatalog, OutfitScoringEngine, ScoringContext
-from .skin_tone import SkinToneDetector
+from .skin_tone import SkinToneDetector, skin_tone_from_rgb
+from .user_context import UserContextCache
 from .user_memory import UserMemoryEngine, UserProfile
+from .vision import FrameAnalysis, ProcessVisionPool, VisionLoadGovernor, analyze_frame
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
 
 
 @dataclass(frozen=True)
@@ -25,54 +48,173 @@ class AnalyzeArtifacts:
 
 
 class StylistService:
-    def __init__(self, settings: Settings, history_repo: HistoryRepository, saved_repo: SavedOutfitRepository | None = None):
+    def __init__(
+        self,
+        settings: Settings,
+        history_repo: HistoryStore,
+        saved_repo: SavedOutfitStore | None = None,
+        profile_repo: AppearanceProfileStore | None = None,
+        catalog: OutfitCatalog | None = None,
+        preference_repo: PreferenceStore | None = None,
+        user_context_ttl_seconds: float | None = None,
+    ):
         self._settings = settings
         self._history = history_repo
         self._saved = saved_repo
-        self._faces = FaceDetector()
+        self._profiles = profile_repo
+        self._analyses: AnalysisStore[AnalyzeArtifacts] = AnalysisStore(
+            ttl_seconds=settings.analysis_ttl_seconds, max_entries=settings.analysis_store_max_entries
+        )
+        self._faces = FaceDetector(engine=settings.face_detector_engine, model_dir=settings.face_model_dir)
         self._skin = SkinToneDetector()
-        self._catalog = OutfitCatalog()
+        self._catalog = catalog or OutfitCatalog()
         self._scorer = OutfitScoringEngine()
         self._diversity = DiversityEngine()
         self._llm = LlmRecommender()
         self._memory = UserMemoryEngine()
+        self._user_context = UserContextCache(
+            history_repo,
+            saved_repo,
+            self._memory,
+            self._diversity,
+            max_users=settings.user_context_cache_users,
+            ttl_seconds=user_context_ttl_seconds or settings.user_context_ttl_seconds,
+            preferences=preference_repo,
+        )
         self._image_search = ImageSearchService(settings)
-
-    async def analyze_image_bytes(self, image_bytes: bytes) -> AnalyzeArtifacts:
-        bgr = decode_image_bytes_to_bgr(image_bytes)
-        det = self._faces.detect(bgr)
-        dominant = None
-        if det.faces:
-            dominant = self._skin.detect(bgr, det.faces[0]).skin_tone
-        analyze = AnalyzeResponse(faces=det.faces, dominant_skin_tone=dominant)
-        raw = analyze.model_dump()
-        # Attach coarse color palette labels for downstream outfit ranking.
+        self._vision_limiter = anyio.CapacityLimiter(settings.vision_workers)
+        self._vision_pool: ProcessVisionPool | None = None
+        if settings.vision_backend == "process":
+            self._vision_pool = ProcessVisionPool(
+                workers=settings.vision_workers,
+                slot_bytes=settings.vision_shm_slot_bytes,
+                face_engine=settings.face_detector_engine,
+                face_model_dir=settings.face_model_dir,
+                reduced_max_side=settings.vision_reduced_max_side,
+            )
+        self._governor = VisionLoadGovernor(settings.vision_workers, enabled=settings.vision_adaptive_quality)
+
+    def user_context_stats(self) -> dict[str, Any]:
+        return self._user_context.stats()
+
+    def invalidate_user_context(self, user_ids: Iterable[str]) -> None:
+        self._user_context.invalidate(user_ids)
+
+    def close(self) -> None:
+        if self._vision_pool is not None:
+            self._vision_pool.close()
+            self._vision_pool = None
+
+    async def analyze_image_bytes(
+        self, image_bytes: bytes | memoryview | BinaryIO, deadline_ms: float | None = None
+    ) -> AnalyzeArtifacts:
+        """
+        Analyze one image. Under load (or when `deadline_ms` would not be met at
+        full quality) a cheaper tier is used; the response's `quality_tier`
+        says which.
+        """
+        tier = self._governor.choose(deadline_ms)
+        with self._governor.track(tier):
+            if self._vision_pool is not None:
+                frame = await self._vision_pool.analyze(image_bytes, max_pixels=self._settings.max_image_pixels, tier=tier)
+                return _artifacts_from_frame(frame)
+            return await self._run_vision(self._analyze_bytes_sync, image_bytes, tier)
+
+    def remember_analysis(self, artifacts: AnalyzeArtifacts) -> AnalyzeResponse:
+        """Keep `artifacts` for ANALYSIS_TTL_SECONDS and return the response carrying its `analysis_id`."""
+        analysis_id = self._analyses.put(artifacts)
+        return artifacts.analyze.model_copy(update={"analysis_id": analysis_id})
+
+    async def analyze_image_base64(self, image_base64: str, deadline_ms: float | None = None) -> AnalyzeArtifacts:
+        if self._vision_pool is not None:
+            return await self.analyze_image_bytes(decode_base64_image_bytes(image_base64), deadline_ms=deadline_ms)
+        tier = self._governor.choose(deadline_ms)
+        with self._governor.track(tier):
+            return await self._run_vision(self._analyze_base64_sync, image_base64, tier)
+
+    async def analyze_batch(
+        self, images: list[tuple[str | None, bytes | BinaryIO]], deadline_ms: float | None = None
+    ) -> AsyncIterator[BatchAnalyzeResult | BatchAnalyzeSummary]:
+        """
+        Analyze several images concurrently on the vision worker pool.
+
+        Yields one BatchAnalyzeResult per image as soon as it completes (so
+        results arrive out of order; use `index`), followed by a single
+        BatchAnalyzeSummary aggregated across the whole set.
+        """
+        send, receive = anyio.create_memory_object_stream(max_buffer_size=max(1, len(images)))
+        # The task group lives in its own task: a generator must not yield inside one, or a consumer that
+        # stops early (client disconnect, aclose()) throws GeneratorExit into its cancel scope.
+        producer = asyncio.ensure_future(self._analyze_batch_into(send, images, deadline_ms))
+        results: list[BatchAnalyzeResult] = []
         try:
-            raw["color_palette"] = extract_color_palette_labels(bgr)
-        except DependencyMissingError:
-            raw["color_palette"] = []
-        return AnalyzeArtifacts(analyze=analyze, raw=raw)
-
-    async def analyze_image_base64(self, image_base64: str) -> AnalyzeArtifacts:
-        bgr = decode_base64_image_to_bgr(image_base64)
-        det = self._faces.detect(bgr)
-        dominant = None
-        if det.faces:
-            dominant = self._skin.detect(bgr, det.faces[0]).skin_tone
-        analyze = AnalyzeResponse(faces=det.faces, dominant_skin_tone=dominant)
-        raw = analyze.model_dump()
-        try:
-            raw["color_palette"] = extract_color_palette_labels(bgr)
-        except DependencyMissingError:
-            raw["color_palette"] = []
-        return AnalyzeArtifacts(analyze=analyze, raw=raw)
+            async with receive:
+                async for item in receive:
+                    results.append(item)
+                    yield item
+        finally:
+            producer.cancel()
+            # Wait for in-flight analyses: the caller closes the image files once this returns.
+            with anyio.CancelScope(shield=True):
+                await asyncio.gather(producer, return_exceptions=True)
+
+        yield _summarize_batch(results, total=len(images))
+
+    async def _analyze_batch_into(
+        self, send: MemoryObjectSendStream, images: list[tuple[str | None, bytes | BinaryIO]], deadline_ms: float | None
+    ) -> None:
+        async def _one(index: int, filename: str | None, raw: bytes | BinaryIO, out: MemoryObjectSendStream) -> None:
+            async with out:
+                try:
+                    artifacts = await self.analyze_image_bytes(raw, deadline_ms=deadline_ms)
+                    item = BatchAnalyzeResult(
+                        index=index,
+                        filename=filename,
+                        analysis=artifacts.analyze,
+                        color_palette=list(artifacts.raw.get("color_palette") or []),
+                    )
+                except Exception as e:
+                    # One bad image (decode error, cv2 failure) is that item's error, not the batch's.
+                    if not isinstance(e, AppError):
+                        logger.exception("batch_image_failed", extra={"index": index})
+                    item = BatchAnalyzeResult(index=index, filename=filename, error=str(e) or type(e).__name__)
+                await out.send(item)
+
+        async with send:
+            async with anyio.create_task_group() as tg:
+                for index, (filename, raw) in enumerate(images):
+                    tg.start_soon(_one, index, filename, raw, send.clone())
+
+    def open_live_session(self) -> LiveAnalysisSession:
+        return LiveAnalysisSession(self._faces, self._skin, keyframe_interval=self._settings.live_keyframe_interval)
+
+    async def analyze_live_frame(self, session: LiveAnalysisSession, frame: bytes | memoryview) -> LiveAnalysisUpdate:
+        # Sessions carry tracking state between frames, so they always run on
+        # the thread pool even when VISION_BACKEND=process.
+        return await self._run_vision(self._analyze_live_frame_sync, session, frame)
+
+    async def _run_vision(self, func: Callable[..., T], *args: Any) -> T:
+        # OpenCV/PIL release the GIL for the heavy parts, so a bounded thread
+        # pool gives real parallelism without starving the event loop.
+        return await anyio.to_thread.run_sync(func, *args, limiter=self._vision_limiter)
+
+    def _analyze_bytes_sync(self, image_bytes: bytes | memoryview | BinaryIO, tier: QualityTier = "full") -> AnalyzeArtifacts:
+        return self._analyze_bgr(decode_image_bytes_to_bgr(image_bytes, max_pixels=self._settings.max_image_pixels), tier)
+
+    def _analyze_live_frame_sync(self, session: LiveAnalysisSession, frame: bytes | memoryview) -> LiveAnalysisUpdate:
+        bgr = decode_image_bytes_to_bgr(memoryview(frame), max_pixels=self._settings.max_image_pixels)
+        return session.process_frame(bgr)
+
+    def _analyze_base64_sync(self, image_base64: str, tier: QualityTier = "full") -> AnalyzeArtifacts:
+        return self._analyze_bgr(decode_base64_image_to_bgr(image_base64, max_pixels=self._settings.max_image_pixels), tier)
+
+    def _analyze_bgr(self, bgr, tier: QualityTier = "full") -> AnalyzeArtifacts:
+        return _artifacts_from_frame(
+            analyze_frame(bgr, self._faces, self._skin, tier, self._settings.vision_reduced_max_side)
+        )
 
-    async def recommend(self, req: RecommendRequest, image_bytes: bytes | None = None) -> RecommendResponse:
-        analyze_artifacts: AnalyzeArtifacts | None = None
-        if image_bytes:
-            analyze_artifacts = await self.analyze_image_bytes(image_bytes)
-        elif req.image_base64:
-            analyze_artifacts = await self.analyze_image_base64(req.image_base64)
+    async def recommend(self, req: RecommendRequest, image_bytes: bytes | memoryview | BinaryIO | None = None) -> RecommendResponse:
+        analyze_artifacts = await self._resolve_analysis(req, image_bytes)
 
         skin = analyze_artifacts.analyze.dominant_skin_tone if analyze_artifacts else None
 
@@ -96,15 +238,9 @@ class StylistService:
         vibe = _extract_vibe(req.style_preferences)
 
         # ── Build user memory profile ──────────────────────────────────
-        history_rows = await self._history.list_recent(req.user_id, limit=50)
-        history_payloads = [r.payload for r in history_rows]
-
-        saved_payloads: list[dict[str, Any]] = []
-        if self._saved:
-            saved_rows = await self._saved.list_for_user(req.user_id, limit=100)
-            saved_payloads = [r.payload for r in saved_rows]
-
-        user_profile = self._memory.build_profile(history_payloads, saved_payloads)
+        user_ctx = await self._user_context.get(req.user_id)
+        history_payloads = user_ctx.history_payloads
+        user_profile = user_ctx.profile
 
         ctx = ScoringContext(
             occasion=req.occasion,
@@ -123,7 +259,7 @@ class StylistService:
         scored = self._scorer.score(candidates, ctx)
 
         # Diversity via user history
-        diversified = self._diversity.apply(scored, history_payloads)
+        diversified = self._diversity.apply(scored, history_payloads, history_features=user_ctx.history_features)
 
         # Ensure top 4 are visually distinct (unique images + not overly similar palettes/tags)
         diversified = _select_visually_diverse(diversified, top_k=5, ensure_unique_top=4)
@@ -215,6 +351,72 @@ class StylistService:
             outfits=top,
         )
 
+    async def _resolve_analysis(
+        self, req: RecommendRequest, image_bytes: bytes | memoryview | BinaryIO | None
+    ) -> AnalyzeArtifacts | None:
+        """
+        Image sources in priority order: uploaded file, `image_base64`, a prior
+        `analysis_id`, then the user's saved appearance profile. A fresh
+        analysis becomes the user's new profile.
+        """
+        artifacts: AnalyzeArtifacts | None = None
+        if image_bytes:
+            artifacts = await self.analyze_image_bytes(image_bytes)
+        elif req.image_base64:
+            artifacts = await self.analyze_image_base64(req.image_base64)
+        elif req.analysis_id:
+            artifacts = self._analyses.get(req.analysis_id)
+            if artifacts is None:
+                raise InvalidInputError("Unknown or expired analysis_id; upload the image again")
+        elif self._profiles:
+            profile = await self._profiles.get(req.user_id)
+            if profile is not None:
+                return _artifacts_from_raw(profile.payload)
+            return None
+
+        if artifacts is not None and self._profiles:
+            await self._profiles.upsert(req.user_id, artifacts.raw)
+        return artifacts
+
+
+def _artifacts_from_raw(raw: dict[str, Any]) -> AnalyzeArtifacts | None:
+    try:
+        analyze = AnalyzeResponse.model_validate(raw)
+    except ValueError:
+        return None
+    return AnalyzeArtifacts(analyze=analyze, raw=raw)
+
+
+def _artifacts_from_frame(frame: FrameAnalysis) -> AnalyzeArtifacts:
+    analyze = AnalyzeResponse(faces=frame.faces, dominant_skin_tone=frame.skin_tone, quality_tier=frame.quality_tier)
+    raw = analyze.model_dump()
+    raw["color_palette"] = list(frame.color_palette)
+    return AnalyzeArtifacts(analyze=analyze, raw=raw)
+
+
+def _summarize_batch(results: list[BatchAnalyzeResult], total: int, palette_size: int = 6) -> BatchAnalyzeSummary:
+    """Aggregate per-image results into one skin tone (mean RGB) and a rank-weighted palette."""
+    tones = [r.analysis.dominant_skin_tone for r in results if r.analysis and r.analysis.dominant_skin_tone]
+    dominant = None
+    if tones:
+        n = len(tones)
+        mean_rgb = tuple(int(round(sum(t.rgb[i] for t in tones) / n)) for i in range(3))
+        dominant = skin_tone_from_rgb(mean_rgb)  # type: ignore[arg-type]
+
+    # Earlier labels are more dominant within an image, so weight them higher.
+    weights: dict[str, float] = {}
+    for r in results:
+        for rank, name in enumerate(r.color_palette):
+            weights[name] = weights.get(name, 0.0) + 1.0 / (rank + 1)
+    palette = [name for name, _ in sorted(weights.items(), key=lambda kv: kv[1], reverse=True)]
+
+    return BatchAnalyzeSummary(
+        images=total,
+        analyzed=sum(1 for r in results if r.analysis is not None),
+        dominant_skin_tone=dominant,
+        color_palette=palette[:palette_size],
+    )
+
 
 def _enrich_with_confidence(outfits: list[ScoredOutfit], profile: UserProfile) -> list[ScoredOutfit]:
     """Compute confidence score and explanation for each outfit."""
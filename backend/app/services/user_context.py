@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Any, Iterable
+
+import anyio
+
+from ..repositories.base import HistoryStore, PreferenceStore, SavedOutfitStore
+from ..repositories.preferences import PreferenceEvent, PreferenceSnapshot
+from .diversity import DiversityEngine
+from .user_memory import UserMemoryEngine, UserProfile
+
+
+HISTORY_LIMIT = 50
+SAVED_LIMIT = 100
+PROFILE_TOP_N = 5
+# Aggregate rows read per kind. Colours / vibes / occasions read deeper than
+# the profile's top-N so in-memory updates can promote a runner-up.
+AGGREGATE_LIMITS = {
+    "color": PROFILE_TOP_N * 4,
+    "vibe": PROFILE_TOP_N * 4,
+    "occasion": PROFILE_TOP_N * 4,
+    "liked": SAVED_LIMIT,
+}
+
+
+@dataclass(frozen=True)
+class UserContext:
+    """Everything /recommend needs from a user's stored data, already decoded and derived."""
+
+    history_payloads: list[dict[str, Any]]
+    saved: list[tuple[str, dict[str, Any]]]  # (outfit_id, payload), newest first; only without aggregates
+    profile: UserProfile
+    history_features: list[set[str]]
+    preferences: PreferenceSnapshot | None = None
+
+    @property
+    def saved_payloads(self) -> list[dict[str, Any]]:
+        return [payload for _oid, payload in self.saved]
+
+
+class UserContextCache:
+    """
+    Per-user, in-process cache of decoded recent history, the UserProfile and
+    diversity features.
+
+    With `preferences`, the profile comes from the materialized aggregates
+    (one indexed read) instead of recounting saved outfits; otherwise saved
+    outfits are loaded and counted as before.
+
+    Kept current by repository listeners: a new history entry or saved outfit
+    is applied in place and the profile rebuilt from memory, so an active
+    user's repeat recommendations need no database round trips. A miss runs
+    its queries concurrently. Entries expire `ttl_seconds` after they were
+    loaded; in-place updates keep that expiry, so writes made by other server
+    processes (or imports and rebalancing) show up after at most one TTL
+    even for users who stay active.
+    """
+
+    def __init__(
+        self,
+        history_repo: HistoryStore,
+        saved_repo: SavedOutfitStore | None,
+        memory: UserMemoryEngine,
+        diversity: DiversityEngine,
+        max_users: int = 1024,
+        ttl_seconds: float = 300.0,
+        preferences: PreferenceStore | None = None,
+    ):
+        self._history = history_repo
+        self._saved = saved_repo
+        self._preferences = preferences
+        self._memory = memory
+        self._diversity = diversity
+        self._max_users = max(1, int(max_users))
+        self._ttl = float(ttl_seconds)
+        self._entries: OrderedDict[str, tuple[float, UserContext]] = OrderedDict()
+        # Loads in flight per user, and users written to while one was: such a
+        # load may have read pre-write rows, so its result is returned but not cached.
+        self._loading: dict[str, int] = {}
+        self._dirty: set[str] = set()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+        history_repo.add_listener(self._on_history_added)
+        if saved_repo is not None:
+            saved_repo.add_listener(self._on_saved_changed)
+
+    async def get(self, user_id: str) -> UserContext:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(user_id)
+                self._hits += 1
+                return entry[1]
+            self._misses += 1
+            self._loading[user_id] = self._loading.get(user_id, 0) + 1
+
+        try:
+            context = await self._load(user_id)
+        finally:
+            with self._lock:
+                stale = user_id in self._dirty
+                remaining = self._loading[user_id] - 1
+                if remaining:
+                    self._loading[user_id] = remaining
+                else:
+                    del self._loading[user_id]
+                    self._dirty.discard(user_id)
+
+        if not stale:
+            with self._lock:
+                self._store(user_id, context)
+        return context
+
+    def invalidate(self, user_ids: Iterable[str]) -> None:
+        """Drop cached contexts, e.g. after a bulk import that bypassed the listeners."""
+        with self._lock:
+            for user_id in user_ids:
+                self._mark_written(user_id)
+                self._entries.pop(user_id, None)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "users": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / total, 4) if total else 0.0,
+            }
+
+    async def _load(self, user_id: str) -> UserContext:
+        history_rows: list = []
+        saved_rows: list = []
+        snapshot: list[PreferenceSnapshot] = []
+
+        async def _history() -> None:
+            history_rows.extend(await self._history.list_recent(user_id, limit=HISTORY_LIMIT))
+
+        async def _saved() -> None:
+            if self._preferences is not None:
+                snapshot.append(await self._preferences.top(user_id, AGGREGATE_LIMITS))
+            elif self._saved is not None:
+                saved_rows.extend(await self._saved.list_for_user(user_id, limit=SAVED_LIMIT))
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(_history)
+            tg.start_soon(_saved)
+
+        return self._build(
+            [r.payload for r in history_rows],
+            [(r.outfit_id, r.payload) for r in saved_rows],
+            snapshot[0] if snapshot else None,
+        )
+
+    def _build(
+        self,
+        history_payloads: list[dict[str, Any]],
+        saved: list[tuple[str, dict[str, Any]]],
+        preferences: PreferenceSnapshot | None,
+    ) -> UserContext:
+        if preferences is not None:
+            profile = self._memory.profile_from_aggregates(preferences, history_payloads, PROFILE_TOP_N)
+        else:
+            profile = self._memory.build_profile(history_payloads, [p for _oid, p in saved], PROFILE_TOP_N)
+        return UserContext(
+            history_payloads=history_payloads,
+            saved=saved,
+            profile=profile,
+            history_features=self._diversity.history_features(history_payloads),
+            preferences=preferences,
+        )
+
+    def _advance(self, context: UserContext, event: PreferenceEvent) -> PreferenceSnapshot | None:
+        if context.preferences is None or self._preferences is None:
+            return None
+        return self._preferences.advance(context.preferences, event)
+
+    def _store(self, user_id: str, context: UserContext, expires_at: float | None = None) -> None:
+        """Cache `context`; a fresh load gets a full TTL, in-place updates pass the entry's `expires_at`."""
+        self._entries[user_id] = (time.monotonic() + self._ttl if expires_at is None else expires_at, context)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self._max_users:
+            self._entries.popitem(last=False)
+
+    def _mark_written(self, user_id: str) -> tuple[float, UserContext] | None:
+        """The user's live (expires_at, context) entry, if any; flags in-flight loads as stale."""
+        if user_id in self._loading:
+            self._dirty.add(user_id)
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[user_id]
+            return None
+        return entry
+
+    def _on_history_added(self, user_id: str, payload: dict[str, Any]) -> None:
+        with self._lock:
+            entry = self._mark_written(user_id)
+            if entry is None:
+                return
+            expires_at, context = entry
+            history = [payload, *context.history_payloads][:HISTORY_LIMIT]
+            preferences = self._advance(context, PreferenceEvent(user_id, "history", payload, time.time()))
+            self._store(user_id, self._build(history, context.saved, preferences), expires_at)
+
+    def _on_saved_changed(self, user_id: str, outfit_id: str, payload: dict[str, Any] | None, replaced: bool) -> None:
+        with self._lock:
+            entry = self._mark_written(user_id)
+            if entry is None:
+                return
+            expires_at, context = entry
+            if context.preferences is not None:
+                if payload is None or replaced:
+                    # The removed row's payload and time are not known here; reload on next use.
+                    del self._entries[user_id]
+                    return
+                preferences = self._advance(context, PreferenceEvent(user_id, "saved", payload, time.time()))
+                self._store(user_id, self._build(context.history_payloads, context.saved, preferences), expires_at)
+                return
+            saved = [(oid, p) for oid, p in context.saved if oid != outfit_id]
+            if payload is not None:
+                saved = [(outfit_id, payload), *saved][:SAVED_LIMIT]
+            profile = self._memory.build_profile(context.history_payloads, [p for _oid, p in saved], PROFILE_TOP_N)
+            self._store(user_id, replace(context, saved=saved, profile=profile), expires_at)
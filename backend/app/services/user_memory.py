@@ -6,6 +6,8 @@ from collections import Counter
 from dataclasses import dataclass, field
 from typing import Any
 
+from ..repositories.preferences import PreferenceSnapshot, PreferenceSource
+
 
 @dataclass(frozen=True)
 class UserProfile:
@@ -39,7 +41,7 @@ class UserProfile:
 
 
 class UserMemoryEngine:
-    """Builds a *UserProfile* from raw history + saved-outfit payloads."""
+    """Builds a *UserProfile* from raw history + saved-outfit payloads, or from stored aggregates."""
 
     def build_profile(
         self,
@@ -47,46 +49,80 @@ class UserMemoryEngine:
         saved_payloads: list[dict[str, Any]],
         top_n: int = 5,
     ) -> UserProfile:
-        color_counter: Counter[str] = Counter()
-        vibe_counter: Counter[str] = Counter()
-        occasion_counter: Counter[str] = Counter()
-        liked_ids: set[str] = set()
-        past_ids: set[str] = set()
-
-        # --- Saved / liked outfits (stronger signal, weight ×2) ---
-        for p in saved_payloads:
-            oid = _safe_str(p.get("outfit_id") or p.get("id"))
-            if oid:
-                liked_ids.add(oid)
-            for c in _extract_colors(p):
-                color_counter[c] += 2
-            for t in _extract_tags(p):
-                vibe_counter[t] += 2
-
-        # --- Past recommendations (normal weight) ---
-        for p in history_payloads:
-            oid = _safe_str(p.get("outfit_id"))
-            if oid:
-                past_ids.add(oid)
-            for c in _extract_colors(p):
-                color_counter[c] += 1
-            for t in _extract_tags(p):
-                vibe_counter[t] += 1
-            ctx = p.get("context")
-            if isinstance(ctx, dict):
-                occ = _safe_str(ctx.get("occasion"))
-                if occ:
-                    occasion_counter[occ] += 1
+        counters: dict[str, Counter[str]] = {}
+        for source, payloads in (("saved", saved_payloads), ("history", history_payloads)):
+            for p in payloads:
+                for kind, values in preference_features(source, p).items():
+                    counters.setdefault(kind, Counter()).update(values)
+
+        def _top(kind: str) -> list[str]:
+            return [v for v, _ in counters.get(kind, Counter()).most_common(top_n)]
 
         return UserProfile(
-            frequent_colors=[c for c, _ in color_counter.most_common(top_n)],
-            frequent_vibes=[v for v, _ in vibe_counter.most_common(top_n)],
-            frequent_occasions=[o for o, _ in occasion_counter.most_common(top_n)],
-            liked_outfit_ids=liked_ids,
-            past_outfit_ids=past_ids,
+            frequent_colors=_top("color"),
+            frequent_vibes=_top("vibe"),
+            frequent_occasions=_top("occasion"),
+            liked_outfit_ids=set(counters.get("liked", ())),
+            past_outfit_ids=past_outfit_ids(history_payloads),
             total_interactions=len(history_payloads) + len(saved_payloads),
         )
 
+    def profile_from_aggregates(
+        self, snapshot: PreferenceSnapshot, history_payloads: list[dict[str, Any]], top_n: int = 5
+    ) -> UserProfile:
+        """
+        Profile from the materialized counters (see PreferenceRepository).
+        `past_outfit_ids` still comes from `history_payloads`, the user's most
+        recent recommendations, not from all-time counts.
+        """
+        return UserProfile(
+            frequent_colors=snapshot.ranked("color", top_n),
+            frequent_vibes=snapshot.ranked("vibe", top_n),
+            frequent_occasions=snapshot.ranked("occasion", top_n),
+            liked_outfit_ids=set(snapshot.scores.get("liked", ())),
+            past_outfit_ids=past_outfit_ids(history_payloads),
+            total_interactions=snapshot.interactions,
+        )
+
+
+def past_outfit_ids(history_payloads: list[dict[str, Any]]) -> set[str]:
+    """Outfit ids of the given (recent) history payloads."""
+    return {oid for p in history_payloads if (oid := _safe_str(p.get("outfit_id")))}
+
+
+def preference_features(source: PreferenceSource, payload: dict[str, Any]) -> dict[str, dict[str, float]]:
+    """
+    Weighted preference signals carried by one payload. Saved / liked outfits
+    are the stronger signal (colours and tags weigh 2); past recommendations
+    weigh 1 and also carry the occasion they were made for. Which outfits
+    were recommended before is not a counter: it is read from recent history
+    (see past_outfit_ids).
+    """
+    features: dict[str, dict[str, float]] = {}
+
+    def _add(kind: str, value: str, weight: float) -> None:
+        bucket = features.setdefault(kind, {})
+        bucket[value] = bucket.get(value, 0.0) + weight
+
+    if source == "saved":
+        weight = 2.0
+        oid = _safe_str(payload.get("outfit_id") or payload.get("id"))
+        if oid:
+            _add("liked", oid, 1.0)
+    else:
+        weight = 1.0
+        ctx = payload.get("context")
+        if isinstance(ctx, dict):
+            occ = _safe_str(ctx.get("occasion"))
+            if occ:
+                _add("occasion", occ, 1.0)
+
+    for c in _extract_colors(payload):
+        _add("color", c, weight)
+    for t in _extract_tags(payload):
+        _add("vibe", t, weight)
+    return features
+
 
 # ── helpers ──────────────────────────────────────────────────────────────
 
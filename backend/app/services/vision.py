@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import Any, BinaryIO, Iterator
+
+import anyio
+
+from ..core.errors import DependencyMissingError
+from ..models.schemas import FaceBox, QualityTier, SkinTone
+from ..utils.images import decode_image_bytes_to_bgr, extract_color_palette_labels
+from .face_detection import FaceDetector
+from .skin_tone import SkinToneDetector
+
+
+@dataclass(frozen=True)
+class FrameAnalysis:
+    """The small, picklable result of running the vision stages on one frame."""
+
+    faces: list[FaceBox]
+    skin_tone: SkinTone | None
+    color_palette: list[str] = field(default_factory=list)
+    quality_tier: QualityTier = "full"
+
+
+QUALITY_TIERS: tuple[QualityTier, ...] = ("full", "reduced", "skin_only")
+
+
+def analyze_frame(
+    bgr, faces: FaceDetector, skin: SkinToneDetector, tier: QualityTier = "full", reduced_max_side: int = 960
+) -> FrameAnalysis:
+    """
+    Run detection, skin tone and palette extraction on one BGR frame.
+
+    `reduced` works on a copy downscaled to `reduced_max_side` with a single
+    k-means attempt; `skin_only` also skips the palette. Face boxes are always
+    reported in the coordinates of the original frame.
+    """
+    work, scale = bgr, 1.0
+    if tier != "full":
+        work, scale = _downscale(bgr, reduced_max_side)
+
+    det = faces.detect(work)
+    dominant = None
+    if det.faces:
+        dominant = skin.detect(work, det.faces[0]).skin_tone
+
+    palette: list[str] = []
+    if tier != "skin_only":
+        # Attach coarse color palette labels for downstream outfit ranking.
+        try:
+            palette = extract_color_palette_labels(work, attempts=3 if tier == "full" else 1)
+        except DependencyMissingError:
+            palette = []
+
+    boxes = det.faces if scale == 1.0 else [_unscale_box(f, scale) for f in det.faces]
+    return FrameAnalysis(faces=boxes, skin_tone=dominant, color_palette=palette, quality_tier=tier)
+
+
+class VisionLoadGovernor:
+    """
+    Chooses a QualityTier per image from vision backlog and an optional deadline.
+
+    Backlog is the number of analyses waiting for a worker, per worker. Below
+    `reduced_at` everything runs at full quality; from there to `skin_only_at`
+    images are reduced; beyond that only skin tone is computed. With a
+    deadline, the best tier whose estimated queue wait plus service time (an
+    EWMA of observed latencies per tier) fits is used instead, never better
+    than what the load allows.
+    """
+
+    def __init__(self, workers: int, enabled: bool = True, reduced_at: float = 1.0, skin_only_at: float = 3.0):
+        self._workers = max(1, int(workers))
+        self._enabled = bool(enabled)
+        self._reduced_at = float(reduced_at)
+        self._skin_only_at = float(skin_only_at)
+        self._inflight = 0
+        self._cost_ms: dict[str, float] = {}
+
+    @property
+    def backlog(self) -> float:
+        return max(0, self._inflight - self._workers) / self._workers
+
+    def choose(self, deadline_ms: float | None = None) -> QualityTier:
+        if not self._enabled:
+            return "full"
+        backlog = self.backlog
+        if backlog < self._reduced_at:
+            floor = 0
+        elif backlog < self._skin_only_at:
+            floor = 1
+        else:
+            floor = 2
+        if deadline_ms is None:
+            return QUALITY_TIERS[floor]
+
+        for tier in QUALITY_TIERS[floor:]:
+            cost = self._cost_ms.get(tier)
+            if cost is None or cost * (1.0 + backlog) <= deadline_ms:
+                return tier
+        return "skin_only"
+
+    @contextmanager
+    def track(self, tier: QualityTier) -> Iterator[None]:
+        self._inflight += 1
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self._inflight -= 1
+            if ok:
+                elapsed = (time.perf_counter() - start) * 1000
+                prev = self._cost_ms.get(tier)
+                self._cost_ms[tier] = elapsed if prev is None else 0.8 * prev + 0.2 * elapsed
+
+
+class SharedFrameRing:
+    """
+    A fixed ring of shared-memory slots, each holding one decoded BGR frame.
+
+    Slots are handed out in FIFO order and returned after the worker is done,
+    so the same few segments are reused for the life of the process.
+    """
+
+    def __init__(self, slots: int, slot_bytes: int):
+        self.slot_bytes = int(slot_bytes)
+        self._segments = [shared_memory.SharedMemory(create=True, size=self.slot_bytes) for _ in range(slots)]
+        self._free: deque[int] = deque(range(slots))
+        self._available = anyio.Semaphore(slots)
+
+    def name(self, slot: int) -> str:
+        return self._segments[slot].name
+
+    def view(self, slot: int, height: int, width: int):
+        import numpy as np  # type: ignore
+
+        return np.ndarray((height, width, 3), dtype=np.uint8, buffer=self._segments[slot].buf)
+
+    async def acquire(self) -> int:
+        await self._available.acquire()
+        return self._free.popleft()
+
+    def release(self, slot: int) -> None:
+        self._free.append(slot)
+        self._available.release()
+
+    def close(self) -> None:
+        for seg in self._segments:
+            seg.close()
+            try:
+                seg.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class ProcessVisionPool:
+    """
+    Runs detection, skin tone and palette extraction in worker processes.
+
+    The parent decodes each image straight into a shared-memory slot (decode
+    releases the GIL, so it stays on threads); workers map the slot and send
+    back only a FrameAnalysis. Frames bigger than a slot are analyzed on a
+    local thread instead.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        slot_bytes: int,
+        face_engine: str = "haar",
+        face_model_dir: str | None = None,
+        reduced_max_side: int = 960,
+    ):
+        self._workers = int(workers)
+        self._reduced_max_side = int(reduced_max_side)
+        self._ring = SharedFrameRing(slots=self._workers * 2, slot_bytes=slot_bytes)
+        self._decode_limiter = anyio.CapacityLimiter(self._workers * 2)
+        # spawn: the parent has live threads (event loop, anyio workers) that fork would not copy safely.
+        self._executor = ProcessPoolExecutor(
+            max_workers=self._workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_worker_init,
+            initargs=(face_engine, face_model_dir),
+        )
+        self._local_faces = FaceDetector(engine=face_engine, model_dir=face_model_dir)
+        self._local_skin = SkinToneDetector()
+
+    async def analyze(
+        self, image: bytes | memoryview | BinaryIO, max_pixels: int | None = None, tier: QualityTier = "full"
+    ) -> FrameAnalysis:
+        slot = await self._ring.acquire()
+        try:
+            bgr, in_slot = await anyio.to_thread.run_sync(
+                self._decode_into_slot, image, slot, max_pixels, limiter=self._decode_limiter
+            )
+            if not in_slot:
+                return await anyio.to_thread.run_sync(
+                    analyze_frame,
+                    bgr,
+                    self._local_faces,
+                    self._local_skin,
+                    tier,
+                    self._reduced_max_side,
+                    limiter=self._decode_limiter,
+                )
+            height, width = int(bgr.shape[0]), int(bgr.shape[1])
+            del bgr
+            future = self._executor.submit(
+                _analyze_slot, self._ring.name(slot), height, width, tier, self._reduced_max_side
+            )
+            # The worker is reading the slot; never hand it out again before it is done.
+            with anyio.CancelScope(shield=True):
+                return await asyncio.wrap_future(future)
+        finally:
+            self._ring.release(slot)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._ring.close()
+
+    def _decode_into_slot(self, image: bytes | memoryview | BinaryIO, slot: int, max_pixels: int | None) -> tuple[Any, bool]:
+        in_slot = [True]
+
+        def _out(height: int, width: int):
+            if height * width * 3 > self._ring.slot_bytes:
+                in_slot[0] = False
+                return None
+            return self._ring.view(slot, height, width)
+
+        bgr = decode_image_bytes_to_bgr(image, max_pixels=max_pixels, out=_out)
+        return bgr, in_slot[0]
+
+
+def _downscale(bgr, max_side: int) -> tuple[Any, float]:
+    h, w = int(bgr.shape[0]), int(bgr.shape[1])
+    if max(h, w) <= max_side:
+        return bgr, 1.0
+    import cv2  # type: ignore
+
+    scale = max_side / float(max(h, w))
+    small = cv2.resize(bgr, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+    return small, scale
+
+
+def _unscale_box(face: FaceBox, scale: float) -> FaceBox:
+    return FaceBox(
+        x=int(round(face.x / scale)),
+        y=int(round(face.y / scale)),
+        w=int(round(face.w / scale)),
+        h=int(round(face.h / scale)),
+        confidence=face.confidence,
+    )
+
+
+# ── worker process side ─────────────────────────────────────────────────
+
+_worker_faces: FaceDetector | None = None
+_worker_skin: SkinToneDetector | None = None
+_worker_segments: dict[str, shared_memory.SharedMemory] = {}
+
+
+def _worker_init(face_engine: str, face_model_dir: str | None) -> None:
+    global _worker_faces, _worker_skin
+    try:
+        import cv2  # type: ignore
+
+        # One process per core already; OpenCV's own thread pool would oversubscribe.
+        cv2.setNumThreads(1)
+    except ModuleNotFoundError:
+        pass
+    _worker_faces = FaceDetector(engine=face_engine, model_dir=face_model_dir)
+    _worker_skin = SkinToneDetector()
+
+
+def _analyze_slot(
+    segment_name: str, height: int, width: int, tier: QualityTier = "full", reduced_max_side: int = 960
+) -> FrameAnalysis:
+    import numpy as np  # type: ignore
+
+    seg = _worker_segments.get(segment_name)
+    if seg is None:
+        # Spawned workers share the parent's resource tracker, so attaching
+        # does not hand ownership over; the parent unlinks on close().
+        seg = shared_memory.SharedMemory(name=segment_name)
+        _worker_segments[segment_name] = seg
+    bgr = np.ndarray((height, width, 3), dtype=np.uint8, buffer=seg.buf)
+    return analyze_frame(bgr, _worker_faces, _worker_skin, tier, reduced_max_side)  # type: ignore[arg-type]
+
@@ -2,9 +2,9 @@ from __future__ import annotations
 
 import base64
 import io
-from typing import Any, List
+from typing import Any, BinaryIO, Callable, List
 
-from ..core.errors import DependencyMissingError, InvalidInputError
+from ..core.errors import DependencyMissingError, InvalidInputError, PayloadTooLargeError
 
 
 def _require_numpy_cv2_pil() -> tuple[Any, Any, Any]:
@@ -23,39 +23,116 @@ def _require_numpy_cv2_pil() -> tuple[Any, Any, Any]:
     return np, cv2, Image
 
 
-def decode_image_bytes_to_bgr(image_bytes: bytes):
+def decode_image_bytes_to_bgr(
+    image_bytes: bytes | memoryview | BinaryIO,
+    max_pixels: int | None = None,
+    out: Callable[[int, int], Any] | None = None,
+):
     """
     Decode common image formats into OpenCV BGR ndarray.
     Lazy-imports numpy/cv2/PIL so server can start without them.
+
+    Accepts raw bytes, a readable binary file (e.g. a spooled upload) or a
+    memoryview (decoded without copying), and refuses images above
+    `max_pixels` before the pixel data is decoded.
+
+    `out(height, width)` may return a preallocated uint8 (h, w, 3) array (e.g.
+    backed by shared memory) to receive the pixels; returning None falls back
+    to a fresh allocation.
     """
     np, cv2, Image = _require_numpy_cv2_pil()
+    if isinstance(image_bytes, (bytearray, memoryview)):
+        return _decode_buffer_to_bgr(image_bytes, max_pixels, out)
+    fp = io.BytesIO(image_bytes) if isinstance(image_bytes, bytes) else image_bytes
+    try:
+        img = Image.open(fp)
+    except Exception as e:
+        raise InvalidInputError(f"Could not decode image: {e}") from e
+    if max_pixels is not None and img.width * img.height > max_pixels:
+        raise PayloadTooLargeError(f"Image is {img.width}x{img.height} (max {max_pixels} pixels)")
     try:
-        img = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+        img = img.convert("RGB")
     except Exception as e:
         raise InvalidInputError(f"Could not decode image: {e}") from e
     rgb = np.array(img)
+    dst = out(rgb.shape[0], rgb.shape[1]) if out else None
+    if dst is not None:
+        return cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR, dst=dst)
     bgr = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
     return bgr
 
 
-def decode_base64_image_to_bgr(image_base64: str):
+def _decode_buffer_to_bgr(buf: bytearray | memoryview, max_pixels: int | None, out: Callable[[int, int], Any] | None = None):
+    # Zero-copy path: numpy views the caller's buffer and OpenCV decodes from it.
+    np, cv2, _Image = _require_numpy_cv2_pil()
+    from .uploads import sniff_image_header
+
+    header = sniff_image_header(bytes(buf[:65536]))
+    if header is None:
+        raise InvalidInputError("Could not decode image: unsupported format")
+    if max_pixels is not None and header.width and header.height and header.width * header.height > max_pixels:
+        raise PayloadTooLargeError(f"Image is {header.width}x{header.height} (max {max_pixels} pixels)")
+    bgr = cv2.imdecode(np.frombuffer(buf, dtype=np.uint8), cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION)
+    if bgr is None:
+        # Formats OpenCV was built without (e.g. GIF) go through PIL instead.
+        return decode_image_bytes_to_bgr(bytes(buf), max_pixels=max_pixels, out=out)
+    dst = out(bgr.shape[0], bgr.shape[1]) if out else None
+    if dst is not None:
+        np.copyto(dst, bgr)
+        return dst
+    return bgr
+
+
+def decode_base64_in_place(buf: bytearray, start: int, end: int, chunk_chars: int = 64 * 1024) -> memoryview:
+    """
+    Base64-decode buf[start:end] into the same buffer and return a view of the result.
+
+    Decoded output never overtakes the input read position, so decoding in
+    fixed chunks lets the request body double as the image buffer. A
+    `data:...;base64,` prefix is skipped.
+    """
+    comma = buf.find(b",", start, min(end, start + 128))
+    if comma != -1:
+        start = comma + 1
+    if (end - start) % 4:
+        raise InvalidInputError("Invalid base64 image: length is not a multiple of 4")
+
+    chunk_chars -= chunk_chars % 4
+    view = memoryview(buf)
+    out = start
+    try:
+        for pos in range(start, end, chunk_chars):
+            decoded = base64.b64decode(view[pos : min(end, pos + chunk_chars)], validate=True)
+            view[out : out + len(decoded)] = decoded
+            out += len(decoded)
+    except Exception as e:
+        raise InvalidInputError(f"Invalid base64 image: {e}") from e
+    return view[start:out]
+
+
+def decode_base64_image_bytes(image_base64: str) -> bytes:
     if "," in image_base64:
         # allow data URLs
         image_base64 = image_base64.split(",", 1)[1]
     try:
-        raw = base64.b64decode(image_base64, validate=True)
+        return base64.b64decode(image_base64, validate=True)
     except Exception as e:
         raise InvalidInputError(f"Invalid base64 image: {e}") from e
-    return decode_image_bytes_to_bgr(raw)
 
 
-def extract_color_palette_labels(bgr_image, k: int = 4) -> List[str]:
+def decode_base64_image_to_bgr(image_base64: str, max_pixels: int | None = None):
+    return decode_image_bytes_to_bgr(decode_base64_image_bytes(image_base64), max_pixels=max_pixels)
+
+
+def extract_color_palette_labels(bgr_image, k: int = 4, attempts: int = 3) -> List[str]:
     """
     Extract a small set of dominant color labels from a BGR image.
 
     This is a lightweight k-means over pixels with coarse bucketing into
     human-friendly names that align with the outfit scoring engine, e.g.
     "black", "beige", "olive", "white", "grey", "navy", "light-blue".
+    `attempts` is the number of k-means restarts; 1 is ~3x cheaper and only
+    occasionally reorders close colours.
     """
     np, cv2, Image = _require_numpy_cv2_pil()
 
@@ -81,7 +158,7 @@ def extract_color_palette_labels(bgr_image, k: int = 4) -> List[str]:
     K = max(2, min(k, data.shape[0]))
     criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 15, 1.0)
     _ret, labels, centers = cv2.kmeans(
-        data, K, None, criteria, 3, cv2.KMEANS_PP_CENTERS
+        data, K, None, criteria, max(1, int(attempts)), cv2.KMEANS_PP_CENTERS
     )
 
     centers = centers.astype("uint8")
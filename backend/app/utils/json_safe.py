@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import json
+import re
 from dataclasses import dataclass
 from typing import Any, TypeVar
 
@@ -64,3 +65,75 @@ def safe_parse_model(value: Any, model_type: type[BaseModel]) -> tuple[BaseModel
     parsed, err = safe_parse(value, model_type)
     return parsed, err
 
+
+
+_WS = re.compile(rb"\s*")
+# Characters that change nesting or start a string; everything else is skipped in one search.
+_STRUCTURE = re.compile(rb'["{}\[\]]')
+
+
+def lift_string_field(buf: bytearray, key: str) -> tuple[JsonParseResult, tuple[int, int] | None]:
+    """
+    Parse a JSON object while leaving one (potentially huge) string field in place.
+
+    Locates the raw contents of top-level `key` in `buf` without materializing
+    it, and parses the rest of the document with that value replaced by null.
+    Returns (parse_result, (start, end)) where buf[start:end] is the unescaped
+    string body. Falls back to a normal full parse with span None when the
+    field is absent, repeated, not a plain string, or contains escape sequences.
+    """
+    values = list(_top_level_values(buf, key.encode("utf-8")))
+    if len(values) == 1 and values[0] < len(buf) and buf[values[0]] == ord('"'):
+        quote = values[0]
+        start = quote + 1
+        end = _string_end(buf, start)
+        if end is not None and buf.find(b"\\", start, end) == -1:
+            rest = bytes(buf[:quote]) + b"null" + bytes(buf[end + 1 :])
+            parsed = safe_json_loads(rest)
+            if parsed.ok and isinstance(parsed.value, dict) and key in parsed.value and parsed.value[key] is None:
+                return parsed, (start, end)
+    return safe_json_loads(bytes(buf)), None
+
+
+def _top_level_values(buf: bytearray, key: bytes):
+    """Offsets of the values of every `key` member of the top-level object; stops at the first malformed token."""
+    pos = _WS.match(buf).end()
+    if pos >= len(buf) or buf[pos] != ord("{"):
+        return
+    depth = 0
+    while (m := _STRUCTURE.search(buf, pos)) is not None:
+        c = buf[m.start()]
+        if c == ord('"'):
+            start = m.end()
+            end = _string_end(buf, start)
+            if end is None:
+                return
+            pos = end + 1
+            if depth == 1:
+                colon = _WS.match(buf, pos).end()
+                # A string followed by ':' directly inside the top-level object is one of its keys.
+                if colon < len(buf) and buf[colon] == ord(":") and buf[start:end] == key:
+                    yield _WS.match(buf, colon + 1).end()
+        elif c in b"{[":
+            depth += 1
+            pos = m.end()
+        else:
+            depth -= 1
+            if depth <= 0:
+                return
+            pos = m.end()
+
+
+def _string_end(buf: bytearray, start: int) -> int | None:
+    """Offset of the quote closing the JSON string whose body starts at `start`."""
+    # bytes.find runs at memchr speed, which matters for multi-megabyte base64 strings.
+    pos = start
+    quote = buf.find(b'"', pos)
+    while quote != -1:
+        slash = buf.find(b"\\", pos, quote)
+        if slash == -1:
+            return quote
+        pos = slash + 2  # skip the escaped character
+        if pos > quote:
+            quote = buf.find(b'"', pos)
+    return None
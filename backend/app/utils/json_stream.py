@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from typing import Any, Iterable, Iterator
+
+from pydantic_core import to_json
+
+
+def json_text(value: Any) -> str:
+    """
+    `value` as compact JSON text for storage. NaN and infinities are written
+    as null; `json.dumps` would write `NaN` / `Infinity` tokens, which are
+    not JSON and would break responses that splice the stored text.
+    """
+    return to_json(value, inf_nan_mode="null").decode("utf-8")
+
+
+def json_object(fields: dict[str, Any], raw: dict[str, bytes | None] | None = None) -> bytes:
+    """
+    Serialize `fields` as a JSON object and append each `raw` value verbatim.
+
+    `raw` values must already be valid JSON documents (e.g. a stored
+    `payload_json` column); None is written as null. Keys must not repeat
+    between the two mappings.
+    """
+    body = to_json(fields)
+    if not raw:
+        return body
+    parts = [to_json(key) + b":" + (value if value is not None else b"null") for key, value in raw.items()]
+    spliced = b",".join(parts)
+    return body[:-1] + (b"," if len(body) > 2 else b"") + spliced + b"}"
+
+
+def json_array_chunks(
+    items: Iterable[bytes],
+    prefix: bytes = b"[",
+    suffix: bytes = b"]",
+    chunk_bytes: int = 64 * 1024,
+) -> Iterator[bytes]:
+    """
+    Yield `prefix`, the comma-separated `items` and `suffix`, coalesced into
+    chunks of about `chunk_bytes` for a StreamingResponse.
+    """
+    buf = bytearray(prefix)
+    first = True
+    for item in items:
+        if not first:
+            buf += b","
+        first = False
+        buf += item
+        if len(buf) >= chunk_bytes:
+            yield bytes(buf)
+            buf.clear()
+    buf += suffix
+    yield bytes(buf)
@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import os
+import struct
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Mapping
+
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..core.config import Settings
+from ..core.errors import InvalidInputError, PayloadTooLargeError
+
+
+# Enough to hold JPEG APPn/EXIF segments in front of the SOF marker for typical phone photos.
+SNIFF_BYTES = 64 * 1024
+# Multipart boundaries, part headers and the small form fields next to the files.
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+@dataclass(frozen=True)
+class UploadLimits:
+    max_bytes: int
+    max_pixels: int
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "UploadLimits":
+        return cls(
+            max_bytes=settings.max_upload_bytes,
+            max_pixels=settings.max_image_pixels,
+        )
+
+
+@dataclass(frozen=True)
+class ImageHeader:
+    format: str
+    width: int | None = None
+    height: int | None = None
+
+
+class ImageUpload:
+    """
+    A size-checked, format-sniffed image upload.
+
+    `file` is the upload's own spooled temp file (in memory for small
+    uploads, on disk above Starlette's 1 MiB spool size), rewound so it can
+    be handed straight to the decoder.
+    """
+
+    def __init__(self, file: BinaryIO, size: int, header: ImageHeader, filename: str | None = None):
+        self.file = file
+        self.size = size
+        self.header = header
+        self.filename = filename
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> "ImageUpload":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+async def read_image_upload(upload: Any, limits: UploadLimits) -> ImageUpload:
+    """
+    Validate an UploadFile and wrap its file without copying it.
+
+    Starlette has already received the part into `upload.file` while parsing
+    the form; `UploadBodyLimit` bounds how much of a request body is received
+    at all, the checks below bound what reaches the decoder:
+
+    - Rejects payloads larger than `max_bytes`
+    - Rejects payloads whose magic bytes are not a supported image
+    - Rejects images whose header dimensions exceed `max_pixels` before full decode
+    """
+    size = upload.size
+    if size is None:
+        size = upload.file.seek(0, os.SEEK_END)
+    if size > limits.max_bytes:
+        raise PayloadTooLargeError(f"Upload is {size} bytes (max {limits.max_bytes})")
+    if size == 0:
+        raise InvalidInputError("Empty upload")
+
+    await upload.seek(0)
+    header = _check_header(await upload.read(SNIFF_BYTES), limits)
+    await upload.seek(0)
+    return ImageUpload(upload.file, size, header, filename=upload.filename)
+
+
+def _check_header(head: bytes, limits: UploadLimits) -> ImageHeader:
+    header = sniff_image_header(head)
+    if header is None:
+        raise InvalidInputError("Unsupported image format (expected JPEG, PNG, WebP, GIF or BMP)")
+    if header.width is not None and header.height is not None:
+        if header.width <= 0 or header.height <= 0:
+            raise InvalidInputError("Invalid image dimensions")
+        if header.width * header.height > limits.max_pixels:
+            raise PayloadTooLargeError(
+                f"Image is {header.width}x{header.height} (max {limits.max_pixels} pixels)"
+            )
+    return header
+
+
+def sniff_image_header(head: bytes) -> ImageHeader | None:
+    """
+    Identify the image format from magic bytes and, where the header allows,
+    read the pixel dimensions without decoding. Returns None for non-images.
+    """
+    if head.startswith(b"\xff\xd8\xff"):
+        return ImageHeader("jpeg", *_jpeg_size(head))
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        if len(head) >= 24 and head[12:16] == b"IHDR":
+            w, h = struct.unpack(">II", head[16:24])
+            return ImageHeader("png", w, h)
+        return ImageHeader("png")
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return ImageHeader("webp", *_webp_size(head))
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        if len(head) >= 10:
+            w, h = struct.unpack("<HH", head[6:10])
+            return ImageHeader("gif", w, h)
+        return ImageHeader("gif")
+    if head[:2] == b"BM":
+        if len(head) >= 26:
+            w, h = struct.unpack("<ii", head[18:26])
+            return ImageHeader("bmp", w, abs(h))
+        return ImageHeader("bmp")
+    return None
+
+
+def _jpeg_size(head: bytes) -> tuple[int | None, int | None]:
+    i = 2
+    n = len(head)
+    while i + 9 < n:
+        if head[i] != 0xFF:
+            i += 1
+            continue
+        marker = head[i + 1]
+        if marker == 0xFF:
+            i += 1
+            continue
+        # Standalone markers carry no length field.
+        if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+        # SOF0..SOF15 except DHT (C4), JPG (C8) and DAC (CC).
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            h, w = struct.unpack(">HH", head[i + 5 : i + 9])
+            return w, h
+        if marker in (0xD9, 0xDA):
+            break
+        (seg_len,) = struct.unpack(">H", head[i + 2 : i + 4])
+        i += 2 + seg_len
+    return None, None
+
+
+def _webp_size(head: bytes) -> tuple[int | None, int | None]:
+    chunk = head[12:16]
+    if chunk == b"VP8 " and len(head) >= 30:
+        w, h = struct.unpack("<HH", head[26:30])
+        return w & 0x3FFF, h & 0x3FFF
+    if chunk == b"VP8L" and len(head) >= 25:
+        b = head[21:25]
+        w = 1 + (((b[1] & 0x3F) << 8) | b[0])
+        h = 1 + (((b[3] & 0x0F) << 10) | (b[2] << 2) | ((b[1] & 0xC0) >> 6))
+        return w, h
+    if chunk == b"VP8X" and len(head) >= 30:
+        w = 1 + int.from_bytes(head[24:27], "little")
+        h = 1 + int.from_bytes(head[27:30], "little")
+        return w, h
+    return None, None
+
+
+async def read_request_body(request: Any, max_bytes: int) -> bytearray:
+    """
+    Read a request body into a single buffer preallocated from Content-Length.
+
+    Unlike `await request.body()` this never holds the chunk list and the
+    joined copy at the same time, and it stops as soon as `max_bytes` is crossed.
+    """
+    declared = request.headers.get("content-length")
+    expected = int(declared) if declared and declared.isdigit() else 0
+    if expected > max_bytes:
+        raise PayloadTooLargeError(f"Request body is {expected} bytes (max {max_bytes})")
+
+    buf = bytearray(expected)
+    size = 0
+    async for chunk in request.stream():
+        n = len(chunk)
+        if size + n > max_bytes:
+            raise PayloadTooLargeError(f"Request body exceeds {max_bytes} bytes")
+        buf[size : size + n] = chunk
+        size += n
+    del buf[size:]
+    return buf
+
+
+def upload_body_limits(settings: Settings) -> dict[str, int]:
+    """Request body caps for `UploadBodyLimit`: `MAX_UPLOAD_BYTES` per file the route accepts, plus overhead."""
+    single = settings.max_upload_bytes + MULTIPART_OVERHEAD
+    return {
+        "/v1/analyze": single,
+        "/v1/analyze/batch": settings.max_upload_bytes * settings.analyze_batch_max_images + MULTIPART_OVERHEAD,
+        # Also takes a raw JSON body with the image base64-encoded (4/3 the size).
+        "/v1/recommend": settings.max_upload_bytes * 4 // 3 + MULTIPART_OVERHEAD,
+        "/v1/debug/boxes": single,
+    }
+
+
+class UploadBodyLimit:
+    """
+    ASGI middleware capping the request body of upload routes before the
+    form is parsed, so an oversized upload is never spooled to disk.
+
+    A declared Content-Length over the route's cap gets 413 without reading
+    the body. Otherwise bytes are counted as they are received, and the
+    request fails with 413 as soon as the count crosses the cap (chunked or
+    understated bodies).
+    """
+
+    def __init__(self, app: ASGIApp, limits: Mapping[str, int]):
+        self.app = app
+        self._limits = dict(limits)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        max_bytes = self._limits.get(scope["path"]) if scope["type"] == "http" and scope["method"] == "POST" else None
+        if max_bytes is None:
+            await self.app(scope, receive, send)
+            return
+
+        declared = dict(scope["headers"]).get(b"content-length", b"")
+        if declared.isdigit() and int(declared) > max_bytes:
+            response = JSONResponse(
+                status_code=413, content={"detail": f"Request body is {int(declared)} bytes (max {max_bytes})"}
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def _receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    # An HTTPException passes through FastAPI's form parsing unchanged.
+                    raise HTTPException(status_code=413, detail=f"Request body exceeds {max_bytes} bytes")
+            return message
+
+        await self.app(scope, _receive, send)
@@ -0,0 +1,139 @@
+"""
+Benchmark login throughput and the event-loop stall caused by bcrypt.
+
+Runs bursts of concurrent password verifications two ways:
+
+- `inline`: `verify_password` called directly in the coroutine, as the auth
+  endpoints used to, so every check blocks the event loop
+- `pool`: through PasswordHasher (bounded worker threads, bounded wait,
+  fast rejection), as the endpoints do now
+
+While a burst runs, a ticker coroutine sleeps `--tick-ms` in a loop and
+records how late it wakes up: that lag is what every other request on the
+same worker (recommendations, history reads) sees. Reports logins/s,
+accepted / rejected checks and tick lag p50 / p99 / max per case. Output is
+JSON so runs can be diffed between releases.
+
+    cd backend
+    python bench_auth.py > bench-auth.json
+    python bench_auth.py --concurrency 1 16 --logins 32 --rounds 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import time
+from typing import Any
+
+import anyio
+import bcrypt
+
+from app.core.errors import OverloadedError
+from app.core.security import PasswordHasher, verify_password
+
+
+CONCURRENCY = (1, 8, 32)
+PASSWORD = "correct horse battery staple"
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+async def run_case(mode: str, concurrency: int, logins: int, hashed: str, args: argparse.Namespace) -> dict[str, Any]:
+    hasher = PasswordHasher(
+        threads=args.threads, max_waiting=args.max_waiting, queue_timeout_ms=args.queue_timeout_ms
+    )
+    lags: list[float] = []
+    accepted = rejected = 0
+    done = anyio.Event()
+    remaining = iter(range(logins))
+
+    async def _ticker() -> None:
+        interval = args.tick_ms / 1000.0
+        while not done.is_set():
+            t0 = time.perf_counter()
+            await anyio.sleep(interval)
+            lags.append(max(0.0, time.perf_counter() - t0 - interval))
+
+    async def _client() -> None:
+        nonlocal accepted, rejected
+        for _ in remaining:
+            try:
+                if mode == "inline":
+                    ok = verify_password(PASSWORD, hashed)
+                else:
+                    ok = await hasher.verify(PASSWORD, hashed)
+            except OverloadedError:
+                rejected += 1
+                continue
+            assert ok
+            accepted += 1
+            # Yield like a real request would between its awaits.
+            await anyio.sleep(0)
+
+    t0 = time.perf_counter()
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(_ticker)
+        async with anyio.create_task_group() as clients:
+            for _ in range(concurrency):
+                clients.start_soon(_client)
+        done.set()
+    elapsed = time.perf_counter() - t0
+
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "logins": logins,
+        "accepted": accepted,
+        "rejected": rejected,
+        "seconds": round(elapsed, 3),
+        "logins_per_s": round(accepted / elapsed, 2),
+        "tick_lag_p50_ms": round(_percentile(lags, 0.50) * 1000, 2),
+        "tick_lag_p99_ms": round(_percentile(lags, 0.99) * 1000, 2),
+        "tick_lag_max_ms": round(max(lags, default=0.0) * 1000, 2),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=list(CONCURRENCY))
+    parser.add_argument("--logins", type=int, default=16, help="password checks per case")
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost of the test hash (gensalt default: 12)")
+    parser.add_argument("--modes", nargs="+", choices=["inline", "pool"], default=["inline", "pool"])
+    parser.add_argument("--threads", type=int, default=2, help="PasswordHasher threads")
+    parser.add_argument("--max-waiting", type=int, default=32, help="PasswordHasher queue bound")
+    parser.add_argument("--queue-timeout-ms", type=float, default=2000.0, help="PasswordHasher max wait")
+    parser.add_argument("--tick-ms", type=float, default=5.0, help="event-loop probe interval")
+    args = parser.parse_args()
+
+    hashed = bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt(rounds=args.rounds)).decode("utf-8")
+    results = [
+        anyio.run(run_case, mode, concurrency, max(args.logins, concurrency), hashed, args)
+        for mode in args.modes
+        for concurrency in args.concurrency
+    ]
+
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "bcrypt": bcrypt.__version__,
+            "bcrypt_rounds": args.rounds,
+            "cpus": os.cpu_count(),
+            "machine": platform.machine(),
+            "threads": args.threads,
+            "max_waiting": args.max_waiting,
+            "queue_timeout_ms": args.queue_timeout_ms,
+        },
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,156 @@
+"""
+Benchmark face-detection engines on a fixed image set.
+
+Reports per-engine latency (median / p95 per image and per megapixel) and
+detection agreement with a reference engine: IoU-matched precision / recall
+and how often the largest face (the one used for skin tone) matches.
+
+    cd backend
+    python bench_face_engines.py --engines haar yunet res10 --reference haar
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from app.core.errors import DependencyMissingError
+from app.models.schemas import FaceBox
+from app.services.face_detection import FaceDetector
+
+
+IMAGE_DIR = Path(__file__).resolve().parent.parent / "frontend" / "public" / "images"
+SCALES = (0.5, 1.0, 2.0)
+
+
+def load_image_set(image_dir: Path, scales: tuple[float, ...]) -> list[tuple[str, np.ndarray]]:
+    images: list[tuple[str, np.ndarray]] = []
+    for path in sorted(image_dir.iterdir()):
+        if path.suffix.lower() not in (".jpg", ".jpeg", ".png", ".webp"):
+            continue
+        bgr = cv2.imread(str(path), cv2.IMREAD_COLOR)
+        if bgr is None:
+            continue
+        for scale in scales:
+            resized = bgr if scale == 1.0 else cv2.resize(bgr, None, fx=scale, fy=scale, interpolation=cv2.INTER_LINEAR)
+            images.append((f"{path.name}@{scale}x", resized))
+    return images
+
+
+def iou(a: FaceBox, b: FaceBox) -> float:
+    x1, y1 = max(a.x, b.x), max(a.y, b.y)
+    x2, y2 = min(a.x + a.w, b.x + b.w), min(a.y + a.h, b.y + b.h)
+    inter = max(0, x2 - x1) * max(0, y2 - y1)
+    union = a.w * a.h + b.w * b.h - inter
+    return inter / union if union else 0.0
+
+
+def match_count(found: list[FaceBox], reference: list[FaceBox], threshold: float = 0.4) -> int:
+    used: set[int] = set()
+    matches = 0
+    for f in found:
+        best, best_iou = None, threshold
+        for i, r in enumerate(reference):
+            if i not in used and iou(f, r) >= best_iou:
+                best, best_iou = i, iou(f, r)
+        if best is not None:
+            used.add(best)
+            matches += 1
+    return matches
+
+
+def run_engine(name: str, images: list[tuple[str, np.ndarray]], repeat: int) -> dict:
+    detector = FaceDetector(engine=name)
+    detector.detect(images[0][1])  # warm-up: model load, per-thread state
+
+    per_image_ms: list[float] = []
+    per_mp_ms: list[float] = []
+    faces: dict[str, list[FaceBox]] = {}
+    for label, bgr in images:
+        megapixels = bgr.shape[0] * bgr.shape[1] / 1e6
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = detector.detect(bgr)
+            timings.append((time.perf_counter() - start) * 1000)
+        best = min(timings)
+        per_image_ms.append(best)
+        per_mp_ms.append(best / megapixels)
+        faces[label] = result.faces
+
+    return {
+        "engine": name,
+        "images": len(images),
+        "latency_ms_median": round(statistics.median(per_image_ms), 2),
+        "latency_ms_p95": round(_percentile(per_image_ms, 95), 2),
+        "latency_ms_per_megapixel": round(statistics.median(per_mp_ms), 2),
+        "_faces": faces,
+    }
+
+
+def agreement(found: dict[str, list[FaceBox]], reference: dict[str, list[FaceBox]]) -> dict:
+    tp = n_found = n_ref = primary_hits = primary_total = 0
+    for label, ref_faces in reference.items():
+        got = found.get(label, [])
+        tp += match_count(got, ref_faces)
+        n_found += len(got)
+        n_ref += len(ref_faces)
+        if ref_faces:
+            primary_total += 1
+            if got and iou(got[0], ref_faces[0]) >= 0.4:
+                primary_hits += 1
+    precision = tp / n_found if n_found else 1.0
+    recall = tp / n_ref if n_ref else 1.0
+    return {
+        "precision": round(precision, 3),
+        "recall": round(recall, 3),
+        "f1": round(2 * precision * recall / (precision + recall), 3) if precision + recall else 0.0,
+        "primary_face_agreement": round(primary_hits / primary_total, 3) if primary_total else None,
+    }
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--engines", nargs="+", default=["haar", "yunet", "res10"])
+    parser.add_argument("--reference", default="haar", help="engine whose detections count as ground truth")
+    parser.add_argument("--images", type=Path, default=IMAGE_DIR)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    images = load_image_set(args.images, SCALES)
+    if not images:
+        print(f"No images found in {args.images}", file=sys.stderr)
+        return 1
+
+    results: list[dict] = []
+    for name in dict.fromkeys([args.reference, *args.engines]):
+        try:
+            results.append(run_engine(name, images, args.repeat))
+        except DependencyMissingError as e:
+            results.append({"engine": name, "skipped": str(e)})
+
+    reference = next((r["_faces"] for r in results if r["engine"] == args.reference and "_faces" in r), None)
+    for r in results:
+        faces = r.pop("_faces", None)
+        if faces is not None and reference is not None:
+            r["agreement_vs_" + args.reference] = agreement(faces, reference)
+
+    print(json.dumps({"opencv": cv2.__version__, "results": results}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
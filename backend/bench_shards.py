@@ -0,0 +1,124 @@
+"""
+Benchmark history write throughput against the number of SQLite shards.
+
+For each SQLITE_SHARDS value, opens fresh storage in a temp directory and
+runs one concurrent writer per user, each calling `add_entry` in a loop
+(the `/v1/recommend` write path), then reports rows/s including the final
+flush and the p50 / p99 `add_entry` latency. Runs once with write-behind
+off (one transaction per row, the worst case for a shared write lock) and
+once with it on (group commit). Output is JSON so runs can be diffed
+between releases.
+
+    cd backend
+    python bench_shards.py > bench-shards.json
+    python bench_shards.py --shards 1 4 --users 128 --writes 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import anyio
+
+from app.core.config import Settings
+from app.repositories.factory import open_storage
+from app.services.outfit_scoring import OutfitCatalog
+from app.services.user_memory import preference_features
+
+
+SHARDS = (1, 2, 4, 8)
+MODES = {"direct": False, "write-behind": True}
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+async def run_case(shards: int, write_behind: bool, users: int, writes: int, catalog: OutfitCatalog) -> dict[str, Any]:
+    outfits = catalog.list_candidates()
+    with tempfile.TemporaryDirectory() as tmp:
+        settings = Settings.model_validate(
+            {
+                "DATABASE_PATH": str(Path(tmp) / "app.db"),
+                "SQLITE_SHARDS": shards,
+                "HISTORY_WRITE_BEHIND": write_behind,
+                "HISTORY_RETENTION_DAYS": 0,
+            }
+        )
+        storage = await open_storage(settings, outfits=catalog, preference_features=preference_features)
+        latencies: list[float] = []
+
+        async def _writer(user_id: str) -> None:
+            for i in range(writes):
+                outfit = outfits[i % len(outfits)]
+                payload = {**outfit.model_dump(), "score": 0.5, "context": {"occasion": "casual"}}
+                t0 = time.perf_counter()
+                await storage.history.add_entry(user_id, outfit.outfit_id, payload)
+                latencies.append(time.perf_counter() - t0)
+
+        try:
+            t0 = time.perf_counter()
+            async with anyio.create_task_group() as tg:
+                for u in range(users):
+                    tg.start_soon(_writer, f"bench_user_{u}")
+            await storage.history.flush()
+            elapsed = time.perf_counter() - t0
+        finally:
+            await storage.close()
+
+    rows = users * writes
+    return {
+        "shards": shards,
+        "write_behind": write_behind,
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_s": round(rows / elapsed, 1),
+        "add_entry_p50_ms": round(_percentile(latencies, 0.50) * 1000, 3),
+        "add_entry_p99_ms": round(_percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--shards", nargs="+", type=int, default=list(SHARDS))
+    parser.add_argument("--modes", nargs="+", choices=sorted(MODES), default=list(MODES))
+    parser.add_argument("--users", type=int, default=64, help="concurrent writers, one per user")
+    parser.add_argument("--writes", type=int, default=50, help="add_entry calls per user")
+    args = parser.parse_args()
+
+    catalog = OutfitCatalog()
+    results = []
+    for mode in args.modes:
+        baseline = None
+        for shards in args.shards:
+            result = anyio.run(run_case, shards, MODES[mode], args.users, args.writes, catalog)
+            baseline = baseline or result["rows_per_s"]
+            result["speedup"] = round(result["rows_per_s"] / baseline, 2)
+            results.append(result)
+
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "cpus": os.cpu_count(),
+            "machine": platform.machine(),
+            "users": args.users,
+            "writes_per_user": args.writes,
+        },
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
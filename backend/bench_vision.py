@@ -0,0 +1,253 @@
+"""
+Benchmark the vision pipeline stage by stage across resolutions and formats.
+
+Builds a deterministic image set (a seeded synthetic scene plus the bundled
+sample photo, resized to each target megapixel count and encoded as JPEG,
+PNG and WebP) and reports, per image:
+
+- p50 / p95 / p99 latency of decode, face detection, skin tone and palette
+- peak RSS of the case, and its growth over the warmed-up baseline
+
+then the end-to-end throughput of the full pipeline with 1 / 4 / 16
+concurrent workers. Every case and every throughput run executes in a
+fresh child process, so its peak RSS is its own rather than the high-water
+mark of whatever ran before. Output is JSON so runs can be diffed between
+releases.
+
+    cd backend
+    python bench_vision.py > bench-vision.json
+    python bench_vision.py --sizes 0.3 2 --formats jpeg --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from app.models.schemas import FaceBox
+from app.services.face_detection import FaceDetector
+from app.services.skin_tone import SkinToneDetector
+from app.services.vision import analyze_frame
+from app.utils.images import decode_image_bytes_to_bgr, extract_color_palette_labels
+
+
+SAMPLE_IMAGE = Path(__file__).resolve().parent.parent / "frontend" / "public" / "images" / "model-1.jpg"
+SIZES_MP = (0.3, 2.0, 12.0, 48.0)
+FORMATS = {
+    "jpeg": (".jpg", [cv2.IMWRITE_JPEG_QUALITY, 90]),
+    "png": (".png", [cv2.IMWRITE_PNG_COMPRESSION, 3]),
+    "webp": (".webp", [cv2.IMWRITE_WEBP_QUALITY, 90]),
+}
+WORKERS = (1, 4, 16)
+SEED = 1234
+
+
+def synthetic_scene(width: int, height: int, seed: int = SEED) -> np.ndarray:
+    """Gradient background, flat colour blocks and mild noise; the same bytes for the same seed and size."""
+    rng = np.random.default_rng(seed)
+    ys = np.linspace(0, 1, height, dtype=np.float32)[:, None]
+    xs = np.linspace(0, 1, width, dtype=np.float32)[None, :]
+    bgr = np.empty((height, width, 3), dtype=np.uint8)
+    bgr[..., 0] = (255 * xs * (1 - ys)).astype(np.uint8)
+    bgr[..., 1] = (255 * ys * 0.8).astype(np.uint8)
+    bgr[..., 2] = (255 * (1 - xs) * 0.9).astype(np.uint8)
+    for _ in range(12):
+        x, y = int(rng.integers(0, width)), int(rng.integers(0, height))
+        w, h = int(rng.integers(width // 20, width // 4)), int(rng.integers(height // 20, height // 4))
+        color = tuple(int(c) for c in rng.integers(0, 256, size=3))
+        cv2.rectangle(bgr, (x, y), (x + w, y + h), color, thickness=-1)
+    noise = rng.integers(-8, 9, size=(height, width, 1), dtype=np.int16)
+    return np.clip(bgr.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+
+def build_cases(sizes: list[float], formats: list[str]) -> list[dict]:
+    sample = cv2.imread(str(SAMPLE_IMAGE), cv2.IMREAD_COLOR)
+    aspect = sample.shape[1] / sample.shape[0] if sample is not None else 4 / 3
+
+    cases: list[dict] = []
+    for mp in sizes:
+        height = int(round((mp * 1e6 / aspect) ** 0.5))
+        width = int(round(height * aspect))
+        sources = {"synthetic": synthetic_scene(width, height)}
+        if sample is not None:
+            sources["sample"] = cv2.resize(sample, (width, height), interpolation=cv2.INTER_CUBIC)
+        for content, bgr in sources.items():
+            for fmt in formats:
+                ext, params = FORMATS[fmt]
+                ok, encoded = cv2.imencode(ext, bgr, params)
+                if not ok:
+                    continue
+                cases.append(
+                    {
+                        "content": content,
+                        "megapixels": mp,
+                        "format": fmt,
+                        "width": width,
+                        "height": height,
+                        "bytes": encoded.tobytes(),
+                    }
+                )
+    return cases
+
+
+def time_stages(case: dict, faces: FaceDetector, skin: SkinToneDetector, repeat: int) -> dict:
+    timings: dict[str, list[float]] = {"decode": [], "detect": [], "skin_tone": [], "palette": []}
+    face_count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        bgr = decode_image_bytes_to_bgr(case["bytes"])
+        timings["decode"].append(_ms_since(start))
+
+        start = time.perf_counter()
+        found = faces.detect(bgr).faces
+        timings["detect"].append(_ms_since(start))
+        face_count = len(found)
+
+        # Without a face, time skin tone on a centred box of typical selfie size.
+        box = found[0] if found else _center_box(bgr)
+        start = time.perf_counter()
+        skin.detect(bgr, box)
+        timings["skin_tone"].append(_ms_since(start))
+
+        start = time.perf_counter()
+        extract_color_palette_labels(bgr)
+        timings["palette"].append(_ms_since(start))
+        del bgr
+
+    return {
+        "content": case["content"],
+        "megapixels": case["megapixels"],
+        "format": case["format"],
+        "resolution": f"{case['width']}x{case['height']}",
+        "encoded_bytes": len(case["bytes"]),
+        "faces": face_count,
+        "stages_ms": {stage: _percentiles(values) for stage, values in timings.items()},
+        "total_ms_p50": round(sum(_percentile(v, 50) for v in timings.values()), 2),
+    }
+
+
+def measure_throughput(case: dict, faces: FaceDetector, skin: SkinToneDetector, workers: int, images: int) -> dict:
+    def _one(_i: int) -> None:
+        analyze_frame(decode_image_bytes_to_bgr(case["bytes"]), faces, skin)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(_one, range(min(workers, images))))  # warm per-thread detector state
+        start = time.perf_counter()
+        list(pool.map(_one, range(images)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "workers": workers,
+        "case": f"{case['content']}@{case['megapixels']}MP.{case['format']}",
+        "images": images,
+        "images_per_s": round(images / elapsed, 2),
+    }
+
+
+def run_isolated(kind: str, case: dict, engine: str, *args: int) -> dict:
+    """Run one stage-timing (`kind="stages"`) or throughput case in a fresh process and add its memory use."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(_isolated_case, kind, case, engine, *args).result()
+
+
+def _isolated_case(kind: str, case: dict, engine: str, *args: int) -> dict:
+    faces = FaceDetector(engine=engine)
+    skin = SkinToneDetector()
+    # Warm-up on a tiny image: cascade load, decoder and k-means init, not counted as the case's memory.
+    ok, tiny = cv2.imencode(".png", synthetic_scene(64, 64))
+    time_stages({**case, "bytes": tiny.tobytes()}, faces, skin, 1)
+    baseline = _peak_rss_mb()
+
+    if kind == "stages":
+        result = time_stages(case, faces, skin, *args)
+    else:
+        result = measure_throughput(case, faces, skin, *args)
+    peak = _peak_rss_mb()
+    result["peak_rss_mb"] = peak
+    result["rss_growth_mb"] = round(peak - baseline, 1)
+    return result
+
+
+def _center_box(bgr) -> FaceBox:
+    h, w = int(bgr.shape[0]), int(bgr.shape[1])
+    side = max(1, min(h, w) // 4)
+    return FaceBox(x=(w - side) // 2, y=(h - side) // 2, w=side, h=side, confidence=0.0)
+
+
+def _ms_since(start: float) -> float:
+    return (time.perf_counter() - start) * 1000
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+def _percentiles(values: list[float]) -> dict:
+    return {f"p{p}": round(_percentile(values, p), 2) for p in (50, 95, 99)}
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", nargs="+", type=float, default=list(SIZES_MP), help="megapixel targets")
+    parser.add_argument("--formats", nargs="+", choices=sorted(FORMATS), default=list(FORMATS))
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case")
+    parser.add_argument("--workers", nargs="+", type=int, default=list(WORKERS))
+    parser.add_argument("--throughput-mp", type=float, default=2.0, help="image size for the throughput runs")
+    parser.add_argument("--throughput-images", type=int, default=48)
+    parser.add_argument("--engine", default="haar", help="face detector engine")
+    args = parser.parse_args()
+
+    faces = FaceDetector(engine=args.engine)
+    cases = build_cases(args.sizes, args.formats)
+    if not cases:
+        print("No benchmark cases could be encoded", file=sys.stderr)
+        return 1
+
+    stages = [run_isolated("stages", case, args.engine, args.repeat) for case in cases]
+
+    throughput_case = next(
+        (c for c in cases if c["megapixels"] == args.throughput_mp and c["format"] == "jpeg" and c["content"] == "sample"),
+        cases[0],
+    )
+    throughput = [
+        run_isolated("throughput", throughput_case, args.engine, w, args.throughput_images) for w in args.workers
+    ]
+
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "opencv": cv2.__version__,
+            "numpy": np.__version__,
+            "cpus": os.cpu_count(),
+            "machine": platform.machine(),
+            "face_engine": faces.engine_name,
+            "seed": SEED,
+        },
+        "stages": stages,
+        "throughput": throughput,
+    }
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,131 @@
+"""
+Download the model files for the DNN face-detection engines and verify them
+against the checksums pinned in models/face_detection/SHA256SUMS.
+
+    cd backend
+    python fetch_face_models.py                 # every engine, into FACE_MODEL_DIR
+    python fetch_face_models.py --engines yunet
+    python fetch_face_models.py --pin           # record checksums not pinned yet
+
+A file whose SHA-256 differs from its pinned value is deleted and the run
+fails. A file without a pinned checksum is only kept with --pin, which
+records its hash in SHA256SUMS: check the file against upstream first, then
+commit SHA256SUMS so every later fetch is verified.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import urllib.request
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.core.config import get_settings
+from app.services.face_detection import DEFAULT_MODEL_DIR, RES10_MODEL, RES10_PROTOTXT, YUNET_MODEL
+
+
+SOURCES = {
+    YUNET_MODEL: "https://github.com/opencv/opencv_zoo/raw/main/models/face_detection_yunet/face_detection_yunet_2023mar.onnx",
+    RES10_PROTOTXT: "https://raw.githubusercontent.com/opencv/opencv/4.10.0/samples/dnn/face_detector/deploy.prototxt",
+    RES10_MODEL: (
+        "https://raw.githubusercontent.com/opencv/opencv_3rdparty/dnn_samples_face_detector_20170830/"
+        "res10_300x300_ssd_iter_140000.caffemodel"
+    ),
+}
+ENGINE_FILES = {"yunet": [YUNET_MODEL], "res10": [RES10_PROTOTXT, RES10_MODEL]}
+SUMS_FILE = DEFAULT_MODEL_DIR / "SHA256SUMS"
+
+
+def read_sums(path: Path) -> dict[str, str]:
+    sums: dict[str, str] = {}
+    if path.is_file():
+        for line in path.read_text().splitlines():
+            digest, _, name = line.strip().partition("  ")
+            if digest and name:
+                sums[name] = digest.lower()
+    return sums
+
+
+def write_sums(path: Path, sums: dict[str, str]) -> None:
+    path.write_text("".join(f"{digest}  {name}\n" for name, digest in sorted(sums.items())))
+
+
+def sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def download(url: str, dest: Path) -> None:
+    # Into a temp file next to the target, renamed only once complete.
+    fd, tmp = tempfile.mkstemp(dir=dest.parent, prefix=dest.name + ".", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out, urllib.request.urlopen(url, timeout=60) as response:
+            for chunk in iter(lambda: response.read(1024 * 1024), b""):
+                out.write(chunk)
+        os.replace(tmp, dest)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def fetch(name: str, model_dir: Path, sums: dict[str, str], pin: bool) -> str:
+    """Make sure `model_dir/name` is present and verified; returns what was done."""
+    dest = model_dir / name
+    expected = sums.get(name)
+    if dest.is_file():
+        actual = sha256(dest)
+        if actual == expected:
+            return "ok"
+        if expected is None:
+            # Put there by hand; never replace it with an equally unverified download.
+            if pin:
+                sums[name] = actual
+                return f"pinned {actual}"
+            return f"present, unverified (sha256 {actual}; --pin to record it)"
+
+    download(SOURCES[name], dest)
+    actual = sha256(dest)
+    if expected is None:
+        if not pin:
+            dest.unlink()
+            raise SystemExit(f"{name}: no pinned checksum (downloaded sha256 {actual}); verify it and re-run with --pin")
+        sums[name] = actual
+        return f"pinned {actual}"
+    if actual != expected:
+        dest.unlink()
+        raise SystemExit(f"{name}: sha256 {actual} does not match pinned {expected}; file removed")
+    return "downloaded"
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engines", nargs="+", choices=sorted(ENGINE_FILES), default=sorted(ENGINE_FILES))
+    parser.add_argument("--model-dir", default=None, help="default: FACE_MODEL_DIR or models/face_detection")
+    parser.add_argument("--pin", action="store_true", help="record checksums of files that have none yet")
+    args = parser.parse_args(argv)
+
+    model_dir = Path(args.model_dir or get_settings().face_model_dir or DEFAULT_MODEL_DIR)
+    model_dir.mkdir(parents=True, exist_ok=True)
+    sums = read_sums(SUMS_FILE)
+    try:
+        for engine in args.engines:
+            for name in ENGINE_FILES[engine]:
+                print(f"{name}: {fetch(name, model_dir, sums, args.pin)}", file=sys.stderr)
+    finally:
+        if args.pin:
+            write_sums(SUMS_FILE, sums)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
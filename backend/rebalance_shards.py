@@ -0,0 +1,182 @@
+"""
+Move every user's rows to the shard SQLITE_SHARDS says they belong on.
+
+Run it with the API stopped, after changing SQLITE_SHARDS (including going
+from one file to several, or back):
+
+    cd backend
+    SQLITE_SHARDS=4 python rebalance_shards.py --dry-run
+    SQLITE_SHARDS=4 python rebalance_shards.py
+
+Sources are the main database file and every `<name>.shard*<ext>` next to
+it. Users are moved in batches of --batch-users, each batch one transaction
+across the source and target file. Both files are switched from WAL to
+rollback-journal mode for the run, which makes that cross-file commit atomic
+(in WAL mode SQLite only guarantees atomicity per file), and which fails
+with "database is locked" if another process still has them open. Target
+shards' preference aggregates are rebuilt from the moved rows at the end.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any
+
+import anyio
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.core.config import Settings, get_settings
+from app.repositories.factory import open_storage, resolve_backend
+from app.repositories.sharding import shard_for, shard_path
+from app.services.outfit_scoring import OutfitCatalog
+from app.services.user_memory import preference_features
+
+
+# (table, columns copied, conflict clause). Rows are appended, or merged where the table has a key.
+MOVES: tuple[tuple[str, str, str], ...] = (
+    ("history", "user_id, outfit_id, created_at, payload_json", ""),
+    ("history_v2", "user_id, outfit_id, created_at, catalog_version, score, extra_json", ""),
+    (
+        "history_rollup",
+        "user_id, day, kind, value, weight",
+        "ON CONFLICT(user_id, day, kind, value) DO UPDATE SET weight = weight + excluded.weight",
+    ),
+    (
+        "history_rollup_days",
+        "user_id, day, rows",
+        "ON CONFLICT(user_id, day) DO UPDATE SET rows = rows + excluded.rows",
+    ),
+    (
+        "saved_outfits",
+        "user_id, outfit_id, created_at, payload_json",
+        "ON CONFLICT(user_id, outfit_id) DO UPDATE SET created_at=excluded.created_at, payload_json=excluded.payload_json "
+        "WHERE excluded.created_at > saved_outfits.created_at",
+    ),
+    (
+        "appearance_profiles",
+        "user_id, updated_at, payload_json",
+        "ON CONFLICT(user_id) DO UPDATE SET updated_at=excluded.updated_at, payload_json=excluded.payload_json "
+        "WHERE excluded.updated_at > appearance_profiles.updated_at",
+    ),
+)
+# Derived per-user rows: dropped from the source, rebuilt on the target.
+AGGREGATES = ("user_pref_features", "user_pref_totals")
+
+
+def _tables(conn: sqlite3.Connection, schema: str = "main") -> set[str]:
+    return {name for (name,) in conn.execute(f"SELECT name FROM {schema}.sqlite_master WHERE type='table'")}
+
+
+def _sources(database_path: str) -> list[str]:
+    main = Path(database_path)
+    found = [main] if main.exists() else []
+    found += sorted(p for p in main.parent.glob(f"{main.stem}.shard*{main.suffix}") if p.is_file())
+    return [str(p) for p in found]
+
+
+def _plan(source: str, targets: list[str]) -> dict[str, list[str]]:
+    """Target file -> users in `source` that belong there."""
+    conn = sqlite3.connect(source)
+    try:
+        tables = _tables(conn)
+        selects = [f"SELECT user_id FROM {t}" for t, _cols, _conflict in MOVES if t in tables]
+        if not selects:
+            return {}
+        moves: dict[str, list[str]] = {}
+        for (uid,) in conn.execute(" UNION ".join(selects)):
+            target = targets[shard_for(str(uid), len(targets))]
+            if Path(target).resolve() != Path(source).resolve():
+                moves.setdefault(target, []).append(str(uid))
+        return moves
+    finally:
+        conn.close()
+
+
+def _move(source: str, target: str, users: list[str], batch_users: int) -> dict[str, int]:
+    moved: dict[str, int] = {}
+    conn = sqlite3.connect(source, isolation_level=None)
+    try:
+        conn.execute("PRAGMA journal_mode=DELETE")
+        conn.execute("ATTACH DATABASE ? AS tgt", (target,))
+        conn.execute("PRAGMA tgt.journal_mode=DELETE")
+        tables = _tables(conn) & _tables(conn, "tgt")
+        conn.execute("CREATE TEMP TABLE move (user_id TEXT PRIMARY KEY)")
+        for start in range(0, len(users), batch_users):
+            batch = users[start : start + batch_users]
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM temp.move")
+                conn.executemany("INSERT INTO temp.move(user_id) VALUES (?)", [(uid,) for uid in batch])
+                for table, cols, conflict in MOVES:
+                    if table not in tables:
+                        continue
+                    cur = conn.execute(
+                        f"INSERT INTO tgt.{table}({cols}) SELECT {cols} FROM main.{table} "
+                        f"WHERE user_id IN (SELECT user_id FROM temp.move) {conflict}"
+                    )
+                    moved[table] = moved.get(table, 0) + max(cur.rowcount, 0)
+                    conn.execute(f"DELETE FROM main.{table} WHERE user_id IN (SELECT user_id FROM temp.move)")
+                for table in AGGREGATES:
+                    if table in tables:
+                        conn.execute(f"DELETE FROM main.{table} WHERE user_id IN (SELECT user_id FROM temp.move)")
+                if "user_pref_meta" in tables:
+                    # The next open rebuilds this shard's aggregates from its rows.
+                    conn.execute("DELETE FROM tgt.user_pref_meta WHERE key='half_life_days'")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        conn.execute("DETACH DATABASE tgt")
+        conn.execute("PRAGMA journal_mode=WAL")
+    finally:
+        conn.close()
+    with sqlite3.connect(target) as tconn:
+        tconn.execute("PRAGMA journal_mode=WAL")
+    return moved
+
+
+async def _open_and_close(settings: Settings) -> None:
+    """Create every shard's schema, or rebuild aggregates invalidated by a move."""
+    storage = await open_storage(settings, outfits=OutfitCatalog(), preference_features=preference_features)
+    await storage.close()
+
+
+def rebalance(settings: Settings, batch_users: int = 500, dry_run: bool = False) -> dict[str, Any]:
+    backend, database_path = resolve_backend(settings)
+    if backend != "sqlite":
+        raise SystemExit("rebalance_shards.py only applies to the SQLite backend")
+    n = settings.sqlite_shards
+    targets = [shard_path(database_path, i) for i in range(n)] if n > 1 else [database_path]
+    if not dry_run:
+        anyio.run(_open_and_close, settings)
+
+    report: dict[str, Any] = {"shards": n, "moves": []}
+    for source in _sources(database_path):
+        for target, users in sorted(_plan(source, targets).items()):
+            entry: dict[str, Any] = {"from": source, "to": target, "users": len(users)}
+            if not dry_run:
+                entry["rows"] = _move(source, target, users, max(1, batch_users))
+            report["moves"].append(entry)
+
+    if report["moves"] and not dry_run:
+        anyio.run(_open_and_close, settings)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="only report which users would move")
+    parser.add_argument("--batch-users", type=int, default=500, help="users per cross-file transaction")
+    args = parser.parse_args()
+    # Background compaction would race the move; it resumes when the API starts.
+    settings = get_settings().model_copy(update={"history_retention_days": 0.0})
+    print(json.dumps(rebalance(settings, batch_users=args.batch_users, dry_run=args.dry_run), indent=2))
+
+
+if __name__ == "__main__":
+    main()
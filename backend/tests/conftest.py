@@ -0,0 +1,49 @@
+"""
+Shared fixtures. Run from `backend/`:
+
+    python -m pytest -q tests
+
+(The test_*.py scripts next to `app/` call a running server and are not
+part of this suite.)
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.repositories.db import SqliteConnectionManager, connection_manager
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def db_path(tmp_path) -> str:
+    return str(tmp_path / "app.db")
+
+
+@pytest.fixture
+def db(db_path):
+    manager: SqliteConnectionManager = connection_manager(db_path)
+    try:
+        yield manager
+    finally:
+        manager.close()
+
+
+def color_features(source: str, payload: dict[str, Any]) -> dict[str, dict[str, float]]:
+    """A small stand-in for `user_memory.preference_features`: one colour, plus the outfit for saves."""
+    features: dict[str, dict[str, float]] = {}
+    if payload.get("color"):
+        features["color"] = {payload["color"]: 1.0}
+    if source == "saved" and payload.get("outfit_id"):
+        features["liked"] = {payload["outfit_id"]: 1.0}
+    return features
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+from app.repositories.backup import SqliteBackupJob
+
+
+def _make_db(path: Path, rows: int) -> str:
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE t (n INTEGER)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(rows)])
+    conn.commit()
+    conn.close()
+    return str(path)
+
+
+def _count(path: Path) -> int:
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT count(*) FROM t").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_backup_copies_every_source(tmp_path):
+    sources = [_make_db(tmp_path / "app.db", 500), _make_db(tmp_path / "shard_1.db", 3)]
+    job = SqliteBackupJob(sources, str(tmp_path / "backups"), step_pages=1, step_sleep_ms=0)
+    result = job.run_once()
+
+    snapshot = Path(result.snapshot)
+    assert result.files == 2 and job.snapshots() == [snapshot]
+    assert _count(snapshot / "app.db") == 500
+    assert _count(snapshot / "shard_1.db") == 3
+    assert not list((tmp_path / "backups").glob(".*.tmp"))
+
+
+def test_every_source_is_pinned_before_the_first_copy(tmp_path):
+    first = _make_db(tmp_path / "app.db", 10)
+    second = _make_db(tmp_path / "shard_1.db", 10)
+
+    class _WriteDuringCopy(SqliteBackupJob):
+        def _copy(self, source, src, target):
+            if source == first:
+                # Committed while the first file is copied: after the second file was pinned.
+                conn = sqlite3.connect(second)
+                conn.execute("INSERT INTO t VALUES (99)")
+                conn.commit()
+                conn.close()
+            return super()._copy(source, src, target)
+
+    result = _WriteDuringCopy([first, second], str(tmp_path / "backups")).run_once()
+    assert _count(Path(result.snapshot) / "shard_1.db") == 10
+    assert _count(Path(second)) == 11
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from app.core.errors import InvalidInputError
+from app.repositories.db import connection_manager
+from app.repositories.history import HistoryRepository
+from app.repositories.preferences import PreferenceRepository
+from app.repositories.saved_outfits import SavedOutfitRepository
+from app.services.data_transfer import export_ndjson, import_ndjson
+
+from conftest import color_features
+
+
+def _lines(records: list[dict]) -> bytes:
+    return b"".join(json.dumps(r).encode() + b"\n" for r in records)
+
+
+RECORDS = [
+    {
+        "user_id": f"u{n % 2}",
+        "outfit_id": f"o{n}",
+        "created_at": f"2024-01-{n + 1:02d}T12:00:00+00:00",
+        "payload": {"outfit_id": f"o{n}", "color": ["red", "blue", "green"][n % 3], "score": 0.5},
+    }
+    for n in range(7)
+]
+
+
+async def _chunks(data: bytes, size: int = 50):
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
+
+
+async def _stores(db_path, db):
+    prefs = PreferenceRepository(db_path, features=color_features, db=db)
+    history = HistoryRepository(db_path, db=db, preferences=prefs)
+    saved = SavedOutfitRepository(db_path, db=db, preferences=prefs)
+    for repo in (prefs, history, saved):
+        await repo.init()
+    return history, saved
+
+
+def _aggregates(db) -> dict[tuple[str, str, str], float]:
+    with db.connect() as conn:
+        rows = conn.execute("SELECT user_id, kind, value, score FROM user_pref_features")
+        return {(uid, kind, value): round(score, 9) for uid, kind, value, score in rows}
+
+
+def _count(db, table: str) -> int:
+    with db.connect() as conn:
+        return conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("dataset, table", [("history", "history_v2"), ("saved-outfits", "saved_outfits")])
+async def test_reimport_writes_nothing(db_path, db, dataset, table):
+    history, saved = await _stores(db_path, db)
+    data = _lines(RECORDS)
+
+    first = await import_ndjson(dataset, _chunks(data), history, saved, batch_rows=3)
+    assert first.rows == len(RECORDS) and first.users == {"u0", "u1"}
+    aggregates = _aggregates(db)
+    assert aggregates
+
+    again = await import_ndjson(dataset, _chunks(data), history, saved, batch_rows=3)
+    assert again.rows == 0
+    assert _count(db, table) == len(RECORDS)
+    assert _aggregates(db) == aggregates
+    await history.close()
+
+
+@pytest.mark.anyio
+async def test_interrupted_import_can_be_rerun(db_path, db):
+    history, saved = await _stores(db_path, db)
+    broken = _lines(RECORDS[:4]) + b"{not json\n" + _lines(RECORDS[4:])
+
+    with pytest.raises(InvalidInputError, match="Line 5"):
+        await import_ndjson("history", _chunks(broken), history, saved, batch_rows=2)
+    assert _count(db, "history_v2") == 4
+
+    result = await import_ndjson("history", _chunks(_lines(RECORDS)), history, saved, batch_rows=2)
+    assert result.rows == len(RECORDS) - 4
+    assert _count(db, "history_v2") == len(RECORDS)
+
+    # Same aggregates as one uninterrupted import.
+    reference_path = db_path + ".reference"
+    reference_db = connection_manager(reference_path)
+    try:
+        ref_history, ref_saved = await _stores(reference_path, reference_db)
+        await import_ndjson("history", _chunks(_lines(RECORDS)), ref_history, ref_saved)
+        assert _aggregates(db) == _aggregates(reference_db)
+        await ref_history.close()
+    finally:
+        reference_db.close()
+    await history.close()
+
+
+@pytest.mark.anyio
+async def test_reimporting_an_export_writes_nothing(db_path, db):
+    history, saved = await _stores(db_path, db)
+    await import_ndjson("history", _chunks(_lines(RECORDS)), history, saved)
+    aggregates = _aggregates(db)
+
+    exported = b"".join([chunk async for chunk in export_ndjson("history", history, saved, batch_rows=2)])
+    assert (await import_ndjson("history", _chunks(exported), history, saved)).rows == 0
+    assert _count(db, "history_v2") == len(RECORDS)
+    assert _aggregates(db) == aggregates
+    await history.close()
@@ -0,0 +1,45 @@
+"""
+Each face-detection engine finds the faces in a bundled photo.
+
+Engines whose model files are missing (see fetch_face_models.py) are
+skipped, so this also runs where only the Haar cascade is available.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+
+from app.core.errors import DependencyMissingError
+from app.services.face_detection import FaceDetector
+
+IMAGE = Path(__file__).resolve().parents[2] / "frontend" / "public" / "images" / "avatar-1.jpg"
+# The face in avatar-1.jpg as the Haar cascade finds it, (x, y, w, h); other engines must overlap it.
+FACE = (447, 74, 91, 91)
+
+
+def _iou(a: tuple[int, int, int, int], b: tuple[int, int, int, int]) -> float:
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[0] + a[2], b[0] + b[2]), min(a[1] + a[3], b[1] + b[3])
+    inter = max(0, x2 - x1) * max(0, y2 - y1)
+    return inter / (a[2] * a[3] + b[2] * b[3] - inter)
+
+
+@pytest.mark.parametrize("engine", ["haar", "yunet", "res10"])
+def test_engine_finds_the_face(engine):
+    if not IMAGE.is_file():
+        pytest.skip(f"{IMAGE} not found")
+    bgr = cv2.imread(str(IMAGE), cv2.IMREAD_COLOR)
+    detector = FaceDetector(engine=engine)
+    try:
+        faces = detector.detect(bgr).faces
+    except DependencyMissingError as e:
+        pytest.skip(str(e))
+
+    assert detector.engine_name == engine
+    assert faces
+    largest = faces[0]
+    assert _iou((largest.x, largest.y, largest.w, largest.h), FACE) > 0.4
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+import pytest
+
+from app.repositories.history import HistoryRepository
+from app.services.outfit_scoring import OutfitCatalog
+from app.utils.hashing import stable_hash
+
+
+class _Catalog:
+    """A one-outfit resolver whose content can be edited between writes and reads."""
+
+    def __init__(self, outfit: dict[str, Any]):
+        self.outfit = outfit
+
+    @property
+    def version(self) -> str:
+        return stable_hash(self.outfit)
+
+    def resolve(self, outfit_id: str) -> dict[str, Any] | None:
+        return self.outfit if outfit_id == self.outfit["outfit_id"] else None
+
+    def resolve_json(self, outfit_id: str) -> bytes | None:
+        outfit = self.resolve(outfit_id)
+        return json.dumps(outfit).encode() if outfit is not None else None
+
+
+def test_catalog_version_tracks_outfit_content():
+    catalog = OutfitCatalog()
+    before = catalog.version
+    edited = OutfitCatalog()
+    index = edited._outfit_index()
+    first = next(iter(index))
+    index[first] = {**index[first], "tags": [*index[first]["tags"], "edited"]}
+    assert edited.version != before
+    assert OutfitCatalog().version == before
+
+
+@pytest.mark.anyio
+async def test_rows_from_an_older_catalog_degrade_to_id_and_context(db_path, db):
+    catalog = _Catalog({"outfit_id": "o1", "brand": "COS", "tags": ["summer"]})
+    repo = HistoryRepository(db_path, db=db, outfits=catalog)
+    await repo.init()
+    await repo.add_entry("u1", "o1", {**catalog.outfit, "score": 0.5, "context": {"occasion": "work"}})
+
+    [row] = await repo.list_recent("u1")
+    assert row.payload == {**catalog.outfit, "score": 0.5, "context": {"occasion": "work"}}
+
+    catalog.outfit = {"outfit_id": "o1", "brand": "Zara", "tags": ["winter"]}
+    expected = {"outfit_id": "o1", "score": 0.5, "context": {"occasion": "work"}}
+    [row] = await repo.list_recent("u1")
+    assert row.payload == expected
+    [page_row] = (await repo.list_page("u1")).items
+    assert page_row.payload == expected
+    assert json.loads(page_row.payload_json) == expected
+    await repo.close()
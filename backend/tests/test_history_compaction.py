@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.repositories.history import HistoryRepository, HistoryRow
+from app.repositories.preferences import PreferenceRepository
+
+from conftest import color_features
+
+COLORS = ["red", "blue", "green"]
+
+
+def _rows(user_id: str, start: datetime, n: int) -> list[HistoryRow]:
+    return [
+        HistoryRow(user_id, f"{user_id}_{start:%m%d}_{i}", start + timedelta(hours=i), {"color": COLORS[i % 3]})
+        for i in range(n)
+    ]
+
+
+def _day(days_ago: int) -> datetime:
+    """Midnight UTC `days_ago` days back, so a few hours of rows stay within one day."""
+    start = datetime.now(timezone.utc) - timedelta(days=days_ago)
+    return start.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _aggregates(db) -> tuple[list, list]:
+    with db.connect() as conn:
+        features = conn.execute(
+            "SELECT user_id, kind, value, round(score, 9) FROM user_pref_features ORDER BY 1, 2, 3"
+        ).fetchall()
+        totals = conn.execute("SELECT user_id, interactions FROM user_pref_totals ORDER BY 1").fetchall()
+    return features, totals
+
+
+@pytest.fixture
+async def repos(db_path, db):
+    prefs = PreferenceRepository(db_path, features=color_features, db=db)
+    schema = HistoryRepository(db_path, db=db, preferences=prefs)
+    await prefs.init()
+    await schema.init()
+    await prefs.backfill(schema.preference_events)
+    # Not init()-ed, so no background compaction thread races the test's own compact().
+    history = HistoryRepository(
+        db_path, db=db, preferences=prefs, retention_days=30, keep_recent=3, migrate_batch=2
+    )
+    yield prefs, history
+    await schema.close()
+
+
+@pytest.mark.anyio
+async def test_compaction_keeps_newest_rows_per_user(repos):
+    prefs, history = repos
+    old, recent = _day(100), _day(1)
+    await history.import_rows(
+        _rows("a", old, 10)  # all old: the newest 3 stay
+        + _rows("b", old, 2)  # fewer than keep_recent: nothing goes
+        + _rows("c", old, 4)  # enough recent rows: every old one goes
+        + _rows("c", recent, 5)
+    )
+
+    assert history.compact(pause=0) == 7 + 4
+    assert [r.outfit_id for r in await history.list_recent("a", limit=50)] == [f"a_{old:%m%d}_{i}" for i in (9, 8, 7)]
+    assert len(await history.list_recent("b", limit=50)) == 2
+    assert {r.created_at.date() for r in await history.list_recent("c", limit=50)} == {recent.date()}
+    # Running again finds nothing new to fold.
+    assert history.compact(pause=0) == 0
+
+
+@pytest.mark.anyio
+async def test_rollup_replay_rebuilds_the_same_aggregates(repos, db):
+    prefs, history = repos
+    await history.import_rows(_rows("a", _day(100), 10) + _rows("a", _day(60), 4) + _rows("b", _day(2), 3))
+    before = _aggregates(db)
+
+    assert history.compact(pause=0) == 11
+    assert _aggregates(db) == before
+    with db.connect() as conn:
+        days = conn.execute("SELECT user_id, rows FROM history_rollup_days ORDER BY day").fetchall()
+    assert days == [("a", 10), ("a", 1)]
+
+    # Drop the meta row so backfill rebuilds from the remaining rows plus the rollups.
+    with db.connect() as conn:
+        conn.execute("DELETE FROM user_pref_meta")
+    assert await prefs.backfill(history.preference_events)
+    assert _aggregates(db) == before
+    assert before[1] == [("a", 14), ("b", 3)]
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import pytest
+
+from app.repositories import history
+from app.repositories.history import HistoryRepository, HistoryRow, _HistoryWriter, _PendingEntry
+
+
+@pytest.fixture(autouse=True)
+def _no_backoff(monkeypatch):
+    monkeypatch.setattr(history, "_RETRY_BASE_DELAY", 0.0)
+
+
+class _FlakyWrite:
+    """An `on_write` hook that fails its first `failures` calls, rolling the batch back."""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self, conn, batch) -> None:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError("database is locked")
+
+
+async def _writer(db_path, db, on_write) -> _HistoryWriter:
+    # init() creates history_v2; the repository's own writer is not used.
+    await HistoryRepository(db_path, db=db).init()
+    writer = _HistoryWriter(db, flush_interval=0.0, max_batch=100, on_write=on_write)
+    writer.start()
+    return writer
+
+
+def _entry(n: int) -> _PendingEntry:
+    created = datetime(2024, 1, 1, 0, 0, n, tzinfo=timezone.utc)
+    return _PendingEntry(
+        row=HistoryRow("u1", f"o{n}", created, {}), params=("u1", f"o{n}", created.isoformat(), None, None, None)
+    )
+
+
+def _stored(db) -> int:
+    with db.connect() as conn:
+        return conn.execute("SELECT count(*) FROM history_v2").fetchone()[0]
+
+
+@pytest.mark.anyio
+async def test_transient_failures_are_retried(db_path, db):
+    on_write = _FlakyWrite(failures=history._WRITE_ATTEMPTS - 1)
+    writer = await _writer(db_path, db, on_write)
+    writer.submit(_entry(1))
+    writer.flush()
+
+    assert _stored(db) == 1
+    stats = writer.stats()
+    assert stats["retries"] == history._WRITE_ATTEMPTS - 1
+    assert stats["failed_rows"] == 0 and stats["rows"] == 1
+    writer.close()
+
+
+@pytest.mark.anyio
+async def test_lost_rows_are_counted_and_reported_once(db_path, db):
+    writer = await _writer(db_path, db, _FlakyWrite(failures=history._WRITE_ATTEMPTS))
+    writer.submit(_entry(1))
+    writer.submit(_entry(2))
+    assert writer.drain(timeout=5)
+    # The whole batch was rolled back, and is no longer pending.
+    assert _stored(db) == 0 and writer.pending_for("u1") == []
+    assert writer.stats()["failed_rows"] == 2
+
+    with pytest.raises(RuntimeError, match="2 history rows"):
+        writer.flush()
+    writer.flush()  # reported once
+    writer.submit(_entry(3))
+    writer.close()
+    assert _stored(db) == 1
+
+
+@pytest.mark.anyio
+async def test_close_raises_for_unreported_losses(db_path, db):
+    writer = await _writer(db_path, db, _FlakyWrite(failures=history._WRITE_ATTEMPTS))
+    writer.submit(_entry(1))
+    with pytest.raises(RuntimeError, match="1 history rows"):
+        writer.close()
+
+
+@pytest.mark.anyio
+async def test_close_flushes_queued_rows(db_path, db):
+    # A group-commit window far longer than the test: only close() can write the rows.
+    repo = HistoryRepository(db_path, db=db, write_behind=True, flush_interval_ms=60_000)
+    await repo.init()
+    for n in range(3):
+        await repo.add_entry("u1", f"o{n}", {"score": 0.5})
+    assert len(await repo.list_recent("u1")) == 3  # pending rows are already visible
+    await repo.close()
+
+    assert _stored(db) == 3
+    reopened = HistoryRepository(db_path, db=db)
+    await reopened.init()
+    assert {row.outfit_id for row in await reopened.list_recent("u1")} == {"o0", "o1", "o2"}
+    await reopened.close()
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import base64
+import json
+
+import pytest
+
+from app.core.errors import InvalidInputError
+from app.utils.images import decode_base64_in_place
+from app.utils.json_safe import lift_string_field
+
+
+def _lift(doc: bytes, key: str = "image_base64"):
+    buf = bytearray(doc)
+    parsed, span = lift_string_field(buf, key)
+    return buf, parsed, span
+
+
+@pytest.mark.parametrize(
+    "doc",
+    [
+        b'{"occasion":"work","image_base64":"QUFB","vibe":"x"}',
+        b'{ "image_base64" : "QUFB" }',
+        b'{"meta":{"image_base64":"QkJC"},"image_base64":"QUFB"}',
+        b'{"list":[{"image_base64":"QkJC"}],"image_base64":"QUFB"}',
+        b'{"note":"see \\"image_base64\\": here","image_base64":"QUFB"}',
+        b'{"a":"x\\\\","image_base64":"QUFB"}',
+    ],
+)
+def test_lifts_the_top_level_field(doc):
+    buf, parsed, span = _lift(doc)
+    assert span is not None and bytes(buf[span[0] : span[1]]) == b"QUFB"
+    expected = json.loads(doc)
+    expected["image_base64"] = None
+    assert parsed.ok and parsed.value == expected
+
+
+@pytest.mark.parametrize(
+    "doc",
+    [
+        # Only the nested key holds a string: the top-level value must stay null.
+        b'{"meta":{"image_base64":"QUFB"},"image_base64":null}',
+        b'{"meta":{"image_base64":"QUFB"}}',
+        # Repeated key: the last one wins in a normal parse.
+        b'{"image_base64":"QUFB","image_base64":null}',
+        b'{"image_base64":"QU\\u0046B"}',
+        b'{"image_base64":123}',
+        b'[{"image_base64":"QUFB"}]',
+        b'"image_base64"',
+    ],
+)
+def test_falls_back_to_a_full_parse(doc):
+    _buf, parsed, span = _lift(doc)
+    assert span is None
+    assert parsed.ok and parsed.value == json.loads(doc)
+
+
+def test_invalid_json_is_reported():
+    _buf, parsed, span = _lift(b'{"image_base64":"QUFB"')
+    assert span is None and not parsed.ok
+
+
+@pytest.mark.parametrize("prefix", [b"", b"data:image/png;base64,"])
+@pytest.mark.parametrize("size", [0, 1, 2, 3, 1000, 200_001])
+def test_decode_base64_in_place(prefix, size):
+    data = bytes(range(256)) * (size // 256) + bytes(size % 256)
+    doc = b'{"image_base64":"' + prefix + base64.b64encode(data) + b'"}'
+    buf, _parsed, span = _lift(doc)
+    assert bytes(decode_base64_in_place(buf, *span, chunk_chars=1024)) == data
+
+
+@pytest.mark.parametrize("encoded", [b"QUF", b"QU=B", b"QU!B"])
+def test_decode_base64_in_place_rejects_bad_input(encoded):
+    buf = bytearray(encoded)
+    with pytest.raises(InvalidInputError):
+        decode_base64_in_place(buf, 0, len(buf))
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.deps import settings_dep
+from app.api.v1.endpoints.metrics import router
+from app.core.config import Settings
+
+
+def _client(admin_token: str | None) -> TestClient:
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[settings_dep] = lambda: Settings(ADMIN_TOKEN=admin_token)
+    stats = SimpleNamespace(write_stats=lambda: {}, user_context_stats=lambda: {}, stats=lambda: {})
+    app.state.storage = SimpleNamespace(metrics=lambda: {"backend": "sqlite"})
+    app.state.history_repo = app.state.stylist = app.state.password_hasher = stats
+    return TestClient(app)
+
+
+@pytest.mark.parametrize(
+    "admin_token, headers, status",
+    [
+        (None, {}, 404),
+        (None, {"X-Admin-Token": "anything"}, 404),
+        ("s3cret", {}, 403),
+        ("s3cret", {"X-Admin-Token": "wrong"}, 403),
+        ("s3cret", {"X-Admin-Token": "s3cret"}, 200),
+    ],
+)
+def test_metrics_need_the_admin_token(admin_token, headers, status):
+    response = _client(admin_token).get("/metrics", headers=headers)
+    assert response.status_code == status
+    if status == 200:
+        assert response.json()["backend"] == "sqlite"
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core.errors import InvalidInputError
+from app.repositories.history import HistoryRepository, HistoryRow
+from app.repositories.pagination import Cursor, decode_cursor, encode_cursor
+from app.repositories.saved_outfits import SavedOutfitRepository
+
+
+def _token(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        Cursor(created_at="2024-05-01T10:00:00+00:00", rowid=42, source=1),
+        Cursor(created_at="2024-05-01T10:00:00.123456+00:00", rowid=0),
+        Cursor(created_at="", rowid=2**62, source=0),
+        Cursor(created_at="?>?>~~", rowid=7),
+    ],
+)
+def test_cursor_round_trip(cursor):
+    token = encode_cursor(cursor)
+    assert "=" not in token
+    assert set(token) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+    assert decode_cursor(token) == cursor
+
+
+@pytest.mark.parametrize(
+    "token",
+    [
+        "",
+        "not a cursor",
+        _token({"created_at": "2024-05-01", "rowid": 1}),
+        _token(["2024-05-01", 1]),
+        _token(["2024-05-01", 0, 1, 2]),
+        _token([5, 0, 1]),
+        _token(["2024-05-01", "0", 1]),
+        _token(["2024-05-01", 0, 1.5]),
+        _token(["2024-05-01", 0, None]),
+    ],
+)
+def test_invalid_cursor_is_rejected(token):
+    with pytest.raises(InvalidInputError):
+        decode_cursor(token)
+
+
+async def _all_pages(repo, user_id: str, limit: int) -> list[str]:
+    seen: list[str] = []
+    cursor = None
+    while True:
+        page = await repo.list_page(user_id, limit=limit, cursor=cursor)
+        assert len(page.items) <= limit
+        seen.extend(row.outfit_id for row in page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            return seen
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("limit", [1, 2, 3, 7, 50])
+async def test_history_pages_across_equal_timestamps_and_tables(db_path, db, limit):
+    repo = HistoryRepository(db_path, db=db)
+    await repo.init()
+    tie = datetime(2024, 5, 1, 10, 0, tzinfo=timezone.utc)
+    older = datetime(2024, 4, 1, tzinfo=timezone.utc)
+    await repo.import_rows(
+        [HistoryRow("u1", f"v2_{i}", tie, {"outfit_id": f"v2_{i}"}) for i in range(4)]
+        + [HistoryRow("u1", "v2_old", older, {"outfit_id": "v2_old"}), HistoryRow("u2", "other", tie, {})]
+    )
+    # Rows still in the legacy table, some at the same created_at as history_v2 rows.
+    with db.connect() as conn:
+        conn.executemany(
+            "INSERT INTO history(user_id, outfit_id, created_at, payload_json) VALUES (?, ?, ?, ?)",
+            [("u1", f"legacy_{i}", tie.isoformat(), json.dumps({"outfit_id": f"legacy_{i}"})) for i in range(3)]
+            + [("u1", "legacy_old", older.isoformat(), "{}")],
+        )
+
+    seen = await _all_pages(repo, "u1", limit)
+    assert len(seen) == len(set(seen)) == 9
+    # history_v2 before legacy at equal created_at, newest rowid first within each table.
+    assert seen == [
+        "v2_3", "v2_2", "v2_1", "v2_0", "legacy_2", "legacy_1", "legacy_0", "v2_old", "legacy_old",
+    ]
+    await repo.close()
+
+
+@pytest.mark.anyio
+async def test_history_page_rejects_tampered_cursor(db_path, db):
+    repo = HistoryRepository(db_path, db=db)
+    await repo.init()
+    with pytest.raises(InvalidInputError):
+        await repo.list_page("u1", cursor="garbage")
+    await repo.close()
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("limit", [1, 2, 5, 6])
+async def test_saved_pages_within_one_batch_timestamp(db_path, db, limit):
+    repo = SavedOutfitRepository(db_path, db=db)
+    await repo.init()
+    # One save_many call stamps every row with the same created_at.
+    await repo.save_many("u1", [(f"o{i}", {"outfit_id": f"o{i}"}) for i in range(5)])
+
+    seen = await _all_pages(repo, "u1", limit)
+    assert seen == [f"o{i}" for i in reversed(range(5))]
+    assert await _all_pages(repo, "nobody", limit) == []
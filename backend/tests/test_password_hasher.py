@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import threading
+
+import anyio
+import pytest
+
+from app.core.errors import OverloadedError
+from app.core.security import PasswordHasher, get_password_hash
+
+
+class _Gate:
+    """A blocking stand-in for bcrypt: every call holds its thread until `open()`."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.started = 0
+
+    def __call__(self) -> str:
+        self.started += 1
+        self._event.wait(5)
+        return "done"
+
+    def open(self) -> None:
+        self._event.set()
+
+
+async def _until(predicate) -> None:
+    with anyio.fail_after(5):
+        while not predicate():
+            await anyio.sleep(0.005)
+
+
+@pytest.mark.anyio
+async def test_rejects_past_max_waiting():
+    hasher = PasswordHasher(threads=1, max_waiting=1, queue_timeout_ms=5000)
+    gate = _Gate()
+    results: list[str] = []
+
+    async def call() -> None:
+        results.append(await hasher._run(gate))
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(call)
+        await _until(lambda: gate.started == 1)
+        tg.start_soon(call)
+        await _until(lambda: hasher.stats()["waiting"] == 1)
+
+        with pytest.raises(OverloadedError) as info:
+            await hasher._run(gate)
+        assert info.value.retry_after_s == 1
+        gate.open()
+
+    assert results == ["done", "done"]
+    stats = hasher.stats()
+    assert stats["rejected"] == 1 and stats["timed_out"] == 0 and stats["calls"] == 2
+    assert stats["busy"] == 0 and stats["waiting"] == 0
+
+
+@pytest.mark.anyio
+async def test_rejects_after_queue_timeout():
+    hasher = PasswordHasher(threads=1, max_waiting=8, queue_timeout_ms=50)
+    gate = _Gate()
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(hasher._run, gate)
+        await _until(lambda: gate.started == 1)
+        with pytest.raises(OverloadedError, match="queue wait"):
+            await hasher._run(gate)
+        gate.open()
+
+    stats = hasher.stats()
+    assert stats["timed_out"] == 1 and stats["waiting"] == 0 and stats["calls"] == 1
+
+
+@pytest.mark.anyio
+async def test_rehash_never_queues():
+    hasher = PasswordHasher(threads=1, rounds=4)
+    old = get_password_hash("pw", 6)  # above the slack, so due for a rehash
+    gate = _Gate()
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(hasher._run, gate)
+        await _until(lambda: gate.started == 1)
+        assert await hasher.rehash("pw", old) is None
+        assert hasher.stats()["waiting"] == 0
+        gate.open()
+
+    new = await hasher.rehash("pw", old)
+    assert new is not None and await hasher.verify("pw", new)
@@ -0,0 +1,127 @@
+"""
+Round trip through the Postgres repositories against a real server.
+
+Skipped unless DATABASE_URL is set (and asyncpg installed), e.g.
+
+    cd backend
+    DATABASE_URL=postgresql://localhost/styleai_test python -m pytest -q tests/test_postgres_storage.py
+
+Every run writes under fresh user ids, so it can share a database with
+other data; nothing is cleaned up afterwards.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import uuid
+
+import pytest
+
+if not os.getenv("DATABASE_URL"):
+    pytest.skip("DATABASE_URL is not set", allow_module_level=True)
+pytest.importorskip("asyncpg")
+
+from app.core.config import get_settings
+from app.repositories.factory import open_storage
+from app.services.data_transfer import export_ndjson, import_ndjson
+from app.services.outfit_scoring import OutfitCatalog
+
+
+@pytest.fixture
+async def storage():
+    storage = await open_storage(get_settings(), outfits=OutfitCatalog())
+    assert storage.backend == "postgres"
+    try:
+        yield storage
+    finally:
+        await storage.close()
+
+
+def _user() -> str:
+    return f"pgtest_{uuid.uuid4().hex[:12]}"
+
+
+def _payloads(n: int) -> list[tuple[str, dict]]:
+    outfits = OutfitCatalog().list_candidates()
+    return [
+        (o.outfit_id, {**o.model_dump(), "score": 0.25 + i / 100, "context": {"occasion": "casual"}})
+        for i, o in enumerate(outfits[:n])
+    ]
+
+
+async def _chunks(data: bytes):
+    yield data
+
+
+@pytest.mark.anyio
+async def test_history_add_list_and_page(storage):
+    user_id = _user()
+    entries = _payloads(5)
+    for outfit_id, payload in entries:
+        await storage.history.add_entry(user_id, outfit_id, payload)
+
+    recent = await storage.history.list_recent(user_id, limit=10)
+    assert [r.outfit_id for r in recent] == [outfit_id for outfit_id, _ in reversed(entries)]
+    assert recent[0].payload == entries[-1][1]
+
+    seen = []
+    cursor = None
+    while True:
+        page = await storage.history.list_page(user_id, limit=2, cursor=cursor)
+        for row in page.items:
+            assert json.loads(row.payload_json) == row.payload
+            seen.append(row.outfit_id)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert seen == [r.outfit_id for r in recent]
+
+
+@pytest.mark.anyio
+async def test_saved_save_many_exists_delete_many(storage):
+    user_id = _user()
+    entries = _payloads(4)
+    assert await storage.saved.save_many(user_id, entries) == 4
+    # Saving the same outfits again replaces them instead of adding rows.
+    await storage.saved.save_many(user_id, entries[:2])
+    ids = [outfit_id for outfit_id, _ in entries]
+    assert await storage.saved.exists(user_id, [*ids, "missing"]) == set(ids)
+    assert len(await storage.saved.list_for_user(user_id, limit=10)) == 4
+
+    assert await storage.saved.delete_many(user_id, ids[:3]) == 3
+    assert await storage.saved.exists(user_id, ids) == {ids[3]}
+
+
+@pytest.mark.anyio
+async def test_history_export_import_round_trip(storage):
+    source, target = _user(), _user()
+    for outfit_id, payload in _payloads(3):
+        await storage.history.add_entry(source, outfit_id, payload)
+
+    exported = b"".join(
+        [chunk async for chunk in export_ndjson("history", storage.history, storage.saved, user_id=source)]
+    )
+    moved = exported.replace(source.encode(), target.encode())
+    result = await import_ndjson("history", _chunks(moved), storage.history, storage.saved)
+    assert result.rows == 3 and result.users == {target}
+    # Re-running the same import skips rows that are already stored.
+    again = await import_ndjson("history", _chunks(moved), storage.history, storage.saved)
+    assert again.rows == 0
+
+    before = await storage.history.list_recent(source, limit=10)
+    after = await storage.history.list_recent(target, limit=10)
+    assert [(r.outfit_id, r.created_at, r.payload) for r in after] == [
+        (r.outfit_id, r.created_at, r.payload) for r in before
+    ]
+
+
+@pytest.mark.anyio
+async def test_update_password_hash_compare_and_swap(storage):
+    user_id = _user()
+    await storage.users.create_user(user_id=user_id, email=f"{user_id}@example.com", password_hash="old")
+
+    assert await storage.users.update_password_hash(user_id, "old", "new")
+    # A stale expected hash (another login already rehashed) changes nothing.
+    assert not await storage.users.update_password_hash(user_id, "old", "newer")
+    assert (await storage.users.get_by_id(user_id)).password_hash == "new"
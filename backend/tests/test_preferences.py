@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import math
+
+import pytest
+
+from app.repositories.preferences import PreferenceEvent, PreferenceRepository, PreferenceSnapshot
+
+from conftest import color_features
+
+DAY = 86400.0
+LIMITS = {"color": 10, "liked": 10}
+T0 = 1_700_000_000.0
+
+
+async def _repo(db_path, db, half_life_days: float) -> PreferenceRepository:
+    repo = PreferenceRepository(db_path, features=color_features, db=db, half_life_days=half_life_days)
+    await repo.init()
+    return repo
+
+
+def _record(db, repo: PreferenceRepository, *events: PreferenceEvent) -> None:
+    with db.connect() as conn:
+        repo.record(conn, events)
+        conn.commit()
+
+
+def _event(color: str, at: float, sign: int = 1, source: str = "history") -> PreferenceEvent:
+    return PreferenceEvent("u1", source, {"color": color, "outfit_id": f"o_{color}"}, at, sign=sign)
+
+
+@pytest.mark.anyio
+async def test_weight_halves_every_half_life(db_path, db):
+    repo = await _repo(db_path, db, half_life_days=7)
+    _record(db, repo, _event("red", T0), _event("blue", T0 + 7 * DAY), _event("green", T0 + 14 * DAY))
+
+    scores = (await repo.top("u1", LIMITS)).scores["color"]
+    assert scores["blue"] / scores["red"] == pytest.approx(2.0)
+    assert scores["green"] / scores["red"] == pytest.approx(4.0)
+    assert repo.decay_rate == pytest.approx(math.log(2) / (7 * DAY))
+
+
+@pytest.mark.anyio
+async def test_no_half_life_counts_plainly(db_path, db):
+    repo = await _repo(db_path, db, half_life_days=0)
+    _record(db, repo, _event("red", T0), _event("red", T0 + 400 * DAY), _event("blue", T0 + 800 * DAY))
+
+    snapshot = await repo.top("u1", LIMITS)
+    assert snapshot.scores["color"] == {"red": 2.0, "blue": 1.0}
+    assert snapshot.interactions == 3
+
+
+@pytest.mark.anyio
+async def test_rescale_keeps_ratios_over_long_gaps(db_path, db):
+    repo = await _repo(db_path, db, half_life_days=1)
+    # 100 half-lives apart: far past the rescale threshold, the old event decays to nothing.
+    _record(db, repo, _event("red", T0), _event("blue", T0 + DAY))
+    _record(db, repo, _event("green", T0 + 100 * DAY), _event("green", T0 + 101 * DAY))
+
+    snapshot = await repo.top("u1", LIMITS)
+    assert snapshot.landmark == T0 + 101 * DAY
+    assert set(snapshot.scores["color"]) == {"green"}
+    assert snapshot.scores["color"]["green"] == pytest.approx(1.5)
+    assert snapshot.interactions == 4
+
+
+@pytest.mark.anyio
+async def test_removing_an_event_undoes_it(db_path, db):
+    repo = await _repo(db_path, db, half_life_days=3)
+    _record(db, repo, _event("red", T0, source="saved"), _event("blue", T0 + DAY, source="saved"))
+    _record(db, repo, _event("red", T0, sign=-1, source="saved"))
+
+    snapshot = await repo.top("u1", LIMITS)
+    assert set(snapshot.scores["color"]) == {"blue"}
+    assert set(snapshot.scores["liked"]) == {"o_blue"}
+    assert snapshot.interactions == 1
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("half_life_days", [0, 2])
+async def test_advance_matches_record(db_path, db, half_life_days):
+    repo = await _repo(db_path, db, half_life_days=half_life_days)
+    _record(db, repo, _event("red", T0), _event("blue", T0 + DAY))
+    snapshot = await repo.top("u1", LIMITS)
+
+    later = [_event("blue", T0 + 3 * DAY), _event("green", T0 + 200 * DAY), _event("blue", T0 + DAY, sign=-1)]
+    for event in later:
+        snapshot = repo.advance(snapshot, event)
+        _record(db, repo, event)
+
+    stored = await repo.top("u1", LIMITS)
+    assert snapshot.interactions == stored.interactions == 3
+    assert snapshot.landmark == stored.landmark
+    for kind in ("color", "liked"):
+        assert snapshot.ranked(kind) == stored.ranked(kind)
+        assert snapshot.scores.get(kind, {}) == pytest.approx(stored.scores[kind])
+
+
+@pytest.mark.anyio
+async def test_advance_from_empty_snapshot(db_path, db):
+    repo = await _repo(db_path, db, half_life_days=5)
+    snapshot = repo.advance(PreferenceSnapshot(user_id="u1"), _event("red", T0))
+    assert snapshot.landmark == T0
+    assert snapshot.scores == {"color": {"red": 1.0}}
+    assert snapshot.interactions == 1
+
+
+@pytest.mark.anyio
+async def test_backfill_rebuilds_when_half_life_changes(db_path, db):
+    events = [_event("red", T0), _event("blue", T0 + 10 * DAY)]
+
+    def source(_conn):
+        return iter(events)
+
+    plain = await _repo(db_path, db, half_life_days=0)
+    assert await plain.backfill(source)
+    assert not await plain.backfill(source)
+    assert (await plain.top("u1", LIMITS)).scores["color"] == {"red": 1.0, "blue": 1.0}
+
+    decayed = await _repo(db_path, db, half_life_days=10)
+    assert await decayed.backfill(source)
+    scores = (await decayed.top("u1", LIMITS)).scores["color"]
+    assert scores["blue"] / scores["red"] == pytest.approx(2.0)
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from app.repositories.preferences import PreferenceRepository
+from app.repositories.saved_outfits import SavedOutfitRepository
+
+from conftest import color_features
+
+LIMITS = {"color": 10, "liked": 10}
+
+
+def _scores(db, user_id: str) -> dict[tuple[str, str], float]:
+    with db.connect() as conn:
+        rows = conn.execute("SELECT kind, value, score FROM user_pref_features WHERE user_id=?", (user_id,))
+        return {(kind, value): round(score, 9) for kind, value, score in rows}
+
+
+@pytest.mark.anyio
+async def test_upgrade_keeps_newest_duplicate(db_path, db):
+    prefs = PreferenceRepository(db_path, features=color_features, db=db)
+    repo = SavedOutfitRepository(db_path, db=db, preferences=prefs)
+    await prefs.init()
+    # A database from before the unique index, with the same outfit saved twice.
+    with db.connect() as conn:
+        conn.execute(
+            "CREATE TABLE saved_outfits (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, "
+            "outfit_id TEXT NOT NULL, created_at TEXT NOT NULL, payload_json TEXT NOT NULL)"
+        )
+        conn.executemany(
+            "INSERT INTO saved_outfits(user_id, outfit_id, created_at, payload_json) VALUES (?, ?, ?, ?)",
+            [
+                ("u1", "o1", "2024-01-01T00:00:00+00:00", json.dumps({"outfit_id": "o1", "color": "red"})),
+                ("u1", "o1", "2024-02-01T00:00:00+00:00", json.dumps({"outfit_id": "o1", "color": "blue"})),
+                ("u1", "o2", "2024-01-15T00:00:00+00:00", json.dumps({"outfit_id": "o2", "color": "red"})),
+                ("u2", "o1", "2024-01-01T00:00:00+00:00", json.dumps({"outfit_id": "o1", "color": "red"})),
+            ],
+        )
+        conn.commit()
+    # Aggregates built while the duplicates still existed.
+    await prefs.backfill(repo.preference_events)
+
+    await repo.init()
+
+    rows = {(r.outfit_id, r.payload["color"]) for r in await repo.list_for_user("u1", limit=10)}
+    assert rows == {("o1", "blue"), ("o2", "red")}
+    assert len(await repo.list_for_user("u2", limit=10)) == 1
+    with db.connect() as conn:
+        assert conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='index' AND name='uq_saved_outfits_user_outfit'"
+        ).fetchone()
+    # The dropped copy was taken out of the aggregates, too.
+    assert _scores(db, "u1") == {("color", "blue"): 1.0, ("color", "red"): 1.0, ("liked", "o1"): 1.0, ("liked", "o2"): 1.0}
+    assert (await prefs.top("u1", LIMITS)).interactions == 2
+
+    # Running init again on the upgraded table changes nothing.
+    await repo.init()
+    assert len(await repo.list_for_user("u1", limit=10)) == 2
+
+
+@pytest.mark.anyio
+async def test_save_again_replaces_row_and_aggregates(db_path, db):
+    prefs = PreferenceRepository(db_path, features=color_features, db=db)
+    repo = SavedOutfitRepository(db_path, db=db, preferences=prefs)
+    await prefs.init()
+    await repo.init()
+    changes: list[tuple[str, dict | None, bool]] = []
+    repo.add_listener(lambda _uid, oid, payload, replaced: changes.append((oid, payload, replaced)))
+
+    await repo.save_many("u1", [("o1", {"outfit_id": "o1", "color": "red"}), ("o2", {"outfit_id": "o2", "color": "red"})])
+    await repo.save_many("u1", [("o1", {"outfit_id": "o1", "color": "green"})])
+
+    saved = await repo.list_for_user("u1", limit=10)
+    assert [(r.outfit_id, r.payload["color"]) for r in saved] == [("o1", "green"), ("o2", "red")]
+    assert _scores(db, "u1") == {("color", "green"): 1.0, ("color", "red"): 1.0, ("liked", "o1"): 1.0, ("liked", "o2"): 1.0}
+    assert [(oid, replaced) for oid, _payload, replaced in changes] == [("o1", False), ("o2", False), ("o1", True)]
+
+    assert await repo.delete_many("u1", ["o1", "o1", "missing"]) == 1
+    assert await repo.exists("u1", ["o1", "o2"]) == {"o2"}
+    assert _scores(db, "u1") == {("color", "red"): 1.0, ("liked", "o2"): 1.0}
+    assert changes[-1] == ("o1", None, False)
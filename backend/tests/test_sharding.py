@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from app.repositories.sharding import shard_for, shard_path
+
+USERS = [f"user-{n}" for n in range(20_000)]
+
+
+def test_shard_for_is_pinned():
+    # Changing these reassigns stored users to the wrong shard files.
+    assert {u: shard_for(u, 8) for u in ["alice", "bob", "u1", "user-42", "😀"]} == {
+        "alice": 1, "bob": 7, "u1": 1, "user-42": 1, "😀": 0,
+    }
+
+
+def test_shard_for_does_not_depend_on_the_process():
+    code = "from app.repositories.sharding import shard_for; print([shard_for(f'user-{n}', 16) for n in range(200)])"
+    backend = Path(__file__).resolve().parents[1]
+    outputs = {
+        subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=backend,
+            env={**os.environ, "PYTHONHASHSEED": seed},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        for seed in ("1", "2")
+    }
+    assert outputs == {f"{[shard_for(f'user-{n}', 16) for n in range(200)]}\n"}
+
+
+@pytest.mark.parametrize("shards", [0, 1])
+def test_single_shard(shards):
+    assert {shard_for(u, shards) for u in USERS[:100]} == {0}
+
+
+@pytest.mark.parametrize("shards", [2, 3, 7, 16])
+def test_growing_moves_about_one_in_n_plus_one_users_to_the_new_shard(shards):
+    before = [shard_for(u, shards) for u in USERS]
+    after = [shard_for(u, shards + 1) for u in USERS]
+    moved = [(old, new) for old, new in zip(before, after) if old != new]
+
+    assert {new for _old, new in moved} == {shards}
+    assert len(moved) / len(USERS) == pytest.approx(1 / (shards + 1), rel=0.1)
+    # And the users spread evenly.
+    counts = [after.count(i) for i in range(shards + 1)]
+    assert max(counts) / min(counts) < 1.15
+
+
+def test_shard_path():
+    assert shard_path("data/app.db", 3) == str(Path("data/app.shard3.db"))
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import io
+import struct
+import zlib
+
+import pytest
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+from starlette.datastructures import UploadFile as StarletteUploadFile
+
+from app.core.errors import InvalidInputError, PayloadTooLargeError
+from app.utils.uploads import ImageHeader, UploadBodyLimit, UploadLimits, read_image_upload, sniff_image_header
+
+
+def _jpeg(width: int, height: int, sof: int = 0xC0, app_bytes: int = 20) -> bytes:
+    app0 = b"\xff\xe0" + struct.pack(">H", app_bytes + 2) + b"\0" * app_bytes
+    dht = b"\xff\xc4" + struct.pack(">H", 4) + b"\0\0"
+    frame = bytes([0xFF, sof]) + struct.pack(">HBHHB", 11, 8, height, width, 1) + b"\x01\x11\x00"
+    return b"\xff\xd8" + app0 + dht + frame + b"\xff\xda"
+
+
+def _png(width: int, height: int) -> bytes:
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + ihdr + struct.pack(">I", zlib.crc32(b"IHDR" + ihdr))
+
+
+def _webp(chunk: bytes, body: bytes) -> bytes:
+    return b"RIFF" + struct.pack("<I", 4 + 8 + len(body)) + b"WEBP" + chunk + struct.pack("<I", len(body)) + body
+
+
+def _vp8l(width: int, height: int) -> bytes:
+    bits = (width - 1) | ((height - 1) << 14)
+    return _webp(b"VP8L", b"\x2f" + struct.pack("<I", bits))
+
+
+@pytest.mark.parametrize(
+    "head, expected",
+    [
+        (_jpeg(640, 480), ImageHeader("jpeg", 640, 480)),
+        (_jpeg(4000, 3000, sof=0xC2, app_bytes=5000), ImageHeader("jpeg", 4000, 3000)),
+        (b"\xff\xd8\xff\xe0\x00\x10JFIF", ImageHeader("jpeg", None, None)),
+        (_png(1920, 1080), ImageHeader("png", 1920, 1080)),
+        (b"\x89PNG\r\n\x1a\n", ImageHeader("png")),
+        (_webp(b"VP8 ", b"\0\0\0\x9d\x01\x2a" + struct.pack("<HH", 800, 600)), ImageHeader("webp", 800, 600)),
+        (_vp8l(1234, 567), ImageHeader("webp", 1234, 567)),
+        (_webp(b"VP8X", b"\x00" * 4 + (300 - 1).to_bytes(3, "little") + (200 - 1).to_bytes(3, "little")),
+         ImageHeader("webp", 300, 200)),
+        (b"GIF89a" + struct.pack("<HH", 320, 240), ImageHeader("gif", 320, 240)),
+        (b"GIF87a", ImageHeader("gif")),
+        (b"BM" + b"\0" * 16 + struct.pack("<ii", 100, -50), ImageHeader("bmp", 100, 50)),
+    ],
+)
+def test_sniff_image_header(head, expected):
+    assert sniff_image_header(head) == expected
+
+
+@pytest.mark.parametrize("head", [b"", b"%PDF-1.7", b"<svg xmlns=", b"RIFF\0\0\0\0WAVE", b"\xff\xd8"])
+def test_sniff_rejects_non_images(head):
+    assert sniff_image_header(head) is None
+
+
+LIMITS = UploadLimits(max_bytes=10_000, max_pixels=1_000_000)
+
+
+def _upload(data: bytes) -> StarletteUploadFile:
+    return StarletteUploadFile(io.BytesIO(data), size=len(data), filename="x")
+
+
+@pytest.mark.anyio
+async def test_read_image_upload_rewinds_the_spool():
+    data = _png(800, 600) + b"\0" * 100
+    with await read_image_upload(_upload(data), LIMITS) as upload:
+        assert upload.header == ImageHeader("png", 800, 600)
+        assert upload.size == len(data)
+        assert upload.file.read() == data
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "data, error",
+    [
+        (b"", InvalidInputError),
+        (b"not an image", InvalidInputError),
+        (_png(0, 10), InvalidInputError),
+        (_png(2000, 2000), PayloadTooLargeError),
+        (_png(10, 10) + b"\0" * 10_000, PayloadTooLargeError),
+    ],
+)
+async def test_read_image_upload_rejects(data, error):
+    with pytest.raises(error):
+        await read_image_upload(_upload(data), LIMITS)
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(UploadBodyLimit, limits={"/upload": 1000})
+    calls: list[int] = []
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        calls.append(1)
+        return {"size": len(await file.read())}
+
+    @app.post("/other")
+    async def other(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    with TestClient(app) as c:
+        c.calls = calls
+        yield c
+
+
+def test_body_limit_allows_small_uploads(client):
+    response = client.post("/upload", files={"file": ("a.png", b"x" * 500)})
+    assert response.status_code == 200 and response.json() == {"size": 500}
+
+
+def test_body_limit_rejects_declared_length_without_reading(client):
+    response = client.post("/upload", files={"file": ("a.png", b"x" * 5000)})
+    assert response.status_code == 413
+    assert client.calls == []
+
+
+def test_body_limit_stops_chunked_bodies_at_the_cap(client):
+    boundary = "b0undary"
+    head = f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="a.png"\r\n\r\n'.encode()
+
+    def _chunks():
+        yield head
+        for _ in range(100):
+            yield b"x" * 100
+        yield f"\r\n--{boundary}--\r\n".encode()
+
+    response = client.post(
+        "/upload", content=_chunks(), headers={"content-type": f"multipart/form-data; boundary={boundary}"}
+    )
+    assert response.status_code == 413
+    assert client.calls == []
+
+
+def test_body_limit_ignores_other_routes(client):
+    response = client.post("/other", files={"file": ("a.png", b"x" * 5000)})
+    assert response.status_code == 200
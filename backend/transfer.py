@@ -0,0 +1,87 @@
+"""
+Export / import history and saved outfits as NDJSON, against the database
+configured for the API (DATABASE_URL / DATABASE_PATH).
+
+    python transfer.py export history > history.ndjson
+    python transfer.py export saved-outfits --user-id user_123 -o saved.ndjson
+    python transfer.py import history history.ndjson
+    python transfer.py import saved-outfits - < saved.ndjson
+
+Rows stream through in batches of --batch-rows (default TRANSFER_BATCH_ROWS),
+so memory stays flat for any file size. Safe to run while the API is up.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from typing import AsyncIterator, BinaryIO
+
+import anyio
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.core.config import get_settings
+from app.repositories.factory import open_storage
+from app.services.data_transfer import DATASETS, export_ndjson, import_ndjson
+from app.services.outfit_scoring import OutfitCatalog
+from app.services.user_memory import preference_features
+
+
+async def _read_chunks(src: BinaryIO, size: int = 1024 * 1024) -> AsyncIterator[bytes]:
+    while True:
+        chunk = await anyio.to_thread.run_sync(src.read, size)
+        if not chunk:
+            return
+        yield chunk
+
+
+async def _main(args: argparse.Namespace) -> None:
+    # Compaction is left to the API process; a one-off transfer should not start it.
+    settings = get_settings().model_copy(update={"history_retention_days": 0.0})
+    batch_rows = args.batch_rows or settings.transfer_batch_rows
+    storage = await open_storage(settings, outfits=OutfitCatalog(), preference_features=preference_features)
+    try:
+        if args.command == "export":
+            out = open(args.output, "wb") if args.output != "-" else sys.stdout.buffer
+            try:
+                async for chunk in export_ndjson(
+                    args.dataset, storage.history, storage.saved, user_id=args.user_id, batch_rows=batch_rows
+                ):
+                    await anyio.to_thread.run_sync(out.write, chunk)
+            finally:
+                if out is not sys.stdout.buffer:
+                    out.close()
+        else:
+            src = open(args.input, "rb") if args.input != "-" else sys.stdin.buffer
+            try:
+                result = await import_ndjson(
+                    args.dataset, _read_chunks(src), storage.history, storage.saved, batch_rows=batch_rows
+                )
+            finally:
+                if src is not sys.stdin.buffer:
+                    src.close()
+            print(json.dumps({"rows": result.rows, "users": len(result.users)}), file=sys.stderr)
+    finally:
+        await storage.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    exp = sub.add_parser("export", help="write NDJSON")
+    exp.add_argument("dataset", choices=DATASETS)
+    exp.add_argument("--user-id", default=None, help="only this user's rows")
+    exp.add_argument("-o", "--output", default="-", help="file to write (default: stdout)")
+    imp = sub.add_parser("import", help="read NDJSON")
+    imp.add_argument("dataset", choices=DATASETS)
+    imp.add_argument("input", nargs="?", default="-", help="file to read (default: stdin)")
+    for p in (exp, imp):
+        p.add_argument("--batch-rows", type=int, default=None, help="rows per batch / transaction")
+    anyio.run(_main, parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()